@@ -0,0 +1,120 @@
+"""add_apply_rsvp_function
+
+Revision ID: add_apply_rsvp
+Revises: add_profile_onboarding
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_apply_rsvp'
+down_revision: Union[str, None] = 'add_profile_onboarding'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+APPLY_RSVP_SQL = """
+CREATE OR REPLACE FUNCTION public.apply_rsvp(
+    p_event_id INTEGER,
+    p_user_id INTEGER,
+    p_action TEXT,
+    p_actor_id INTEGER DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_event RECORD;
+    v_current TEXT;
+    v_count INTEGER := 0;
+    v_inserted INTEGER;
+BEGIN
+    -- Lock the event row so concurrent RSVPs for the same event are serialized
+    SELECT id, host_id, max_participants, is_cancelled
+      INTO v_event
+      FROM public.events
+     WHERE id = p_event_id
+       FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('ok', false, 'error', 'event_not_found');
+    END IF;
+
+    IF p_action = 'request' THEN
+        IF v_event.is_cancelled THEN
+            RETURN jsonb_build_object('ok', false, 'error', 'event_cancelled');
+        END IF;
+    ELSIF p_action = 'approve' THEN
+        IF v_event.host_id IS DISTINCT FROM p_actor_id THEN
+            RETURN jsonb_build_object('ok', false, 'error', 'not_host');
+        END IF;
+    ELSE
+        RETURN jsonb_build_object('ok', false, 'error', 'invalid_action');
+    END IF;
+
+    SELECT status::TEXT
+      INTO v_current
+      FROM public.event_rsvps
+     WHERE event_id = p_event_id AND user_id = p_user_id;
+
+    IF p_action = 'request' AND FOUND THEN
+        RETURN jsonb_build_object('ok', false, 'error', 'already_rsvpd', 'status', v_current);
+    END IF;
+    IF p_action = 'approve' AND NOT FOUND THEN
+        RETURN jsonb_build_object('ok', false, 'error', 'rsvp_not_found');
+    END IF;
+
+    -- Capacity counts approved participants, excluding the host
+    SELECT COUNT(*)
+      INTO v_count
+      FROM public.event_rsvps
+     WHERE event_id = p_event_id
+       AND status = 'approved'
+       AND user_id IS DISTINCT FROM v_event.host_id;
+
+    IF p_action = 'approve' AND v_current = 'approved' THEN
+        RETURN jsonb_build_object('ok', true, 'status', 'approved', 'participant_count', v_count);
+    END IF;
+
+    IF COALESCE(v_event.max_participants, 0) > 0 AND v_count >= v_event.max_participants THEN
+        RETURN jsonb_build_object('ok', false, 'error', 'event_full', 'participant_count', v_count);
+    END IF;
+
+    IF p_action = 'request' THEN
+        -- All RSVPs require manual host approval
+        INSERT INTO public.event_rsvps (event_id, user_id, status, attended)
+        VALUES (p_event_id, p_user_id, 'pending', false)
+        ON CONFLICT (event_id, user_id) DO NOTHING;
+        GET DIAGNOSTICS v_inserted = ROW_COUNT;
+        IF v_inserted = 0 THEN
+            RETURN jsonb_build_object('ok', false, 'error', 'already_rsvpd');
+        END IF;
+        RETURN jsonb_build_object('ok', true, 'status', 'pending', 'participant_count', v_count);
+    END IF;
+
+    UPDATE public.event_rsvps
+       SET status = 'approved'
+     WHERE event_id = p_event_id AND user_id = p_user_id;
+    RETURN jsonb_build_object('ok', true, 'status', 'approved', 'participant_count', v_count + 1);
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.execute(APPLY_RSVP_SQL)
+    # p_actor_id is trusted input from the backend; keep the function off the public API roles
+    op.execute("""
+        DO $$ BEGIN
+            REVOKE EXECUTE ON FUNCTION public.apply_rsvp(INTEGER, INTEGER, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+        EXCEPTION
+            WHEN undefined_object THEN null;
+        END $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS public.apply_rsvp(INTEGER, INTEGER, TEXT, INTEGER)")
@@ -0,0 +1,38 @@
+"""add_approved_rsvp_counts_function
+
+Revision ID: add_approved_rsvp_counts
+Revises: add_event_map_clusters
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_approved_rsvp_counts'
+down_revision: Union[str, None] = 'add_event_map_clusters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+APPROVED_RSVP_COUNTS_SQL = """
+CREATE OR REPLACE FUNCTION public.approved_rsvp_counts(p_user_ids INTEGER[])
+RETURNS TABLE (user_id INTEGER, count BIGINT) AS $$
+    SELECT r.user_id, COUNT(*)
+      FROM public.event_rsvps r
+     WHERE r.user_id = ANY(p_user_ids)
+       AND r.status = 'approved'
+     GROUP BY r.user_id;
+$$ LANGUAGE sql STABLE;
+"""
+
+
+def upgrade() -> None:
+    op.execute(APPROVED_RSVP_COUNTS_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS public.approved_rsvp_counts(INTEGER[])")
@@ -0,0 +1,52 @@
+"""add_buddy_pair_key
+
+Revision ID: add_buddy_pair_key
+Revises: add_user_interests
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_buddy_pair_key'
+down_revision: Union[str, None] = 'add_user_interests'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep one row of any pair stored more than once (either direction) so the unique
+    # index can be built: the most settled status (accepted, then pending, then
+    # rejected), the oldest row among equals
+    op.execute("""
+        DELETE FROM buddies
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY LEAST(user1_id, user2_id), GREATEST(user1_id, user2_id)
+                    ORDER BY CASE status
+                                 WHEN 'accepted' THEN 0
+                                 WHEN 'pending' THEN 1
+                                 WHEN 'rejected' THEN 2
+                                 ELSE 3
+                             END,
+                             id
+                ) AS rank
+                FROM buddies
+            ) ranked
+            WHERE rank > 1
+        )
+    """)
+    op.add_column('buddies', sa.Column('low_id', sa.Integer(), sa.Computed('LEAST(user1_id, user2_id)', persisted=True)))
+    op.add_column('buddies', sa.Column('high_id', sa.Integer(), sa.Computed('GREATEST(user1_id, user2_id)', persisted=True)))
+    op.create_index('uq_buddies_pair', 'buddies', ['low_id', 'high_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_buddies_pair', table_name='buddies')
+    op.drop_column('buddies', 'high_id')
+    op.drop_column('buddies', 'low_id')
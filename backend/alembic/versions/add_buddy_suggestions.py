@@ -0,0 +1,47 @@
+"""add_buddy_suggestions
+
+Revision ID: add_buddy_suggestions
+Revises: add_buddy_pair_key
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_buddy_suggestions'
+down_revision: Union[str, None] = 'add_buddy_pair_key'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'buddy_suggestion_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_full', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('users_scored', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'buddy_suggestions',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='fk_buddy_suggestions_user', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['candidate_id'], ['users.id'], name='fk_buddy_suggestions_candidate', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'candidate_id')
+    )
+    op.execute("CREATE INDEX idx_buddy_suggestions_user_score ON buddy_suggestions (user_id, score DESC)")
+
+
+def downgrade() -> None:
+    op.drop_index('idx_buddy_suggestions_user_score', table_name='buddy_suggestions')
+    op.drop_table('buddy_suggestions')
+    op.drop_table('buddy_suggestion_runs')
@@ -0,0 +1,59 @@
+"""add_event_map_clusters_function
+
+Revision ID: add_event_map_clusters
+Revises: add_geocoded_locations
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_event_map_clusters'
+down_revision: Union[str, None] = 'add_geocoded_locations'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+EVENT_MAP_CLUSTERS_SQL = """
+CREATE OR REPLACE FUNCTION public.event_map_clusters(
+    p_cells TEXT[],
+    p_sport_id INTEGER DEFAULT NULL,
+    p_start TIMESTAMPTZ DEFAULT NULL,
+    p_end TIMESTAMPTZ DEFAULT NULL,
+    p_sample INTEGER DEFAULT 3
+)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_agg(to_jsonb(c) ORDER BY c.count DESC, c.cell), '[]'::jsonb)
+      FROM (
+        SELECT cell,
+               COUNT(*) AS count,
+               AVG(e.latitude) AS latitude,
+               AVG(e.longitude) AS longitude,
+               MIN(e.latitude) AS south,
+               MIN(e.longitude) AS west,
+               MAX(e.latitude) AS north,
+               MAX(e.longitude) AS east,
+               (ARRAY_AGG(e.id ORDER BY e.start_time < NOW(), ABS(EXTRACT(EPOCH FROM e.start_time - NOW()))))[1:p_sample] AS event_ids
+          FROM unnest(p_cells) AS cell
+          -- Prefix range that idx_events_geohash (text_pattern_ops) serves; '{' sorts after every geohash character
+          JOIN public.events e ON e.geohash ~>=~ cell AND e.geohash ~<~ (cell || '{')
+         WHERE NOT e.is_cancelled
+           AND (p_sport_id IS NULL OR e.sport_id = p_sport_id)
+           AND (p_start IS NULL OR e.start_time >= p_start)
+           AND (p_end IS NULL OR e.start_time <= p_end)
+         GROUP BY cell
+      ) AS c;
+$$ LANGUAGE sql STABLE;
+"""
+
+
+def upgrade() -> None:
+    op.execute(EVENT_MAP_CLUSTERS_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS public.event_map_clusters(TEXT[], INTEGER, TIMESTAMPTZ, TIMESTAMPTZ, INTEGER)")
@@ -0,0 +1,38 @@
+"""add_geocoded_locations
+
+Revision ID: add_geocoded_locations
+Revises: add_buddy_suggestions
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_geocoded_locations'
+down_revision: Union[str, None] = 'add_buddy_suggestions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('users', 'events'):
+        op.add_column(table, sa.Column('latitude', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('longitude', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('geohash', sa.String(length=12), nullable=True))
+    # text_pattern_ops lets geohash LIKE 'prefix%' use the index whatever the collation
+    op.execute("CREATE INDEX idx_users_geohash ON users (geohash text_pattern_ops)")
+    op.execute("CREATE INDEX idx_events_geohash ON events (geohash text_pattern_ops)")
+    # Existing rows are geocoded by scripts/geocode_locations.py
+
+
+def downgrade() -> None:
+    op.drop_index('idx_events_geohash', table_name='events')
+    op.drop_index('idx_users_geohash', table_name='users')
+    for table in ('users', 'events'):
+        op.drop_column(table, 'geohash')
+        op.drop_column(table, 'longitude')
+        op.drop_column(table, 'latitude')
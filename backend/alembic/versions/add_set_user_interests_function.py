@@ -0,0 +1,94 @@
+"""add_set_user_interests_function
+
+Revision ID: add_user_interests
+Revises: add_apply_rsvp
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_user_interests'
+down_revision: Union[str, None] = 'add_apply_rsvp'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SET_USER_INTERESTS_SQL = """
+CREATE OR REPLACE FUNCTION public.set_user_interests(
+    p_user_id INTEGER,
+    p_sport_ids INTEGER[] DEFAULT NULL,
+    p_goal_ids INTEGER[] DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_sports_added INTEGER[] := '{}';
+    v_sports_removed INTEGER[] := '{}';
+    v_goals_added INTEGER[] := '{}';
+    v_goals_removed INTEGER[] := '{}';
+BEGIN
+    IF p_sport_ids IS NOT NULL THEN
+        WITH removed AS (
+            DELETE FROM public.user_sports
+             WHERE user_id = p_user_id
+               AND NOT (sport_id = ANY (p_sport_ids))
+            RETURNING sport_id
+        )
+        SELECT COALESCE(array_agg(sport_id), '{}') INTO v_sports_removed FROM removed;
+
+        WITH added AS (
+            INSERT INTO public.user_sports (user_id, sport_id)
+            SELECT DISTINCT p_user_id, s FROM unnest(p_sport_ids) AS s WHERE s IS NOT NULL
+            ON CONFLICT (user_id, sport_id) DO NOTHING
+            RETURNING sport_id
+        )
+        SELECT COALESCE(array_agg(sport_id), '{}') INTO v_sports_added FROM added;
+    END IF;
+
+    IF p_goal_ids IS NOT NULL THEN
+        WITH removed AS (
+            DELETE FROM public.user_goals
+             WHERE user_id = p_user_id
+               AND NOT (goal_id = ANY (p_goal_ids))
+            RETURNING goal_id
+        )
+        SELECT COALESCE(array_agg(goal_id), '{}') INTO v_goals_removed FROM removed;
+
+        WITH added AS (
+            INSERT INTO public.user_goals (user_id, goal_id)
+            SELECT DISTINCT p_user_id, g FROM unnest(p_goal_ids) AS g WHERE g IS NOT NULL
+            ON CONFLICT (user_id, goal_id) DO NOTHING
+            RETURNING goal_id
+        )
+        SELECT COALESCE(array_agg(goal_id), '{}') INTO v_goals_added FROM added;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'sports_added', to_jsonb(v_sports_added),
+        'sports_removed', to_jsonb(v_sports_removed),
+        'goals_added', to_jsonb(v_goals_added),
+        'goals_removed', to_jsonb(v_goals_removed)
+    );
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.execute(SET_USER_INTERESTS_SQL)
+    # p_user_id is trusted input from the backend; keep the function off the public API roles
+    op.execute("""
+        DO $$ BEGIN
+            REVOKE EXECUTE ON FUNCTION public.set_user_interests(INTEGER, INTEGER[], INTEGER[]) FROM PUBLIC, anon, authenticated;
+        EXCEPTION
+            WHEN undefined_object THEN null;
+        END $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS public.set_user_interests(INTEGER, INTEGER[], INTEGER[])")
@@ -2,10 +2,17 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from supabase import Client
 from typing import List, Optional
 from datetime import datetime
-from core.database import get_supabase
+from core.database import fetch_all, get_supabase
+from core.responses import model_response
 from api.auth import get_current_user
 from schemas.buddy import BuddyResponse, BuddyDetail, BuddyRequest, BuddyUpdate
-from services.buddying import find_potential_buddies, create_buddy_request, calculate_buddy_score
+from models.buddy import BuddyStatus
+from core.security import create_score_token
+from services.buddying import (
+    find_potential_buddies, find_nearby_buddies, create_buddy_request, load_buddy_list,
+    invalidate_connections
+)
+from services.suggestions import load_stored_suggestions
 
 router = APIRouter(prefix="/buddies", tags=["buddies"])
 
@@ -40,76 +47,75 @@ async def get_suggested_buddies(
             detail="You must enable discovery to find buddies"
         )
     
-    # Get current user's sports and goals for score calculation
+    # Precomputed suggestions (scripts/compute_buddy_suggestions.py); live scoring
+    # only when nothing is stored for the user or the page runs past the stored top-K
     try:
-        current_user_sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", user_id).execute()
-        current_user["sports"] = []
-        if current_user_sports_result.data:
-            for item in current_user_sports_result.data:
-                if item.get("sports"):
-                    current_user["sports"].append(item["sports"])
+        paginated_buddies = await load_stored_suggestions(supabase, user_id, offset, limit)
     except Exception:
-        current_user["sports"] = []
+        paginated_buddies = None
+    if paginated_buddies is None:
+        # Scores come from the match-feature store; only the requested page is hydrated
+        all_buddies = await find_potential_buddies(current_user, supabase, limit=offset + limit, min_score=0.0)
+        paginated_buddies = all_buddies[offset:offset + limit]
     
-    try:
-        current_user_goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", user_id).execute()
-        current_user["goals"] = []
-        if current_user_goals_result.data:
-            for item in current_user_goals_result.data:
-                if item.get("goals"):
-                    current_user["goals"].append(item["goals"])
-    except Exception:
-        current_user["goals"] = []
+    user_ids = [m["user"]["id"] for m in paginated_buddies]
     
-    # Get all potential buddies using the service (no score filtering - show all discoverable users)
-    all_buddies = find_potential_buddies(current_user, supabase, limit=None, min_score=0.0)
+    # Approved RSVPs of the whole page in one read: event counts and the 3 most recent events
+    approved_rsvps = {uid: [] for uid in user_ids}
+    if user_ids:
+        try:
+            rsvp_rows = fetch_all(
+                lambda: supabase.table("event_rsvps").select(
+                    "user_id, rsvp_at, events(id, title, start_time, sports(id, name, icon))"
+                ).in_("user_id", user_ids).eq("status", "approved"),
+                "event_id", "user_id"
+            )
+            for rsvp in rsvp_rows:
+                approved_rsvps[rsvp["user_id"]].append(rsvp)
+        except Exception:
+            pass
     
-    # Apply offset and limit for pagination
-    paginated_buddies = all_buddies[offset:offset + limit]
+    # Photos of the whole page in one read
+    photos_by_user = {uid: [] for uid in user_ids}
+    if user_ids:
+        try:
+            photos_result = supabase.table("user_photos").select("user_id, photo_url").in_(
+                "user_id", user_ids
+            ).order("display_order").execute()
+            for p in photos_result.data or []:
+                if p.get("photo_url"):
+                    photos_by_user[p["user_id"]].append(p["photo_url"])
+        except Exception:
+            pass
     
     result = []
     for m in paginated_buddies:
         user = m["user"]
+        rsvps = approved_rsvps[user["id"]]
         
-        # Get recent events (last 3 events user attended/RSVPed to)
+        # Recent events (last 3 events the user was approved for)
         recent_events = []
-        try:
-            rsvps_result = supabase.table("event_rsvps").select("event_id, events(*)").eq("user_id", user["id"]).eq("status", "approved").order("rsvp_at", desc=True).limit(3).execute()
-            if rsvps_result.data:
-                for rsvp in rsvps_result.data:
-                    event = rsvp.get("events")
-                    if event:
-                        # Get sport info
-                        sport_data = None
-                        if event.get("sport_id"):
-                            try:
-                                sport_result = supabase.table("sports").select("*").eq("id", event["sport_id"]).single().execute()
-                                if sport_result.data:
-                                    sport_data = {
-                                        "id": sport_result.data.get("id"),
-                                        "name": sport_result.data.get("name") or "Unknown Sport",
-                                        "icon": sport_result.data.get("icon") or "🏃"
-                                    }
-                            except Exception:
-                                pass
-                        
-                        recent_events.append({
-                            "id": event.get("id"),
-                            "title": event.get("title"),
-                            "sport": sport_data,
-                            "start_time": event.get("start_time"),
-                        })
-        except Exception:
-            recent_events = []
+        for rsvp in sorted(rsvps, key=lambda r: r.get("rsvp_at") or "", reverse=True):
+            event = rsvp.get("events")
+            if not event:
+                continue
+            sport = event.get("sports")
+            recent_events.append({
+                "id": event.get("id"),
+                "title": event.get("title"),
+                "sport": {
+                    "id": sport.get("id"),
+                    "name": sport.get("name") or "Unknown Sport",
+                    "icon": sport.get("icon") or "🏃"
+                } if sport else None,
+                "start_time": event.get("start_time"),
+            })
+            if len(recent_events) == 3:
+                break
         
         # Calculate badges
         badges = []
-        event_count = 0
-        try:
-            event_count_result = supabase.table("event_rsvps").select("id", count="exact").eq("user_id", user["id"]).eq("status", "approved").execute()
-            event_count = event_count_result.count if event_count_result.count is not None else 0
-        except Exception:
-            event_count = 0
+        event_count = len(rsvps)
         
         if event_count >= 10:
             badges.append({"name": "Event Veteran", "icon": "🏆"})
@@ -122,14 +128,8 @@ async def get_suggested_buddies(
         if len(user_sports) >= 5:
             badges.append({"name": "Multi-Sport", "icon": "🎯"})
 
-        # Get user's actual uploaded photos (or empty if none)
-        photos = []
-        try:
-            photos_result = supabase.table("user_photos").select("photo_url").eq("user_id", user["id"]).order("display_order").execute()
-            if photos_result.data:
-                photos = [p["photo_url"] for p in photos_result.data if p.get("photo_url")]
-        except Exception:
-            pass
+        # User's actual uploaded photos (or empty if none)
+        photos = photos_by_user[user["id"]]
 
         result.append({
             "user": {
@@ -146,12 +146,64 @@ async def get_suggested_buddies(
                 "event_count": event_count,
                 "photos": photos
             },
-            "score": m["score"]
+            "score": m["score"],
+            # Signed score to send back with POST /buddies, so it is not recomputed
+            "score_token": create_score_token(user_id, user["id"], m["score"])
         })
     
     return result
 
 
+@router.get("/nearby", response_model=List[dict])
+async def get_nearby_buddies(
+    radius_km: float = Query(10.0, gt=0, le=100),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """Discoverable users within radius_km of the current user's location, best match first"""
+    try:
+        supabase: Client = get_supabase()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Supabase connection error: {str(e)}"
+        )
+    
+    user_id = current_user.get("id")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User ID not found"
+        )
+    
+    if not current_user.get("is_discoverable", False):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You must enable discovery to find buddies"
+        )
+    
+    try:
+        nearby = await find_nearby_buddies(current_user, supabase, radius_km, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return [{
+        "user": {
+            "id": m["user"]["id"],
+            "full_name": m["user"].get("full_name"),
+            "age": m["user"].get("age"),
+            "location": m["user"].get("location"),
+            "avatar_url": m["user"].get("avatar_url"),
+            "bio": m["user"].get("bio"),
+            "sports": m["user"].get("sports", []),
+            "goals": m["user"].get("goals", []),
+        },
+        "score": m["score"],
+        "distance_km": m["distance_km"],
+        "score_token": create_score_token(user_id, m["user"]["id"], m["score"])
+    } for m in nearby]
+
+
 @router.post("", response_model=BuddyResponse, status_code=status.HTTP_201_CREATED)
 async def create_buddy(
     buddy_request: BuddyRequest,
@@ -179,61 +231,12 @@ async def create_buddy(
             detail="Cannot buddy with yourself"
         )
     
-    # Verify user2 exists
+    # The score comes from the suggestion's score token when valid; duplicates raise ValueError
     try:
-        user2_result = supabase.table("users").select("*").eq("id", buddy_request.user2_id).single().execute()
-        if not user2_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+        new_buddy = await create_buddy_request(
+            user_id, buddy_request.user2_id, supabase, buddy_request.score_token
         )
-    
-    # Check if buddy already exists
-    try:
-        # Check both directions: user1->user2 and user2->user1
-        existing1 = supabase.table("buddies").select("*").eq("user1_id", user_id).eq("user2_id", buddy_request.user2_id).execute()
-        existing2 = supabase.table("buddies").select("*").eq("user1_id", buddy_request.user2_id).eq("user2_id", user_id).execute()
-        
-        if (existing1.data and len(existing1.data) > 0) or (existing2.data and len(existing2.data) > 0):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Buddy already exists"
-            )
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise
-        # If query fails, continue (might be a connection issue)
-        pass
-    
-    # Calculate match score
-    try:
-        score = calculate_buddy_score(current_user, user2_result.data, supabase)
-    except Exception:
-        score = 50.0  # Default score if calculation fails
-    
-    # Create buddy request
-    try:
-        buddy_result = supabase.table("buddies").insert({
-            "user1_id": user_id,
-            "user2_id": buddy_request.user2_id,
-            "match_score": score,
-            "status": "pending"
-        }).execute()
         
-        if not buddy_result.data or len(buddy_result.data) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create buddy request"
-            )
-        
-        new_buddy = buddy_result.data[0]
         return BuddyResponse(
             id=new_buddy["id"],
             user1_id=new_buddy["user1_id"],
@@ -242,9 +245,18 @@ async def create_buddy(
             status=new_buddy.get("status", "pending"),
             created_at=datetime.fromisoformat(new_buddy["created_at"].replace("Z", "+00:00")) if isinstance(new_buddy.get("created_at"), str) else new_buddy.get("created_at")
         )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        if isinstance(e, HTTPException):
-            raise
+        # user2 is verified by the foreign key rather than a separate lookup
+        if getattr(e, "code", None) == "23503":
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create buddy request: {str(e)}"
@@ -253,10 +265,16 @@ async def create_buddy(
 
 @router.get("", response_model=List[BuddyDetail])
 async def list_buddies(
-    status_filter: Optional[str] = Query(None, alias="status"),
+    status_filter: Optional[BuddyStatus] = Query(None, alias="status"),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
     current_user: dict = Depends(get_current_user)
 ):
-    """List all buddies for current user"""
+    """
+    List buddies for current user, newest first.
+    With `limit`, results are paginated: the X-Next-Cursor response header holds
+    the `cursor` for the next page and is absent on the last one.
+    """
     try:
         supabase: Client = get_supabase()
     except Exception as e:
@@ -272,87 +290,16 @@ async def list_buddies(
             detail="User ID not found"
         )
     
-    # Get all buddies where user is user1 or user2
     try:
-        # Get buddies where user is user1
-        buddies1_result = supabase.table("buddies").select("*").eq("user1_id", user_id).execute()
-        buddies1 = buddies1_result.data if buddies1_result.data else []
-        
-        # Get buddies where user is user2
-        buddies2_result = supabase.table("buddies").select("*").eq("user2_id", user_id).execute()
-        buddies2 = buddies2_result.data if buddies2_result.data else []
-        
-        # Combine and deduplicate
-        all_buddies = buddies1 + buddies2
-        buddy_ids = set()
-        buddies = []
-        for buddy in all_buddies:
-            if buddy["id"] not in buddy_ids:
-                if not status_filter or buddy.get("status") == status_filter:
-                    buddies.append(buddy)
-                    buddy_ids.add(buddy["id"])
+        buddies, next_cursor = await load_buddy_list(
+            supabase, user_id, status=status_filter.value if status_filter else None, cursor=cursor, limit=limit
+        )
     except Exception:
-        buddies = []
+        buddies, next_cursor = [], None
     
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
     result = []
     for buddy in buddies:
-        # Determine which user is the other user
-        other_user_id = buddy["user2_id"] if buddy["user1_id"] == user_id else buddy["user1_id"]
-        
-        # Get user1 and user2 data
-        try:
-            user1_result = supabase.table("users").select("id, full_name, age, location, avatar_url, bio").eq("id", buddy["user1_id"]).single().execute()
-            user1_data = user1_result.data if user1_result.data else {}
-        except Exception:
-            user1_data = {"id": buddy["user1_id"], "full_name": "Unknown", "age": None, "location": None, "avatar_url": None, "bio": None}
-        
-        try:
-            user2_result = supabase.table("users").select("id, full_name, age, location, avatar_url, bio").eq("id", buddy["user2_id"]).single().execute()
-            user2_data = user2_result.data if user2_result.data else {}
-        except Exception:
-            user2_data = {"id": buddy["user2_id"], "full_name": "Unknown", "age": None, "location": None, "avatar_url": None, "bio": None}
-        
-        # Get sports and goals for both users
-        try:
-            user1_sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", buddy["user1_id"]).execute()
-            user1_sports = []
-            if user1_sports_result.data:
-                for item in user1_sports_result.data:
-                    if item.get("sports"):
-                        user1_sports.append(item["sports"])
-        except Exception:
-            user1_sports = []
-        
-        try:
-            user2_sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", buddy["user2_id"]).execute()
-            user2_sports = []
-            if user2_sports_result.data:
-                for item in user2_sports_result.data:
-                    if item.get("sports"):
-                        user2_sports.append(item["sports"])
-        except Exception:
-            user2_sports = []
-        
-        try:
-            user1_goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", buddy["user1_id"]).execute()
-            user1_goals = []
-            if user1_goals_result.data:
-                for item in user1_goals_result.data:
-                    if item.get("goals"):
-                        user1_goals.append(item["goals"])
-        except Exception:
-            user1_goals = []
-        
-        try:
-            user2_goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", buddy["user2_id"]).execute()
-            user2_goals = []
-            if user2_goals_result.data:
-                for item in user2_goals_result.data:
-                    if item.get("goals"):
-                        user2_goals.append(item["goals"])
-        except Exception:
-            user2_goals = []
-        
         result.append(BuddyDetail(
             id=buddy["id"],
             user1_id=buddy["user1_id"],
@@ -360,29 +307,12 @@ async def list_buddies(
             match_score=buddy.get("match_score"),
             status=buddy.get("status", "pending"),
             created_at=datetime.fromisoformat(buddy["created_at"].replace("Z", "+00:00")) if isinstance(buddy.get("created_at"), str) else buddy.get("created_at"),
-            user1={
-                "id": user1_data.get("id"),
-                "full_name": user1_data.get("full_name") or "Unknown",
-                "age": user1_data.get("age"),
-                "location": user1_data.get("location"),
-                "avatar_url": user1_data.get("avatar_url"),
-                "bio": user1_data.get("bio"),
-                "sports": [{"id": s.get("id"), "name": s.get("name"), "icon": s.get("icon")} for s in user1_sports],
-                "goals": [{"id": g.get("id"), "name": g.get("name")} for g in user1_goals]
-            },
-            user2={
-                "id": user2_data.get("id"),
-                "full_name": user2_data.get("full_name") or "Unknown",
-                "age": user2_data.get("age"),
-                "location": user2_data.get("location"),
-                "avatar_url": user2_data.get("avatar_url"),
-                "bio": user2_data.get("bio"),
-                "sports": [{"id": s.get("id"), "name": s.get("name"), "icon": s.get("icon")} for s in user2_sports],
-                "goals": [{"id": g.get("id"), "name": g.get("name")} for g in user2_goals]
-            }
+            user1=buddy["user1"],
+            user2=buddy["user2"]
         ))
     
-    return result
+    # Already validated - serialize once, skipping response_model re-validation
+    return model_response(result, headers=headers)
 
 
 @router.delete("/{buddy_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -433,6 +363,7 @@ async def delete_buddy(
     # Delete buddy
     try:
         supabase.table("buddies").delete().eq("id", buddy_id).execute()
+        invalidate_connections(buddy.get("user1_id"), buddy.get("user2_id"))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,13 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from supabase import Client
-from typing import Optional, List
-from datetime import datetime
-from core.database import get_supabase
+from typing import FrozenSet, Optional, List, Tuple
+from datetime import datetime, timezone
+from core.database import get_supabase, execute_concurrently
+from core.cache import SWRCache, TTLCache
+from core.responses import dump_json, json_response, sparse_fieldset
+from core.events import UserProfileChanged, subscribe
+from core.http_cache import NO_CACHE_PRIVATE, NO_CACHE_PUBLIC, etag_matches, make_etag, not_modified, set_cache_headers
 from api.auth import get_current_user, get_current_user_optional
-from schemas.event import EventCreate, EventUpdate, EventResponse, EventDetail
+from schemas.event import EventCreate, EventUpdate, EventResponse, EventDetail, EventMap, EventRecommendation
+from services.user_summaries import get_user_summaries, get_user_summary
+from services.rsvp import RSVPError, request_rsvp, approve_rsvp as approve_rsvp_atomic
+from services.event_map import MAX_ZOOM, load_event_map, map_cells
+from services.geo import cells_for_radius, geohash_filter, haversine_km, point_of
+from services.geocoder import geocode_point, location_columns
+from services.recommendations import DEFAULT_DAYS, DEFAULT_RADIUS_KM, invalidate_event_attendees, recommend_events
+from services.upcoming_events import EVENT_CARD_COLUMNS, index_event, unindex_event, upcoming_events
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+# Viewer-independent event detail (event, participants, host, sport) by event id.
+# Invalidated by the mutation endpoints below; the TTL bounds staleness across workers.
+_event_detail_cache = TTLCache(maxsize=2048, ttl=30, name="event_detail")
+
+# GET /events response bodies (JSON bytes) by normalized filters. The listing is the same for every
+# caller, so concurrent misses share one load and stale pages are served while
+# they refresh. Any event or RSVP write drops the whole cache (see _invalidate_event).
+_event_list_cache = SWRCache(maxsize=256, ttl=10, stale_ttl=60, name="event_list")
+
+# GET /events/map response bodies by (cluster cells, filters); dropped with the listing cache
+_event_map_cache = SWRCache(maxsize=256, ttl=10, stale_ttl=60, name="event_map")
+
+
+
+def _invalidate_event(event_id: Optional[int] = None) -> None:
+    if event_id is not None:
+        _event_detail_cache.delete(event_id)
+        invalidate_event_attendees(event_id)
+    _event_list_cache.invalidate()
+    _event_map_cache.invalidate()
+
+
+def _on_profile_changed(event: UserProfileChanged) -> None:
+    # Listing cards embed the host's name and avatar. Detail entries are versioned by
+    # users.updated_at (see _probe_event) and need no invalidation.
+    if event.fields & {"full_name", "avatar_url"}:
+        _event_list_cache.invalidate()
+
+
+subscribe(UserProfileChanged, _on_profile_changed)
+
+def _host_data(supabase: Client, host_id: Optional[int]) -> Optional[dict]:
+    """Host card for an event response; "Unknown" if the user is missing or the lookup fails"""
+    if not host_id:
+        return None
+    try:
+        host = get_user_summary(supabase, host_id) or {}
+    except Exception:
+        host = {}
+    return {"id": host_id, "full_name": host.get("full_name") or "Unknown", "avatar_url": host.get("avatar_url")}
+
+
+# apply_rsvp error codes -> HTTP errors (same status/detail the endpoints returned before)
+_RSVP_ERRORS = {
+    "event_not_found": (status.HTTP_404_NOT_FOUND, "Event not found"),
+    "event_cancelled": (status.HTTP_400_BAD_REQUEST, "Event is cancelled"),
+    "event_private": (status.HTTP_403_FORBIDDEN, "This event is private"),
+    "already_rsvpd": (status.HTTP_400_BAD_REQUEST, "Already RSVP'd to this event"),
+    "event_full": (status.HTTP_400_BAD_REQUEST, "Event is full"),
+    "not_host": (status.HTTP_403_FORBIDDEN, "Only the event host can approve RSVPs"),
+    "rsvp_not_found": (status.HTTP_404_NOT_FOUND, "RSVP not found"),
+}
+
+
+def _rsvp_http_error(error: RSVPError) -> HTTPException:
+    status_code, detail = _RSVP_ERRORS.get(
+        error.code,
+        (status.HTTP_500_INTERNAL_SERVER_ERROR, f"RSVP failed: {error.code}")
+    )
+    return HTTPException(status_code=status_code, detail=detail)
+
 
 @router.post("", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
 async def create_event(
@@ -61,6 +134,7 @@ async def create_event(
     # Set image_url from cover_image_url if provided (for backwards compatibility)
     if event_dict.get('cover_image_url') and not event_dict.get('image_url'):
         event_dict['image_url'] = event_dict['cover_image_url']
+    event_dict.update(location_columns(event_dict.get('location')))
     
     try:
         event_result = supabase.table("events").insert(event_dict).execute()
@@ -89,6 +163,8 @@ async def create_event(
     except Exception as e:
         # If RSVP fails, we still return the event (it was created)
         pass
+    index_event(new_event)
+    _invalidate_event()
     
     # Get sport info for response
     sport_data = {
@@ -110,22 +186,7 @@ async def create_event(
         participant_count = 0
 
     # Get host info
-    host_data = None
-    if host_id:
-        try:
-            host_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", host_id).single().execute()
-            if host_result.data:
-                host_data = {
-                    "id": host_result.data.get("id"),
-                    "full_name": host_result.data.get("full_name") or "Unknown",
-                    "avatar_url": host_result.data.get("avatar_url")
-                }
-        except Exception:
-            host_data = {
-                "id": host_id,
-                "full_name": "Unknown",
-                "avatar_url": None
-            }
+    host_data = _host_data(supabase, host_id)
 
     return EventResponse(
         id=new_event["id"],
@@ -156,9 +217,17 @@ async def list_events(
     location: Optional[str] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    search: Optional[str] = Query(None)
+    search: Optional[str] = Query(None),
+    radius_km: Optional[float] = Query(None, gt=0, le=500),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    fields: Optional[FrozenSet[str]] = Depends(sparse_fieldset(EventResponse))
 ):
-    """List events with optional filtering"""
+    """
+    List events with optional filtering. `fields` limits the returned fields.
+    With radius_km, only events within that distance of lat/lng - or of the
+    geocoded `location`, which then replaces the text match - are listed.
+    """
     try:
         supabase: Client = get_supabase()
     except Exception as e:
@@ -167,30 +236,192 @@ async def list_events(
             detail=f"Supabase connection error: {str(e)}"
         )
     
-    # Build query
-    query = supabase.table("events").select("*").eq("is_cancelled", False)
-    
-    if sport_id:
-        query = query.eq("sport_id", sport_id)
+    near = None
+    if radius_km is not None:
+        if lat is not None and lng is not None:
+            near = (lat, lng, radius_km)
+        else:
+            place = geocode_point(location)
+            if place is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="radius_km needs lat and lng, or a location that geocodes to a city"
+                )
+            near = (place.latitude, place.longitude, radius_km)
+            location = None
+    
+    # location (ilike) and search (lowercased below) are case-insensitive
+    cache_key = (
+        sport_id,
+        location.lower() if location else None,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None,
+        search.lower() if search else None,
+        near,
+        tuple(sorted(fields)) if fields else None,
+    )
     
-    if location:
-        query = query.ilike("location", f"%{location}%")
+    async def load_body() -> bytes:
+        # Cache the encoded body so hits skip validation and serialization entirely
+        events = await _load_event_list(supabase, sport_id, location, start_date, end_date, search, near)
+        return dump_json(events, fields)
     
-    if start_date:
-        query = query.gte("start_time", start_date.isoformat())
+    try:
+        body = await _event_list_cache.get_or_load(cache_key, load_body)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch events: {str(e)}"
+        )
+    return json_response(body)
+
+
+@router.get("/map", response_model=EventMap)
+async def get_event_map(
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=MAX_ZOOM),
+    sport_id: Optional[int] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None)
+):
+    """
+    Events in the viewport bbox grouped into grid clusters for the zoom level,
+    each with its count, position and a few representative events. The number
+    of clusters is bounded, whatever the number of events. Without start_date,
+    only events starting from the current hour (UTC) on are clustered.
+    """
+    try:
+        supabase: Client = get_supabase()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Supabase connection error: {str(e)}"
+        )
     
-    if end_date:
-        query = query.lte("start_time", end_date.isoformat())
+    try:
+        precision, cells = map_cells(south, west, north, east, zoom)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if start_date is None:
+        # Whole hours keep the cache key stable between requests
+        start_date = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    
+    # Nearby viewports at the same zoom share cells, and so cache entries
+    cache_key = (
+        tuple(cells),
+        zoom,
+        sport_id,
+        start_date.isoformat(),
+        end_date.isoformat() if end_date else None,
+    )
     
-    if search:
-        # Supabase doesn't support OR directly, so we'll filter in Python
-        pass
+    async def load_body() -> bytes:
+        event_map = await load_event_map(supabase, precision, cells, zoom, sport_id, start_date, end_date)
+        return dump_json(event_map)
     
+    return json_response(await _event_map_cache.get_or_load(cache_key, load_body))
+
+
+@router.get("/recommended", response_model=List[EventRecommendation])
+async def get_recommended_events(
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=200),
+    days: int = Query(DEFAULT_DAYS, ge=1, le=90),
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Upcoming public events ranked for the current user by sport affinity,
+    proximity, buddies attending and capacity left, best first. When both the
+    user and an event are geocoded, events beyond radius_km are left out.
+    """
     try:
+        supabase: Client = get_supabase()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Supabase connection error: {str(e)}"
+        )
+    
+    if not current_user.get("id"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User ID not found"
+        )
+    
+    ranked = await recommend_events(supabase, current_user, limit, offset, days, radius_km)
+    cards = {card.id: card for card in await _build_event_cards(supabase, [r["event"] for r in ranked])}
+    recommendations = [
+        EventRecommendation(
+            **cards[r["event"]["id"]].model_dump(),
+            score=r["score"],
+            buddies_attending=r["buddies_attending"],
+            distance_km=r["distance_km"]
+        )
+        for r in ranked if r["event"]["id"] in cards
+    ]
+    return json_response(dump_json(recommendations))
+
+
+async def _load_event_list(
+    supabase: Client,
+    sport_id: Optional[int],
+    location: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    search: Optional[str],
+    near: Optional[Tuple[float, float, float]] = None
+) -> List[EventResponse]:
+    events = None
+    # Upcoming date ranges come from the in-process index; a location with
+    # ilike wildcards still goes to the database
+    if start_date and not (location and ("%" in location or "_" in location)):
+        try:
+            events = await upcoming_events(supabase, start_date, end_date, sport_id or None)
+        except Exception:
+            events = None
+        if events is not None and location:
+            location_lower = location.lower()
+            events = [e for e in events if location_lower in (e.get("location") or "").lower()]
+    
+    if near:
+        latitude, longitude, radius_km = near
+    
+    if events is None:
+        # Build query
+        columns = f"{EVENT_CARD_COLUMNS}, latitude, longitude" if near else EVENT_CARD_COLUMNS
+        query = supabase.table("events").select(columns).eq("is_cancelled", False)
+        
+        if sport_id:
+            query = query.eq("sport_id", sport_id)
+        
+        if location:
+            query = query.ilike("location", f"%{location}%")
+        
+        if near:
+            # Geohash prefix range scans for the cells around the point; exact distance below
+            query = query.or_(geohash_filter(cells_for_radius(latitude, longitude, radius_km)))
+        
+        if start_date:
+            query = query.gte("start_time", start_date.isoformat())
+        
+        if end_date:
+            query = query.lte("start_time", end_date.isoformat())
+        
+        if search:
+            # Supabase doesn't support OR directly, so we'll filter in Python
+            pass
+        
+        # A failure propagates so the listing cache does not store it as empty
         events_result = query.order("start_time").execute()
         events = events_result.data if events_result.data else []
-    except Exception:
-        events = []
+    
+    if near:
+        events = [e for e in events if point_of(e) and haversine_km(latitude, longitude, *point_of(e)) <= radius_km]
     
     # Apply search filter if provided
     if search:
@@ -200,6 +431,11 @@ async def list_events(
                   search_lower in (e.get("description") or "").lower() or
                   search_lower in (e.get("location") or "").lower()]
     
+    return await _build_event_cards(supabase, events)
+
+
+async def _build_event_cards(supabase: Client, events: List[dict]) -> List[EventResponse]:
+    """EventResponse cards for events rows, with participant counts, sport and host"""
     if not events:
         return []
     
@@ -235,9 +471,8 @@ async def list_events(
     
     if host_ids:
         try:
-            users_result = supabase.table("users").select("id, full_name, avatar_url").in_("id", host_ids).execute()
-            for u in (users_result.data or []):
-                hosts_by_id[u["id"]] = {"id": u.get("id"), "full_name": u.get("full_name") or "Unknown", "avatar_url": u.get("avatar_url")}
+            for u in get_user_summaries(supabase, host_ids).values():
+                hosts_by_id[u["id"]] = {"id": u["id"], "full_name": u.get("full_name") or "Unknown", "avatar_url": u.get("avatar_url")}
         except Exception:
             pass
     
@@ -290,23 +525,17 @@ async def list_events(
     return result
 
 
-@router.get("/{event_id}", response_model=EventDetail)
-async def get_event(
-    event_id: int,
-    current_user: Optional[dict] = Depends(get_current_user_optional)
-):
-    """Get event details. Includes rsvp_status when authenticated."""
+async def _load_event_detail(supabase: Client, event_id: int) -> dict:
+    """
+    Load the viewer-independent part of event detail: event row, approved
+    participants, host and sport. Two round-trips: the event row, then the
+    participants (users embedded in the RSVP query), host and sport concurrently.
+    Raises HTTPException(404) if the event does not exist.
+    """
     try:
-        supabase: Client = get_supabase()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Supabase connection error: {str(e)}"
+        event_result = await asyncio.to_thread(
+            supabase.table("events").select("*").eq("id", event_id).single().execute
         )
-    
-    # Get event
-    try:
-        event_result = supabase.table("events").select("*").eq("id", event_id).single().execute()
         if not event_result.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -321,57 +550,114 @@ async def get_event(
             detail="Event not found"
         )
     
-    # Get approved participants (excluding host)
-    participants = []
     host_id = event.get("host_id")
-    try:
-        rsvps_result = supabase.table("event_rsvps").select("user_id").eq("event_id", event_id).eq("status", "approved").execute()
-        if rsvps_result.data:
-            # Filter out the host
-            participant_ids = [r["user_id"] for r in rsvps_result.data if r.get("user_id") != host_id]
-            if participant_ids:
-                users_result = supabase.table("users").select("id, full_name, avatar_url, location").in_("id", participant_ids).execute()
-                if users_result.data:
-                    participants = users_result.data
-    except Exception:
-        participants = []
+    sport_id = event.get("sport_id")
+    rsvps_result, host_result, sport_result = await execute_concurrently(
+        supabase.table("event_rsvps").select("user_id, users(id, full_name, avatar_url, location)").eq("event_id", event_id).eq("status", "approved"),
+        supabase.table("users").select("id, full_name, avatar_url, location").eq("id", host_id).single() if host_id else None,
+        supabase.table("sports").select("*").eq("id", sport_id).single() if sport_id else None,
+    )
     
-    participant_count = len(participants)
+    # Approved participants (excluding host)
+    participants = []
+    if not isinstance(rsvps_result, Exception) and rsvps_result and rsvps_result.data:
+        participants = [
+            r["users"] for r in rsvps_result.data
+            if r.get("user_id") != host_id and r.get("users")
+        ]
     
-    # Get host info
     host_data = None
-    if event.get("host_id"):
-        try:
-            host_result = supabase.table("users").select("id, full_name, avatar_url, location").eq("id", event["host_id"]).single().execute()
-            if host_result.data:
-                host_data = host_result.data
-        except Exception:
-            host_data = {"id": event.get("host_id"), "full_name": "Unknown", "avatar_url": None, "location": None}
+    if host_id:
+        if isinstance(host_result, Exception) or not host_result.data:
+            host_data = {"id": host_id, "full_name": "Unknown", "avatar_url": None, "location": None}
+        else:
+            host_data = host_result.data
     
-    # Get sport info
     sport_data = None
-    if event.get("sport_id"):
-        try:
-            sport_result = supabase.table("sports").select("*").eq("id", event["sport_id"]).single().execute()
-            if sport_result.data:
-                sport_data = {
-                    "id": sport_result.data.get("id"),
-                    "name": sport_result.data.get("name") or "Unknown Sport",
-                    "icon": sport_result.data.get("icon") or "🏃"
-                }
-        except Exception:
-            sport_data = {"id": event.get("sport_id"), "name": "Unknown Sport", "icon": "🏃"}
-    
-    # Get current user's RSVP status (when authenticated)
-    rsvp_status = None
-    if current_user and current_user.get("id"):
-        try:
-            rsvp_result = supabase.table("event_rsvps").select("status").eq("event_id", event_id).eq("user_id", current_user["id"]).maybe_single().execute()
-            if rsvp_result.data and rsvp_result.data.get("status"):
-                rsvp_status = rsvp_result.data["status"]
-        except Exception:
-            pass
+    if sport_id:
+        if isinstance(sport_result, Exception) or not sport_result.data:
+            sport_data = {"id": sport_id, "name": "Unknown Sport", "icon": "🏃"}
+        else:
+            sport_data = {
+                "id": sport_result.data.get("id"),
+                "name": sport_result.data.get("name") or "Unknown Sport",
+                "icon": sport_result.data.get("icon") or "🏃"
+            }
     
+    return {"event": event, "participants": participants, "host": host_data, "sport": sport_data}
+
+
+async def _get_detail(supabase: Client, event_id: int, version: Optional[tuple] = None) -> dict:
+    """
+    Cached viewer-independent detail. With a version (from _probe_event), a
+    cached entry loaded at another version is reloaded, so changes made through
+    other workers are not served from this worker's cache.
+    """
+    cached = _event_detail_cache.get(event_id)
+    if cached is not None and (version is None or cached["version"] == version):
+        return cached["detail"]
+    detail = await _load_event_detail(supabase, event_id)
+    _event_detail_cache.set(event_id, {"detail": detail, "version": version})
+    return detail
+
+
+async def _get_rsvp_status(supabase: Client, event_id: int, user_id: int) -> Optional[str]:
+    try:
+        rsvp_result = await asyncio.to_thread(
+            supabase.table("event_rsvps").select("status").eq("event_id", event_id).eq("user_id", user_id).maybe_single().execute
+        )
+        if rsvp_result and rsvp_result.data and rsvp_result.data.get("status"):
+            return rsvp_result.data["status"]
+    except Exception:
+        pass
+    return None
+
+
+async def _probe_event(supabase: Client, event_id: int) -> Optional[dict]:
+    """
+    One cheap query for what an event detail depends on: the event's and
+    host's updated_at and every RSVP (with the attendee's updated_at).
+    Returns None if the event does not exist.
+    """
+    result = await asyncio.to_thread(
+        supabase.table("events").select(
+            "updated_at, host:users!fk_events_host(updated_at), "
+            "event_rsvps(user_id, status, users(updated_at))"
+        ).eq("id", event_id).maybe_single().execute
+    )
+    if not result or not result.data:
+        return None
+    row = result.data
+    rsvps = row.get("event_rsvps") or []
+    version = (
+        row.get("updated_at"),
+        (row.get("host") or {}).get("updated_at"),
+        tuple(sorted(
+            (r.get("user_id"), r.get("status"), (r.get("users") or {}).get("updated_at"))
+            for r in rsvps
+        )),
+    )
+    statuses = {r.get("user_id"): r.get("status") for r in rsvps}
+    return {"version": version, "statuses": statuses}
+
+
+async def _event_detail(supabase: Client, event_id: int, viewer_id: Optional[int]) -> EventDetail:
+    # The viewer's RSVP status only depends on the event id, so fetch it
+    # alongside the (cached) viewer-independent detail
+    if viewer_id:
+        detail, rsvp_status = await asyncio.gather(
+            _get_detail(supabase, event_id),
+            _get_rsvp_status(supabase, event_id, viewer_id)
+        )
+    else:
+        detail, rsvp_status = await _get_detail(supabase, event_id), None
+    return _build_event_detail(detail, rsvp_status)
+
+
+def _build_event_detail(detail: dict, rsvp_status: Optional[str]) -> EventDetail:
+    event = detail["event"]
+    participants = detail["participants"]
+
     return EventDetail(
         id=event["id"],
         title=event["title"],
@@ -388,14 +674,57 @@ async def get_event(
         cover_image_url=event.get("cover_image_url"),
         created_at=event.get("created_at"),
         updated_at=event.get("updated_at"),
-        participant_count=participant_count,
-        host=host_data or {"id": event.get("host_id"), "full_name": "Unknown", "avatar_url": None, "location": None},
-        sport=sport_data or {"id": event.get("sport_id"), "name": "Unknown Sport", "icon": "🏃"},
+        participant_count=len(participants),
+        host=detail["host"] or {"id": event.get("host_id"), "full_name": "Unknown", "avatar_url": None, "location": None},
+        sport=detail["sport"] or {"id": event.get("sport_id"), "name": "Unknown Sport", "icon": "🏃"},
         participants=participants,
         rsvp_status=rsvp_status
     )
 
 
+@router.get("/{event_id}", response_model=EventDetail)
+async def get_event(
+    event_id: int,
+    request: Request,
+    response: Response,
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    """
+    Get event details. Includes rsvp_status when authenticated.
+    Supports conditional GET: the ETag covers the event, host and RSVPs (and the
+    viewer's status), so If-None-Match is answered with 304 after one query.
+    """
+    try:
+        supabase: Client = get_supabase()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Supabase connection error: {str(e)}"
+        )
+    
+    viewer_id = current_user.get("id") if current_user else None
+    try:
+        probe = await _probe_event(supabase, event_id)
+    except Exception:
+        # Version unknown - serve the full response without validators
+        return await _event_detail(supabase, event_id, viewer_id)
+    if probe is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    
+    rsvp_status = probe["statuses"].get(viewer_id) if viewer_id else None
+    cache_control = NO_CACHE_PRIVATE if viewer_id else NO_CACHE_PUBLIC
+    etag = make_etag(probe["version"], rsvp_status)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control, vary="Authorization")
+    
+    detail = await _get_detail(supabase, event_id, probe["version"])
+    set_cache_headers(response, etag, cache_control, vary="Authorization")
+    return _build_event_detail(detail, rsvp_status)
+
+
 @router.put("/{event_id}", response_model=EventResponse)
 async def update_event(
     event_id: int,
@@ -450,6 +779,10 @@ async def update_event(
         update_data['start_time'] = update_data['start_time'].isoformat()
     if isinstance(update_data.get('end_time'), datetime):
         update_data['end_time'] = update_data['end_time'].isoformat()
+    # updated_at versions the event for conditional GETs
+    update_data['updated_at'] = datetime.utcnow().isoformat()
+    if 'location' in update_data:
+        update_data.update(location_columns(update_data['location']))
     
     try:
         updated_result = supabase.table("events").update(update_data).eq("id", event_id).execute()
@@ -459,6 +792,8 @@ async def update_event(
                 detail="Failed to update event"
             )
         updated_event = updated_result.data[0]
+        index_event(updated_event)
+        _invalidate_event(event_id)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise
@@ -501,22 +836,7 @@ async def update_event(
             sport_data = {"id": updated_event.get("sport_id"), "name": "Unknown Sport", "icon": "🏃"}
     
     # Get host info
-    host_data = None
-    if host_id:
-        try:
-            host_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", host_id).single().execute()
-            if host_result.data:
-                host_data = {
-                    "id": host_result.data.get("id"),
-                    "full_name": host_result.data.get("full_name") or "Unknown",
-                    "avatar_url": host_result.data.get("avatar_url")
-                }
-        except Exception:
-            host_data = {
-                "id": host_id,
-                "full_name": "Unknown",
-                "avatar_url": None
-            }
+    host_data = _host_data(supabase, host_id)
     
     return EventResponse(
         id=updated_event["id"],
@@ -586,6 +906,8 @@ async def delete_event(
 
     try:
         supabase.table("events").delete().eq("id", event_id).execute()
+        unindex_event(event_id)
+        _invalidate_event(event_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -614,83 +936,18 @@ async def rsvp_event(
             detail="User ID not found"
         )
     
-    # Get event
     try:
-        event_result = supabase.table("events").select("*").eq("id", event_id).single().execute()
-        if not event_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Event not found"
-            )
-        event = event_result.data
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Event not found"
-        )
-    
-    if event.get("is_cancelled"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Event is cancelled"
-        )
-    
-    # Check if already RSVP'd
-    try:
-        existing_result = supabase.table("event_rsvps").select("*").eq("event_id", event_id).eq("user_id", user_id).execute()
-        if existing_result.data and len(existing_result.data) > 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Already RSVP'd to this event"
-            )
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise
-        # If query fails, continue (might be a connection issue)
-        pass
-    
-    # Check max participants (only for approved RSVPs, excluding host)
-    if event.get("max_participants"):
-        try:
-            host_id = event.get("host_id")
-            current_count_result = supabase.table("event_rsvps").select("user_id").eq("event_id", event_id).eq("status", "approved").execute()
-            if current_count_result.data:
-                # Count participants excluding the host
-                participants = [r for r in current_count_result.data if r.get("user_id") != host_id]
-                current_count = len(participants)
-            else:
-                current_count = 0
-            if current_count >= event.get("max_participants"):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Event is full"
-                )
-        except Exception as e:
-            if isinstance(e, HTTPException):
-                raise
-            # If query fails, continue (might be a connection issue)
-            pass
-    
-    # All RSVPs require manual host approval - no auto-approve
-    rsvp_status = "pending"
-    
-    # Create RSVP
-    try:
-        supabase.table("event_rsvps").insert({
-            "event_id": event_id,
-            "user_id": user_id,
-            "status": rsvp_status,
-            "attended": False
-        }).execute()
+        request_rsvp(supabase, event_id, user_id)
+        _invalidate_event(event_id)
+    except RSVPError as e:
+        raise _rsvp_http_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to RSVP: {str(e)}"
         )
     
-    return await get_event(event_id)
+    return await _event_detail(supabase, event_id, user_id)
 
 
 @router.delete("/{event_id}/rsvp", status_code=status.HTTP_204_NO_CONTENT)
@@ -716,6 +973,7 @@ async def cancel_rsvp(
     
     try:
         supabase.table("event_rsvps").delete().eq("event_id", event_id).eq("user_id", user_id).execute()
+        _invalidate_event(event_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -791,22 +1049,7 @@ async def get_my_events(
                 }
         
         # Get host info
-        host_data = None
-        if host_id:
-            try:
-                host_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", host_id).single().execute()
-                if host_result.data:
-                    host_data = {
-                        "id": host_result.data.get("id"),
-                        "full_name": host_result.data.get("full_name") or "Unknown",
-                        "avatar_url": host_result.data.get("avatar_url")
-                    }
-            except Exception:
-                host_data = {
-                    "id": host_id,
-                    "full_name": "Unknown",
-                    "avatar_url": None
-                }
+        host_data = _host_data(supabase, host_id)
         
         return EventResponse(
             id=event_data["id"],
@@ -833,7 +1076,7 @@ async def get_my_events(
     # Get events owned by user - handle errors gracefully
     owned_events = []
     try:
-        owned_result = supabase.table("events").select("*").eq("host_id", user_id).order("start_time", desc=True).execute()
+        owned_result = supabase.table("events").select(EVENT_CARD_COLUMNS).eq("host_id", user_id).order("start_time", desc=True).execute()
         owned_events = [format_event(e) for e in (owned_result.data or []) if format_event(e) is not None]
     except Exception:
         owned_events = []
@@ -860,7 +1103,7 @@ async def get_my_events(
     attending_events = []
     if attending_event_ids:
         try:
-            attending_result = supabase.table("events").select("*").in_("id", attending_event_ids).neq("host_id", user_id).order("start_time", desc=False).execute()
+            attending_result = supabase.table("events").select(EVENT_CARD_COLUMNS).in_("id", attending_event_ids).neq("host_id", user_id).order("start_time", desc=False).execute()
             attending_events = [format_event(e) for e in (attending_result.data or []) if format_event(e) is not None]
         except Exception:
             attending_events = []
@@ -869,7 +1112,7 @@ async def get_my_events(
     attended_events = []
     if attended_event_ids:
         try:
-            attended_result = supabase.table("events").select("*").in_("id", attended_event_ids).order("start_time", desc=True).execute()
+            attended_result = supabase.table("events").select(EVENT_CARD_COLUMNS).in_("id", attended_event_ids).order("start_time", desc=True).execute()
             attended_events = [format_event(e) for e in (attended_result.data or []) if format_event(e) is not None]
         except Exception:
             attended_events = []
@@ -977,71 +1220,11 @@ async def approve_rsvp(
             detail="User ID not found"
         )
     
-    # Get event and verify user is host
-    try:
-        event_result = supabase.table("events").select("*").eq("id", event_id).single().execute()
-        if not event_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Event not found"
-            )
-        event = event_result.data
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Event not found"
-        )
-    
-    # Check if user is host
-    if event.get("host_id") != current_user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only the event host can approve RSVPs"
-        )
-    
-    # Check if RSVP exists
-    try:
-        rsvp_result = supabase.table("event_rsvps").select("*").eq("event_id", event_id).eq("user_id", user_id).single().execute()
-        if not rsvp_result.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="RSVP not found"
-            )
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="RSVP not found"
-        )
-    
-    # Check max participants before approving (excluding host)
-    if event.get("max_participants"):
-        try:
-            host_id = event.get("host_id")
-            current_count_result = supabase.table("event_rsvps").select("user_id").eq("event_id", event_id).eq("status", "approved").execute()
-            if current_count_result.data:
-                # Count participants excluding the host
-                participants = [r for r in current_count_result.data if r.get("user_id") != host_id]
-                current_count = len(participants)
-            else:
-                current_count = 0
-            if current_count >= event.get("max_participants"):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Event is full"
-                )
-        except Exception as e:
-            if isinstance(e, HTTPException):
-                raise
-            # If query fails, continue (might be a connection issue)
-            pass
-    
-    # Update RSVP status to approved
     try:
-        supabase.table("event_rsvps").update({"status": "approved"}).eq("event_id", event_id).eq("user_id", user_id).execute()
+        approve_rsvp_atomic(supabase, event_id, user_id, current_user_id)
+        _invalidate_event(event_id)
+    except RSVPError as e:
+        raise _rsvp_http_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1116,6 +1299,7 @@ async def reject_rsvp(
     # Update RSVP status to rejected
     try:
         supabase.table("event_rsvps").update({"status": "rejected"}).eq("event_id", event_id).eq("user_id", user_id).execute()
+        _invalidate_event(event_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1171,6 +1355,7 @@ async def remove_participant(
 
     try:
         supabase.table("event_rsvps").delete().eq("event_id", event_id).eq("user_id", user_id).execute()
+        _invalidate_event(event_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
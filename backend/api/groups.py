@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from supabase import Client
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from core.database import get_supabase
+from core.http_cache import NO_CACHE_PRIVATE, etag_matches, make_etag, not_modified, set_cache_headers
 from api.auth import get_current_user
 from schemas.group_chat import GroupChatCreate, GroupChatUpdate, GroupChatResponse, GroupChatDetail
+from services.user_summaries import get_user_summaries
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
 
+def _add_group_members(supabase: Client, group_id: int, user_ids: List[int], admin_id: Optional[int] = None) -> None:
+    """
+    Insert group_members rows for user_ids in one multi-row upsert. Rows that
+    already exist are skipped (ON CONFLICT DO NOTHING), so existing members keep
+    their admin flag. admin_id, if given, is added as an admin.
+    """
+    if not user_ids:
+        return
+    supabase.table("group_members").upsert(
+        [{"group_id": group_id, "user_id": uid, "is_admin": uid == admin_id} for uid in user_ids],
+        on_conflict="group_id,user_id",
+        ignore_duplicates=True
+    ).execute()
+
+
 @router.post("", response_model=GroupChatResponse, status_code=status.HTTP_201_CREATED)
 async def create_group(
     group_data: GroupChatCreate,
@@ -39,22 +56,20 @@ async def create_group(
     # Ensure creator is in members
     member_ids = list(set([user_id] + group_data.member_ids))
     
-    # Verify all members exist
+    # Verify all members exist (one query)
     try:
-        for member_id in member_ids:
-            user_result = supabase.table("users").select("id").eq("id", member_id).single().execute()
-            if not user_result.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"User {member_id} not found"
-                )
-    except HTTPException:
-        raise
+        users_result = supabase.table("users").select("id").in_("id", member_ids).execute()
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="One or more users not found"
         )
+    missing_ids = sorted(set(member_ids) - {u.get("id") for u in (users_result.data or [])})
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User {missing_ids[0]} not found"
+        )
     
     # Create group
     try:
@@ -74,18 +89,8 @@ async def create_group(
         new_group = group_result.data[0]
         group_id = new_group["id"]
         
-        # Add members
-        for member_id in member_ids:
-            is_admin = member_id == user_id
-            try:
-                supabase.table("group_members").insert({
-                    "group_id": group_id,
-                    "user_id": member_id,
-                    "is_admin": is_admin
-                }).execute()
-            except Exception:
-                # If member already exists, continue
-                pass
+        # Add members in one statement
+        _add_group_members(supabase, group_id, member_ids, admin_id=user_id)
         
         return GroupChatResponse(
             id=new_group["id"],
@@ -163,9 +168,15 @@ async def list_groups(
 @router.get("/{group_id}", response_model=GroupChatDetail)
 async def get_group(
     group_id: int,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get group details"""
+    """
+    Get group details.
+    The ETag covers the group, its creator and every member (admin flag and
+    profile updated_at); one query checks membership and answers If-None-Match.
+    """
     try:
         supabase: Client = get_supabase()
     except Exception as e:
@@ -181,6 +192,32 @@ async def get_group(
             detail="User ID not found"
         )
     
+    try:
+        version_result = supabase.table("group_chats").select(
+            "updated_at, creator:users!fk_group_chats_created_by(updated_at), "
+            "group_members(user_id, is_admin, users(updated_at))"
+        ).eq("id", group_id).maybe_single().execute()
+    except Exception:
+        version_result = None
+    members = None
+    if version_result and version_result.data:
+        group_version = version_result.data
+        members = group_version.get("group_members") or []
+        # Only members may see the group (or learn that it is unchanged)
+        if any(m.get("user_id") == user_id for m in members):
+            etag = make_etag(
+                group_id,
+                group_version.get("updated_at"),
+                (group_version.get("creator") or {}).get("updated_at"),
+                sorted(
+                    (m.get("user_id"), bool(m.get("is_admin")), (m.get("users") or {}).get("updated_at"))
+                    for m in members
+                ),
+            )
+            if etag_matches(request, etag):
+                return not_modified(etag, NO_CACHE_PRIVATE)
+            set_cache_headers(response, etag, NO_CACHE_PRIVATE)
+    
     try:
         # Get group
         group_result = supabase.table("group_chats").select("*").eq("id", group_id).single().execute()
@@ -192,49 +229,45 @@ async def get_group(
         
         group_data = group_result.data
         
-        # Check if user is a member
-        member_result = supabase.table("group_members").select("user_id").eq("group_id", group_id).eq("user_id", user_id).execute()
-        if not member_result.data or len(member_result.data) == 0:
+        # Members come with the version probe; queried only if the probe failed
+        if members is None:
+            members_result = supabase.table("group_members").select("user_id, is_admin").eq("group_id", group_id).execute()
+            members = members_result.data or []
+        if not any(m.get("user_id") == user_id for m in members):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not a member of this group"
             )
-        
-        # Get members
-        members_result = supabase.table("group_members").select("user_id, is_admin").eq("group_id", group_id).execute()
         member_data_list = []
         
-        if members_result.data:
-            # Get user details for each member
-            for member_row in members_result.data:
-                member_user_id = member_row.get("user_id")
-                is_admin = member_row.get("is_admin", False)
-                
-                try:
-                    user_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", member_user_id).single().execute()
-                    if user_result.data:
-                        member_data_list.append({
-                            "id": user_result.data.get("id"),
-                            "full_name": user_result.data.get("full_name") or "Unknown",
-                            "avatar_url": user_result.data.get("avatar_url"),
-                            "is_admin": is_admin
-                        })
-                except Exception:
-                    # Skip members that can't be found
-                    pass
-        
-        # Get created_by user
-        created_by_data = {}
+        # Member and creator details from the shared summary cache (one query for the misses)
+        created_by_id = group_data.get("created_by_id")
         try:
-            created_by_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", group_data.get("created_by_id")).single().execute()
-            if created_by_result.data:
-                created_by_data = {
-                    "id": created_by_result.data.get("id"),
-                    "full_name": created_by_result.data.get("full_name") or "Unknown",
-                    "avatar_url": created_by_result.data.get("avatar_url")
-                }
+            users_by_id = get_user_summaries(
+                supabase, [m.get("user_id") for m in members] + [created_by_id]
+            )
         except Exception:
-            created_by_data = {"id": group_data.get("created_by_id"), "full_name": "Unknown", "avatar_url": None}
+            users_by_id = {}
+        
+        for member_row in members:
+            user_data = users_by_id.get(member_row.get("user_id"))
+            if not user_data:
+                # Skip members that can't be found
+                continue
+            member_data_list.append({
+                "id": user_data["id"],
+                "full_name": user_data.get("full_name") or "Unknown",
+                "avatar_url": user_data.get("avatar_url"),
+                "is_admin": member_row.get("is_admin", False)
+            })
+        
+        # Get created_by user
+        created_by = users_by_id.get(created_by_id) or {}
+        created_by_data = {
+            "id": created_by_id,
+            "full_name": created_by.get("full_name") or "Unknown",
+            "avatar_url": created_by.get("avatar_url")
+        }
         
         return GroupChatDetail(
             id=group_data["id"],
@@ -382,28 +415,15 @@ async def add_members(
                 detail="No user IDs provided"
             )
         
-        # Verify users exist and add them
-        for user_id_to_add in user_ids:
-            try:
-                # Verify user exists
-                user_result = supabase.table("users").select("id").eq("id", user_id_to_add).single().execute()
-                if not user_result.data:
-                    continue
-                
-                # Check if already a member
-                existing_result = supabase.table("group_members").select("user_id").eq("group_id", group_id).eq("user_id", user_id_to_add).execute()
-                if existing_result.data and len(existing_result.data) > 0:
-                    continue
-                
-                # Add member
-                supabase.table("group_members").insert({
-                    "group_id": group_id,
-                    "user_id": user_id_to_add,
-                    "is_admin": False
-                }).execute()
-            except Exception:
-                # Skip users that can't be added
-                continue
+        # Verify users exist (one query); unknown ids are skipped
+        candidate_ids = sorted({uid for uid in user_ids if isinstance(uid, int)})
+        valid_ids = []
+        if candidate_ids:
+            users_result = supabase.table("users").select("id").in_("id", candidate_ids).execute()
+            valid_ids = [u["id"] for u in (users_result.data or [])]
+        
+        # Add them in one statement; current members are left unchanged
+        _add_group_members(supabase, group_id, valid_ids)
         
         return {"message": "Members added successfully"}
     except HTTPException:
@@ -1,15 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query
 from supabase import Client
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 from datetime import datetime
 from core.database import get_supabase
+from core.responses import model_response, sparse_fieldset
 from api.auth import get_current_user
 from schemas.message import MessageCreate, MessageResponse, MessageDetail
+from services.user_summaries import get_user_summaries, get_user_summary
 from core.security import verify_token
+from core.metrics import websocket_connections, record_websocket_message
 import json
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
+
+def _participant_dict(user_id: Optional[int], users_by_id: dict) -> dict:
+    """Sender/receiver info for a MessageDetail; "Unknown" when the user is missing"""
+    summary = users_by_id.get(user_id) or {}
+    return {"id": user_id, "full_name": summary.get("full_name") or "Unknown", "avatar_url": summary.get("avatar_url")}
+
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
@@ -26,6 +36,7 @@ class ConnectionManager:
     async def send_personal_message(self, message: dict, user_id: int):
         if user_id in self.active_connections:
             await self.active_connections[user_id].send_json(message)
+            record_websocket_message("sent")
     
     async def broadcast_to_event(self, message: dict, event_id: int, supabase: Client):
         """Broadcast message to all event participants using Supabase"""
@@ -37,11 +48,14 @@ class ConnectionManager:
                 for user_id in participant_ids:
                     if user_id in self.active_connections:
                         await self.active_connections[user_id].send_json(message)
+                        record_websocket_message("sent")
         except Exception:
             # If query fails, just continue (participants won't get message)
             pass
 
 manager = ConnectionManager()
+# Read at scrape time, so connect/disconnect pay nothing extra
+websocket_connections.set_function(lambda: len(manager.active_connections))
 
 
 @router.websocket("/ws/{token}")
@@ -75,6 +89,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
         try:
             while True:
                 data = await websocket.receive_json()
+                record_websocket_message("received")
                 message_type = data.get("type")
                 
                 if message_type == "message":
@@ -130,8 +145,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                         new_message = message_result.data[0]
                         
                         # Get sender info
-                        sender_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", user_id).single().execute()
-                        sender_data = sender_result.data if sender_result.data else {}
+                        sender_data = get_user_summary(supabase, user_id) or {}
                         
                         # Prepare message response
                         message_data = {
@@ -349,24 +363,24 @@ async def list_conversations(
         received_user_ids = set([m.get("sender_id") for m in (received_result.data or []) if m.get("sender_id")])
         
         user_ids = sent_user_ids.union(received_user_ids)
+        users_by_id = get_user_summaries(supabase, user_ids)
         
         # Get conversation data for each user
         for other_user_id in user_ids:
             try:
                 # Get user info
-                user_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", other_user_id).single().execute()
-                if not user_result.data:
+                user_data = users_by_id.get(other_user_id)
+                if not user_data:
                     continue
-                user_data = user_result.data
                 
                 # Get last message (either direction) - query both directions and get the latest
                 try:
                     # Get messages where user is sender and other_user is receiver
-                    sent_msg_result = supabase.table("messages").select("*").eq("sender_id", user_id).eq("receiver_id", other_user_id).is_("event_id", "null").is_("group_id", "null").order("created_at", desc=True).limit(1).execute()
+                    sent_msg_result = supabase.table("messages").select("content, created_at").eq("sender_id", user_id).eq("receiver_id", other_user_id).is_("event_id", "null").is_("group_id", "null").order("created_at", desc=True).limit(1).execute()
                     sent_messages = sent_msg_result.data if sent_msg_result.data else []
                     
                     # Get messages where other_user is sender and user is receiver
-                    received_msg_result = supabase.table("messages").select("*").eq("sender_id", other_user_id).eq("receiver_id", user_id).is_("event_id", "null").is_("group_id", "null").order("created_at", desc=True).limit(1).execute()
+                    received_msg_result = supabase.table("messages").select("content, created_at").eq("sender_id", other_user_id).eq("receiver_id", user_id).is_("event_id", "null").is_("group_id", "null").order("created_at", desc=True).limit(1).execute()
                     received_messages = received_msg_result.data if received_msg_result.data else []
                     
                     # Get the latest message
@@ -412,7 +426,7 @@ async def list_conversations(
                 event_data = event_data_result.data
                 
                 # Get last message
-                last_msg_result = supabase.table("messages").select("*").eq("event_id", event_id).order("created_at", desc=True).limit(1).execute()
+                last_msg_result = supabase.table("messages").select("content, created_at").eq("event_id", event_id).order("created_at", desc=True).limit(1).execute()
                 last_message = last_msg_result.data[0] if last_msg_result.data and len(last_msg_result.data) > 0 else None
                 
                 conversations.append({
@@ -446,7 +460,7 @@ async def list_conversations(
                 group_data = group_result.data
                 
                 # Get last message
-                last_msg_result = supabase.table("messages").select("*").eq("group_id", group_id).order("created_at", desc=True).limit(1).execute()
+                last_msg_result = supabase.table("messages").select("content, created_at").eq("group_id", group_id).order("created_at", desc=True).limit(1).execute()
                 last_message = last_msg_result.data[0] if last_msg_result.data and len(last_msg_result.data) > 0 else None
                 
                 # Get member count
@@ -519,9 +533,10 @@ async def mark_conversation_read(
 async def get_conversation(
     conversation_id: int,
     conversation_type: str = Query("user", description="Type: user, event, or group"),
+    fields: Optional[FrozenSet[str]] = Depends(sparse_fieldset(MessageDetail)),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get messages in a conversation"""
+    """Get messages in a conversation. `fields` limits the returned fields."""
     try:
         supabase: Client = get_supabase()
     except Exception as e:
@@ -584,35 +599,24 @@ async def get_conversation(
     # Sort messages by created_at
     messages_data.sort(key=lambda x: x.get("created_at", ""))
     
+    # Senders and receivers from the shared summary cache (one query for the misses)
+    try:
+        users_by_id = get_user_summaries(
+            supabase, {uid for msg in messages_data for uid in (msg.get("sender_id"), msg.get("receiver_id"))}
+        )
+    except Exception:
+        users_by_id = {}
+    
     # Build result with user/event details
     result = []
     for msg in messages_data:
         # Get sender info
-        sender_data = {}
-        try:
-            sender_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", msg.get("sender_id")).single().execute()
-            if sender_result.data:
-                sender_data = {
-                    "id": sender_result.data.get("id"),
-                    "full_name": sender_result.data.get("full_name") or "Unknown",
-                    "avatar_url": sender_result.data.get("avatar_url")
-                }
-        except Exception:
-            sender_data = {"id": msg.get("sender_id"), "full_name": "Unknown", "avatar_url": None}
+        sender_data = _participant_dict(msg.get("sender_id"), users_by_id)
         
         # Get receiver info (if exists)
         receiver_data = None
         if msg.get("receiver_id"):
-            try:
-                receiver_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", msg.get("receiver_id")).single().execute()
-                if receiver_result.data:
-                    receiver_data = {
-                        "id": receiver_result.data.get("id"),
-                        "full_name": receiver_result.data.get("full_name") or "Unknown",
-                        "avatar_url": receiver_result.data.get("avatar_url")
-                    }
-            except Exception:
-                receiver_data = {"id": msg.get("receiver_id"), "full_name": "Unknown", "avatar_url": None}
+            receiver_data = _participant_dict(msg.get("receiver_id"), users_by_id)
         
         # Get event info (if exists)
         event_data = None
@@ -642,4 +646,5 @@ async def get_conversation(
             event=event_data
         ))
     
-    return result
+    # Already validated - serialize once, skipping response_model re-validation
+    return model_response(result, fields=fields)
@@ -1,13 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from supabase import Client
-from typing import Optional, List
+from typing import FrozenSet, Optional, List
 from core.database import get_supabase
+from core.responses import model_response, sparse_fieldset
+from core.http_cache import NO_CACHE_PRIVATE, NO_CACHE_PUBLIC, etag_matches, make_etag, not_modified, set_cache_headers
 from api.auth import get_current_user, get_current_user_optional
 from schemas.post import PostCreate, PostResponse
+from services.user_summaries import get_user_summaries, get_user_summary
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
 
+def _author_dict(user_id: int, summary: Optional[dict]) -> dict:
+    """Author info for a PostResponse; defaults when the user is missing"""
+    summary = summary or {}
+    return {
+        "id": user_id,
+        "full_name": summary.get("full_name") or "Unknown User",
+        "avatar_url": summary.get("avatar_url")
+    }
+
+
 @router.post("", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post_data: PostCreate,
@@ -53,22 +67,11 @@ async def create_post(
     is_liked = len(user_like.data) > 0 if user_like.data else False
     
     # Get user info (with error handling for missing users)
-    user_dict = None
     try:
-        user_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", user_id).single().execute()
-        if user_result.data:
-            user_dict = {
-                "id": user_result.data.get("id"),
-                "full_name": user_result.data.get("full_name") or "Unknown User",
-                "avatar_url": user_result.data.get("avatar_url")
-            }
+        author = get_user_summary(supabase, user_id)
     except Exception:
-        # User not found, use defaults
-        user_dict = {
-            "id": user_id,
-            "full_name": "Unknown User",
-            "avatar_url": None
-        }
+        author = None
+    user_dict = _author_dict(user_id, author)
     
     return PostResponse(
         id=new_post["id"],
@@ -88,9 +91,10 @@ async def get_posts(
     user_id: Optional[int] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    fields: Optional[FrozenSet[str]] = Depends(sparse_fieldset(PostResponse)),
     current_user: Optional[dict] = Depends(get_current_user_optional)
 ):
-    """Get posts, optionally filtered by user_id"""
+    """Get posts, optionally filtered by user_id. `fields` limits the returned fields."""
     try:
         supabase: Client = get_supabase()
     except Exception as e:
@@ -99,8 +103,8 @@ async def get_posts(
             detail=f"Supabase connection error: {str(e)}"
         )
     
-    # Build query
-    query = supabase.table("posts").select("*")
+    # Build query - like counts come with the page as an embedded aggregate
+    query = supabase.table("posts").select("id, user_id, content, image_url, created_at, updated_at, likes(count)")
     
     if user_id:
         query = query.eq("user_id", user_id)
@@ -118,41 +122,29 @@ async def get_posts(
     result = []
     current_user_id = current_user.get("id") if current_user and isinstance(current_user, dict) else None
     
-    for post in posts_result.data:
-        # Get like count - handle errors gracefully
-        like_count = 0
+    # Authors from the shared summary cache - one query for the misses, if any
+    try:
+        authors = get_user_summaries(supabase, (post.get("user_id") for post in posts_result.data))
+    except Exception:
+        authors = {}
+    
+    # Which of the page's posts the current user liked - one query for the page
+    liked_ids = set()
+    if current_user_id:
         try:
-            likes_result = supabase.table("likes").select("id", count="exact").eq("post_id", post["id"]).execute()
-            like_count = likes_result.count if likes_result.count is not None else 0
+            user_likes = supabase.table("likes").select("post_id").eq("user_id", current_user_id).in_(
+                "post_id", [post["id"] for post in posts_result.data]
+            ).execute()
+            liked_ids = {like["post_id"] for like in user_likes.data or []}
         except Exception:
-            like_count = 0
-        
-        # Check if current user liked it - handle errors gracefully
-        is_liked = False
-        if current_user_id:
-            try:
-                user_like = supabase.table("likes").select("id").eq("post_id", post["id"]).eq("user_id", current_user_id).execute()
-                is_liked = len(user_like.data) > 0 if user_like.data else False
-            except Exception:
-                is_liked = False
+            liked_ids = set()
+    
+    for post in posts_result.data:
+        like_rows = post.get("likes") or []
+        like_count = like_rows[0].get("count", 0) if like_rows else 0
+        is_liked = post["id"] in liked_ids
         
-        # Get user info (with error handling for missing users)
-        user_dict = None
-        try:
-            user_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", post["user_id"]).single().execute()
-            if user_result.data:
-                user_dict = {
-                    "id": user_result.data.get("id"),
-                    "full_name": user_result.data.get("full_name") or "Unknown User",
-                    "avatar_url": user_result.data.get("avatar_url")
-                }
-        except Exception:
-            # User not found, use defaults
-            user_dict = {
-                "id": post["user_id"],
-                "full_name": "Unknown User",
-                "avatar_url": None
-            }
+        user_dict = _author_dict(post["user_id"], authors.get(post["user_id"]))
         
         result.append(PostResponse(
             id=post["id"],
@@ -166,15 +158,23 @@ async def get_posts(
             user=user_dict
         ))
     
-    return result
+    # Already validated - serialize once, skipping response_model re-validation
+    return model_response(result, fields=fields)
 
 
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post(
     post_id: int,
+    request: Request,
+    response: Response,
     current_user: Optional[dict] = Depends(get_current_user_optional)
 ):
-    """Get a specific post by ID"""
+    """
+    Get a specific post by ID.
+    Conditional GET: the ETag comes from a cheap probe (the post's and author's
+    updated_at, the like count and the viewer's like), so If-None-Match is
+    answered with 304 before the post body is read.
+    """
     try:
         supabase: Client = get_supabase()
     except Exception as e:
@@ -183,36 +183,56 @@ async def get_post(
             detail=f"Supabase connection error: {str(e)}"
         )
     
-    post_result = supabase.table("posts").select("*").eq("id", post_id).single().execute()
+    current_user_id = current_user.get("id") if isinstance(current_user, dict) else None
+    # The probe and the viewer's like only depend on the ids, so run them together
+    probe_result, is_liked = await asyncio.gather(
+        asyncio.to_thread(
+            supabase.table("posts").select(
+                "updated_at, users(updated_at), likes(count)"
+            ).eq("id", post_id).maybe_single().execute
+        ),
+        _is_liked(supabase, post_id, current_user_id)
+    )
     
-    if not post_result.data:
+    if not probe_result or not probe_result.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
-    post = post_result.data
+    probe = probe_result.data
     
-    # Get like count
-    likes_result = supabase.table("likes").select("id", count="exact").eq("post_id", post_id).execute()
-    like_count = likes_result.count if likes_result.count is not None else 0
+    # Like count (embedded aggregate)
+    like_rows = probe.get("likes") or []
+    like_count = like_rows[0].get("count", 0) if like_rows else 0
     
-    # Check if current user liked it
-    is_liked = False
-    if current_user:
-        current_user_id = current_user.get("id") if isinstance(current_user, dict) else None
-        if current_user_id:
-            user_like = supabase.table("likes").select("id").eq("post_id", post_id).eq("user_id", current_user_id).execute()
-            is_liked = len(user_like.data) > 0 if user_like.data else False
+    etag = make_etag(post_id, probe.get("updated_at"), (probe.get("users") or {}).get("updated_at"), like_count, is_liked)
+    cache_control = NO_CACHE_PRIVATE if current_user_id else NO_CACHE_PUBLIC
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control, vary="Authorization")
     
-    # Get user info
-    user_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", post["user_id"]).single().execute()
+    # Post and author - read only when the body is sent
+    post_result = await asyncio.to_thread(
+        supabase.table("posts").select(
+            "id, user_id, content, image_url, created_at, updated_at, users(id, full_name, avatar_url)"
+        ).eq("id", post_id).maybe_single().execute
+    )
+    if not post_result or not post_result.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
+    post = post_result.data
+    set_cache_headers(response, etag, cache_control, vary="Authorization")
+    
+    # User info
     user_dict = None
-    if user_result.data:
+    author = post.get("users")
+    if author:
         user_dict = {
-            "id": user_result.data.get("id"),
-            "full_name": user_result.data.get("full_name"),
-            "avatar_url": user_result.data.get("avatar_url")
+            "id": author.get("id"),
+            "full_name": author.get("full_name"),
+            "avatar_url": author.get("avatar_url")
         }
     
     return PostResponse(
@@ -228,6 +248,16 @@ async def get_post(
     )
 
 
+async def _is_liked(supabase: Client, post_id: int, user_id: Optional[int]) -> bool:
+    """Whether user_id liked the post (False for anonymous viewers)"""
+    if not user_id:
+        return False
+    user_like = await asyncio.to_thread(
+        supabase.table("likes").select("id").eq("post_id", post_id).eq("user_id", user_id).execute
+    )
+    return bool(user_like.data)
+
+
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(
     post_id: int,
@@ -334,14 +364,7 @@ async def like_post(
     like_count = likes_result.count if likes_result.count is not None else 0
     
     # Get user info
-    user_result = supabase.table("users").select("id, full_name, avatar_url").eq("id", post["user_id"]).single().execute()
-    user_dict = None
-    if user_result.data:
-        user_dict = {
-            "id": user_result.data.get("id"),
-            "full_name": user_result.data.get("full_name"),
-            "avatar_url": user_result.data.get("avatar_url")
-        }
+    user_dict = _author_dict(post["user_id"], get_user_summary(supabase, post["user_id"]))
     
     return PostResponse(
         id=post["id"],
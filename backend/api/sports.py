@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, status
 from supabase import Client
 from typing import List, Optional
 from core.database import get_supabase
+from core.metrics import record_cache_lookup
 import time
 
 router = APIRouter(prefix="/sports", tags=["sports"])
@@ -18,7 +19,9 @@ async def list_sports():
     global _sports_cache, _sports_cache_at
     now = time.time()
     if _sports_cache is not None and (now - _sports_cache_at) < _CACHE_TTL_SEC:
+        record_cache_lookup("sports", True)
         return _sports_cache
+    record_cache_lookup("sports", False)
     try:
         supabase: Client = get_supabase()
         result = supabase.table("sports").select("*").order("name").execute()
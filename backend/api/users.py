@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from supabase import Client
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import List, Optional
+from datetime import datetime
 from core.database import get_supabase, get_db
+from core.http_cache import SHORT_PUBLIC, etag_matches, make_etag, not_modified, set_cache_headers
+from core.events import UserProfileChanged, publish
 from api.auth import get_current_user
 from schemas.user import UserResponse, UserUpdate, UserProfile, CompleteProfileRequest
 from schemas.user_photo import UserPhotoCreate, UserPhotoResponse
 from models.user import User
+from services.profile import update_interests
+from services.geocoder import location_columns
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -43,7 +48,7 @@ async def get_current_user_profile(
     # Get sports - handle errors gracefully
     sports = []
     try:
-        sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", user_id).execute()
+        sports_result = supabase.table("user_sports").select("sport_id, sports(id, name, icon)").eq("user_id", user_id).execute()
         if sports_result.data:
             for item in sports_result.data:
                 if item.get("sports"):
@@ -54,7 +59,7 @@ async def get_current_user_profile(
     # Get goals - handle errors gracefully
     goals = []
     try:
-        goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", user_id).execute()
+        goals_result = supabase.table("user_goals").select("goal_id, goals(id, name, description)").eq("user_id", user_id).execute()
         if goals_result.data:
             for item in goals_result.data:
                 if item.get("goals"):
@@ -125,7 +130,7 @@ async def search_users(
         # Get sports
         sports = []
         try:
-            sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", user_id).execute()
+            sports_result = supabase.table("user_sports").select("sport_id, sports(id, name, icon)").eq("user_id", user_id).execute()
             if sports_result.data:
                 for item in sports_result.data:
                     if item.get("sports"):
@@ -136,7 +141,7 @@ async def search_users(
         # Get goals
         goals = []
         try:
-            goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", user_id).execute()
+            goals_result = supabase.table("user_goals").select("goal_id, goals(id, name, description)").eq("user_id", user_id).execute()
             if goals_result.data:
                 for item in goals_result.data:
                     if item.get("goals"):
@@ -155,9 +160,15 @@ async def search_users(
 
 @router.get("/{user_id}", response_model=UserProfile)
 async def get_user_profile(
-    user_id: int
+    user_id: int,
+    request: Request,
+    response: Response
 ):
-    """Get a user's profile by ID"""
+    """
+    Get a user's profile by ID.
+    Profile updates bump users.updated_at, so it alone versions the response
+    and If-None-Match is answered with 304 after one single-column query.
+    """
     try:
         supabase: Client = get_supabase()
     except Exception as e:
@@ -166,6 +177,16 @@ async def get_user_profile(
             detail=f"Supabase connection error: {str(e)}"
         )
     
+    try:
+        version_result = supabase.table("users").select("updated_at").eq("id", user_id).maybe_single().execute()
+    except Exception:
+        version_result = None
+    if version_result and version_result.data:
+        etag = make_etag(user_id, version_result.data.get("updated_at"))
+        if etag_matches(request, etag):
+            return not_modified(etag, SHORT_PUBLIC)
+        set_cache_headers(response, etag, SHORT_PUBLIC)
+    
     try:
         user_result = supabase.table("users").select("*").eq("id", user_id).single().execute()
         if not user_result.data:
@@ -185,7 +206,7 @@ async def get_user_profile(
     # Get sports
     sports = []
     try:
-        sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", user_id).execute()
+        sports_result = supabase.table("user_sports").select("sport_id, sports(id, name, icon)").eq("user_id", user_id).execute()
         if sports_result.data:
             for item in sports_result.data:
                 if item.get("sports"):
@@ -196,7 +217,7 @@ async def get_user_profile(
     # Get goals
     goals = []
     try:
-        goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", user_id).execute()
+        goals_result = supabase.table("user_goals").select("goal_id, goals(id, name, description)").eq("user_id", user_id).execute()
         if goals_result.data:
             for item in goals_result.data:
                 if item.get("goals"):
@@ -237,30 +258,23 @@ async def update_user_profile(
     sport_ids = update_data.pop("sport_ids", None)
     goal_ids = update_data.pop("goal_ids", None)
     
-    # Update basic fields in users table
-    if update_data:
-        result = supabase.table("users").update(update_data).eq("id", user_id).execute()
-        if not result.data:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update user")
-        current_user = result.data[0]
-    
-    # Update sports
-    if sport_ids is not None:
-        # Delete existing user_sports
-        supabase.table("user_sports").delete().eq("user_id", user_id).execute()
-        # Insert new user_sports
-        if sport_ids:
-            user_sports_data = [{"user_id": user_id, "sport_id": sid} for sid in sport_ids]
-            supabase.table("user_sports").insert(user_sports_data).execute()
-    
-    # Update goals
-    if goal_ids is not None:
-        # Delete existing user_goals
-        supabase.table("user_goals").delete().eq("user_id", user_id).execute()
-        # Insert new user_goals
-        if goal_ids:
-            user_goals_data = [{"user_id": user_id, "goal_id": gid} for gid in goal_ids]
-            supabase.table("user_goals").insert(user_goals_data).execute()
+    # Update sports and goals: only the ids that differ are written
+    try:
+        update_interests(supabase, user_id, sport_ids, goal_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Update basic fields in users table. updated_at versions the whole profile
+    # (sports and goals included) for conditional GETs, so it is bumped on every
+    # update, after the sports and goals are written.
+    update_data["updated_at"] = datetime.utcnow().isoformat()
+    if "location" in update_data:
+        update_data.update(location_columns(update_data["location"]))
+    result = supabase.table("users").update(update_data).eq("id", user_id).execute()
+    if not result.data:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update user")
+    current_user = result.data[0]
+    publish(UserProfileChanged(user_id=user_id, fields=frozenset(update_data)))
     
     # Get updated user with relations
     return await get_current_user_profile(current_user=current_user)
@@ -394,7 +408,8 @@ async def complete_profile(
     # Update profile
     result = supabase.table("users").update({
         "is_discoverable": is_discoverable,
-        "profile_completed": True
+        "profile_completed": True,
+        "updated_at": datetime.utcnow().isoformat()
     }).eq("id", user_id).execute()
     
     if not result.data:
@@ -402,6 +417,9 @@ async def complete_profile(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to complete profile"
         )
+    publish(UserProfileChanged(
+        user_id=user_id, fields=frozenset({"is_discoverable", "profile_completed", "updated_at"})
+    ))
     
     # Get updated user with relations
     return await get_current_user_profile(current_user=result.data[0])
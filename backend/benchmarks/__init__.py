@@ -0,0 +1 @@
+"""Offline benchmarks: in-memory Supabase stand-in, synthetic data and endpoint suite."""
@@ -0,0 +1,101 @@
+"""
+Recall and latency of LSH candidate generation (services/candidates.py)
+against exhaustive scoring, at several user counts.
+
+For a sample of discoverable users, the exhaustive top-K (every discoverable
+user scored) is compared with the top-K of the index's candidates:
+  - recall@K: share of the candidate top-K scoring at least the exhaustive
+    K-th score (scores tie a lot, so ids are not compared)
+  - score ratio: mean candidate top-K score / mean exhaustive top-K score
+  - ms/query: scoring only, no database round trips
+Existing buddies are not excluded on either side.
+
+Run with: PYTHONPATH=/path/to/backend python -m benchmarks.bench_candidates [--users 1000,5000,20000] [--queries 200] [--k 10,50]
+"""
+import argparse
+import heapq
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.datagen import generate
+from benchmarks.fake_supabase import FakeSupabase
+from services.candidates import build_index
+from services.match_features import MatchFeatures, build_match_features, score_features
+
+
+def _population(n_users: int, seed: int) -> Dict[int, MatchFeatures]:
+    """Match features of the discoverable, active users of a generated dataset"""
+    fake = FakeSupabase()
+    generate(fake, users=n_users, seed=seed)
+    users = [u for u in fake.rows("users") if u.get("is_discoverable") and u.get("is_active", True)]
+    approved = [r for r in fake.rows("event_rsvps") if r.get("status") == "approved"]
+    return build_match_features(users, fake.rows("user_sports"), fake.rows("user_goals"), approved)
+
+
+def _top(viewer: MatchFeatures, candidates: List[MatchFeatures], k: int) -> List[float]:
+    scores = (score_features(viewer, c) for c in candidates if c.user_id != viewer.user_id)
+    return heapq.nlargest(k, scores)
+
+
+def run(n_users: int, queries: int, ks: List[int], seed: int) -> None:
+    features = _population(n_users, seed)
+    population = list(features.values())
+    started = time.perf_counter()
+    index = build_index(population)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(seed)
+    viewers = rng.sample(population, min(queries, len(population)))
+    k_max = max(ks)
+    recalls = {k: [] for k in ks}
+    ratios = {k: [] for k in ks}
+    exhaustive_ms = lsh_ms = 0.0
+    pool_sizes = []
+    for viewer in viewers:
+        started = time.perf_counter()
+        exact = _top(viewer, population, k_max)
+        exhaustive_ms += (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        pool = [features[user_id] for user_id in index.candidates(viewer)]
+        approx = _top(viewer, pool, k_max)
+        lsh_ms += (time.perf_counter() - started) * 1000
+        pool_sizes.append(len(pool))
+
+        for k in ks:
+            if len(exact) < k:
+                continue
+            cutoff = exact[k - 1]
+            recalls[k].append(sum(1 for score in approx[:k] if score >= cutoff) / k)
+            ratios[k].append(sum(approx[:k]) / max(sum(exact[:k]), 1e-9))
+
+    n = len(viewers)
+    print(f"\n{n_users:,} users, {len(population):,} discoverable, index built in {build_ms:.0f} ms")
+    print(f"  candidates/query   {statistics.mean(pool_sizes):>8.0f}")
+    print(f"  exhaustive         {exhaustive_ms / n:>8.2f} ms/query")
+    print(f"  LSH candidates     {lsh_ms / n:>8.2f} ms/query  {exhaustive_ms / max(lsh_ms, 1e-9):>5.1f}x")
+    for k in ks:
+        if recalls[k]:
+            print(f"  recall@{k:<3}         {statistics.mean(recalls[k]):>8.3f}   score ratio {statistics.mean(ratios[k]):.3f}")
+
+
+def main(args) -> None:
+    print("🎯 LSH candidate generation vs exhaustive scoring")
+    ks = [int(k) for k in args.k.split(",")]
+    for n_users in (int(n) for n in args.users.split(",")):
+        run(n_users, args.queries, ks, args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure recall and latency of buddy candidate generation")
+    parser.add_argument("--users", default="1000,5000,20000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", default="10,50")
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
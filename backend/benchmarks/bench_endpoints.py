@@ -0,0 +1,501 @@
+"""
+Endpoint benchmark: latency and Supabase query counts for every router
+endpoint, run in-process against FakeSupabase - no network, no database.
+
+Run with: PYTHONPATH=/path/to/backend python -m benchmarks.bench_endpoints
+    [--users 1000 10000 100000] [--iterations 20] [--only events]
+    [--latency-ms 0] [--json results.json] [--compare baseline.json]
+
+Every endpoint runs twice: cold, with the response caches cleared before
+each timed request, and warm, with whatever the previous requests cached.
+The process-local indexes (candidates, upcoming events, recommendations)
+stay built in both. --latency-ms adds a simulated round-trip per query,
+which makes the cost of sequential (N+1) query patterns visible. --compare exits non-zero when an
+endpoint got slower than --tolerance or issues more queries than the baseline.
+/auth/register and /auth/login (SQLAlchemy) and the WebSocket are not covered.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+
+from benchmarks.datagen import Dataset, generate
+from benchmarks.fake_supabase import FakeSupabase, token_for
+from core.cache import clear_all_caches
+from core.database import override_supabase
+from core.query_log import track_queries
+
+
+@dataclass
+class Call:
+    method: str
+    url: str
+    user: Optional[dict] = None
+    json: Any = None
+    params: Optional[dict] = None
+    # Send If-None-Match with the ETag of an (untimed) priming request
+    revalidate: bool = False
+
+
+@dataclass
+class Scenario:
+    name: str
+    # build(ctx, i) -> Call; any setup it does (fake.load) is not timed
+    build: Callable[["BenchContext", int], Call]
+
+
+@dataclass
+class Result:
+    name: str
+    latencies_ms: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    rows: List[int] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        return {
+            "n": len(self.latencies_ms),
+            "p50_ms": round(percentile(self.latencies_ms, 50), 2),
+            "p95_ms": round(percentile(self.latencies_ms, 95), 2),
+            "queries": max(self.queries) if self.queries else 0,
+            "rows": max(self.rows) if self.rows else 0,
+            "errors": self.errors,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+        }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class BenchContext:
+    """Seeded dataset plus helpers that pick or create request targets."""
+
+    def __init__(self, fake: FakeSupabase, data: Dataset, seed: int):
+        self.fake = fake
+        self.data = data
+        self.rng = random.Random(seed)
+        self.users_by_id = {u["id"]: u for u in data.users}
+        members = fake.rows("group_members")
+        self.group_admins = {m["group_id"]: m["user_id"] for m in members if m.get("is_admin")}
+        self.group_members = [m for m in members if not m.get("is_admin")]
+        self.direct_messages = [m for m in fake.rows("messages") if m.get("receiver_id")][:5000]
+
+    def user(self) -> dict:
+        return self.rng.choice(self.data.users)
+
+    def discoverable_user(self) -> dict:
+        return self.rng.choice([u for u in self.data.users if u.get("is_discoverable")] or self.data.users)
+
+    def event(self) -> dict:
+        return self.fake.get("events", self.rng.choice(self.data.event_ids))
+
+    def future(self, days: int = 7) -> str:
+        return (datetime.now(timezone.utc) + timedelta(days=days)).isoformat()
+
+    def new_event(self, host: dict, **values) -> dict:
+        event = self.fake.load("events", [{
+            "title": "Bench fixture", "sport_id": self.data.sport_ids[0], "host_id": host["id"],
+            "location": "San Francisco, CA", "start_time": self.future(), **values,
+        }])[0]
+        self.fake.load("event_rsvps", [{"event_id": event["id"], "user_id": host["id"], "status": "approved"}])
+        return event
+
+    def two_users(self):
+        a, b = self.rng.sample(self.data.users, 2)
+        return a, b
+
+
+def _scenarios() -> List[Scenario]:
+    def s(name):
+        def register(fn):
+            scenarios.append(Scenario(name, fn))
+            return fn
+        return register
+
+    scenarios: List[Scenario] = []
+
+    # -- reference data / public ---------------------------------------------
+    s("GET /sports")(lambda c, i: Call("GET", "/sports"))
+    s("GET /goals")(lambda c, i: Call("GET", "/goals"))
+    s("POST /waitlist")(lambda c, i: Call(
+        "POST", "/waitlist", json={"email": f"wait{i}-{c.rng.randrange(10**9)}@example.com", "city": "Austin"}
+    ))
+
+    # -- users ----------------------------------------------------------------
+    s("GET /users/me")(lambda c, i: Call("GET", "/users/me", user=c.user()))
+    s("GET /users/search")(lambda c, i: Call("GET", "/users/search", params={"q": "alex"}))
+    s("GET /users/{user_id}")(lambda c, i: Call("GET", f"/users/{c.user()['id']}"))
+    s("GET /users/{user_id} (revalidate)")(lambda c, i: Call("GET", f"/users/{c.user()['id']}", revalidate=True))
+    s("PUT /users/me")(lambda c, i: Call("PUT", "/users/me", user=c.user(), json={
+        "bio": f"Updated bio {i}",
+        "sport_ids": c.rng.sample(c.data.sport_ids, 3),
+        "goal_ids": c.rng.sample(c.data.goal_ids, 2),
+    }))
+    s("POST /users/me/photos")(lambda c, i: Call(
+        "POST", "/users/me/photos", user=c.user(), json={"photo_url": f"https://img.example.com/{i}.jpg"}
+    ))
+
+    @s("DELETE /users/me/photos/{photo_id}")
+    def delete_photo(c, i):
+        user = c.user()
+        photo = c.fake.load("user_photos", [{"user_id": user["id"], "photo_url": "https://img.example.com/x.jpg"}])[0]
+        return Call("DELETE", f"/users/me/photos/{photo['id']}", user=user)
+
+    s("POST /users/me/complete-profile")(lambda c, i: Call(
+        "POST", "/users/me/complete-profile", user=c.user(), json={"is_discoverable": True}
+    ))
+
+    # -- events ---------------------------------------------------------------
+    s("GET /events")(lambda c, i: Call("GET", "/events"))
+    s("GET /events?sport_id")(lambda c, i: Call("GET", "/events", params={"sport_id": c.rng.choice(c.data.sport_ids)}))
+    s("GET /events?start_date&end_date&sport_id")(lambda c, i: Call("GET", "/events", params={
+        "start_date": c.future(0), "end_date": c.future(7), "sport_id": c.rng.choice(c.data.sport_ids),
+    }))
+    s("GET /events/recommended")(lambda c, i: Call("GET", "/events/recommended", user=c.user()))
+    s("GET /events/map")(lambda c, i: Call("GET", "/events/map", params={
+        "south": 24, "west": -125, "north": 50, "east": -66, "zoom": 4,
+    }))
+
+    @s("GET /events/map (city)")
+    def event_map_city(c, i):
+        event = c.event()
+        return Call("GET", "/events/map", params={
+            "south": event["latitude"] - 0.1, "west": event["longitude"] - 0.15,
+            "north": event["latitude"] + 0.1, "east": event["longitude"] + 0.15, "zoom": 12,
+        })
+
+    s("GET /events/{event_id}")(lambda c, i: Call("GET", f"/events/{c.event()['id']}", user=c.user()))
+    s("GET /events/{event_id} (revalidate)")(lambda c, i: Call(
+        "GET", f"/events/{c.event()['id']}", user=c.user(), revalidate=True
+    ))
+    s("POST /events")(lambda c, i: Call("POST", "/events", user=c.user(), json={
+        "title": f"New event {i}", "sport_id": c.rng.choice(c.data.sport_ids),
+        "location": "Denver, CO", "start_time": c.future(3), "max_participants": 12,
+    }))
+
+    @s("PUT /events/{event_id}")
+    def update_event(c, i):
+        event = c.event()
+        return Call("PUT", f"/events/{event['id']}", user=c.users_by_id[event["host_id"]],
+                    json={"description": f"Updated {i}"})
+
+    @s("DELETE /events/{event_id}")
+    def delete_event(c, i):
+        host = c.user()
+        event = c.new_event(host)
+        return Call("DELETE", f"/events/{event['id']}", user=host)
+
+    @s("POST /events/{event_id}/rsvp")
+    def rsvp(c, i):
+        event = c.new_event(c.user())
+        return Call("POST", f"/events/{event['id']}/rsvp", user=c.user())
+
+    @s("DELETE /events/{event_id}/rsvp")
+    def cancel_rsvp(c, i):
+        event = c.new_event(c.user())
+        user = c.user()
+        c.fake.load("event_rsvps", [{"event_id": event["id"], "user_id": user["id"], "status": "pending"}])
+        return Call("DELETE", f"/events/{event['id']}/rsvp", user=user)
+
+    s("GET /events/user/me")(lambda c, i: Call("GET", "/events/user/me", user=c.user()))
+
+    @s("GET /events/{event_id}/rsvps")
+    def event_rsvps(c, i):
+        event = c.event()
+        return Call("GET", f"/events/{event['id']}/rsvps", user=c.users_by_id[event["host_id"]])
+
+    def _with_rsvp(c, status):
+        host, guest = c.two_users()
+        event = c.new_event(host)
+        c.fake.load("event_rsvps", [{"event_id": event["id"], "user_id": guest["id"], "status": status}])
+        return host, guest, event
+
+    @s("POST /events/{event_id}/rsvps/{user_id}/approve")
+    def approve(c, i):
+        host, guest, event = _with_rsvp(c, "pending")
+        return Call("POST", f"/events/{event['id']}/rsvps/{guest['id']}/approve", user=host)
+
+    @s("POST /events/{event_id}/rsvps/{user_id}/reject")
+    def reject(c, i):
+        host, guest, event = _with_rsvp(c, "pending")
+        return Call("POST", f"/events/{event['id']}/rsvps/{guest['id']}/reject", user=host)
+
+    @s("DELETE /events/{event_id}/rsvps/{user_id}")
+    def remove_participant(c, i):
+        host, guest, event = _with_rsvp(c, "approved")
+        return Call("DELETE", f"/events/{event['id']}/rsvps/{guest['id']}", user=host)
+
+    # -- buddies --------------------------------------------------------------
+    s("GET /buddies/suggested")(lambda c, i: Call("GET", "/buddies/suggested", user=c.discoverable_user()))
+    s("GET /buddies")(lambda c, i: Call("GET", "/buddies", user=c.user()))
+
+    @s("POST /buddies")
+    def create_buddy(c, i):
+        a, b = c.two_users()
+        return Call("POST", "/buddies", user=a, json={"user2_id": b["id"]})
+
+    @s("PUT /buddies/{buddy_id}")
+    def update_buddy(c, i):
+        a, b = c.two_users()
+        buddy = c.fake.load("buddies", [{"user1_id": a["id"], "user2_id": b["id"]}])[0]
+        return Call("PUT", f"/buddies/{buddy['id']}", user=b, json={"status": "accepted"})
+
+    @s("DELETE /buddies/{buddy_id}")
+    def delete_buddy(c, i):
+        a, b = c.two_users()
+        buddy = c.fake.load("buddies", [{"user1_id": a["id"], "user2_id": b["id"], "status": "accepted"}])[0]
+        return Call("DELETE", f"/buddies/{buddy['id']}", user=a)
+
+    # -- messages -------------------------------------------------------------
+    @s("POST /messages")
+    def send_message(c, i):
+        a, b = c.two_users()
+        return Call("POST", "/messages", user=a, json={"content": f"Hi {i}", "receiver_id": b["id"]})
+
+    s("GET /messages/conversations")(lambda c, i: Call("GET", "/messages/conversations", user=c.user()))
+
+    @s("GET /messages/conversations/{conversation_id}")
+    def conversation(c, i):
+        message = c.rng.choice(c.direct_messages)
+        return Call("GET", f"/messages/conversations/{message['sender_id']}",
+                    user=c.users_by_id[message["receiver_id"]])
+
+    @s("POST /messages/conversations/{conversation_id}/mark-read")
+    def mark_read(c, i):
+        message = c.rng.choice(c.direct_messages)
+        return Call("POST", f"/messages/conversations/{message['sender_id']}/mark-read",
+                    user=c.users_by_id[message["receiver_id"]])
+
+    # -- groups ---------------------------------------------------------------
+    @s("POST /groups")
+    def create_group(c, i):
+        members = c.rng.sample(c.data.users, 6)
+        return Call("POST", "/groups", user=members[0], json={
+            "name": f"Group {i}", "member_ids": [m["id"] for m in members[1:]],
+        })
+
+    @s("GET /groups")
+    def list_groups(c, i):
+        return Call("GET", "/groups", user=c.users_by_id[c.rng.choice(c.group_members)["user_id"]])
+
+    @s("GET /groups/{group_id}")
+    def get_group(c, i):
+        member = c.rng.choice(c.group_members)
+        return Call("GET", f"/groups/{member['group_id']}", user=c.users_by_id[member["user_id"]])
+
+    @s("GET /groups/{group_id} (revalidate)")
+    def revalidate_group(c, i):
+        member = c.rng.choice(c.group_members)
+        return Call("GET", f"/groups/{member['group_id']}", user=c.users_by_id[member["user_id"]], revalidate=True)
+
+    @s("PUT /groups/{group_id}")
+    def update_group(c, i):
+        group_id = c.rng.choice(c.data.group_ids)
+        return Call("PUT", f"/groups/{group_id}", user=c.users_by_id[c.group_admins[group_id]],
+                    json={"description": f"Updated {i}"})
+
+    @s("POST /groups/{group_id}/members")
+    def add_members(c, i):
+        group_id = c.rng.choice(c.data.group_ids)
+        return Call("POST", f"/groups/{group_id}/members", user=c.users_by_id[c.group_admins[group_id]],
+                    json={"user_ids": [u["id"] for u in c.rng.sample(c.data.users, 3)]})
+
+    def _new_member(c):
+        group_id = c.rng.choice(c.data.group_ids)
+        user = c.user()
+        c.fake.load("group_members", [{"group_id": group_id, "user_id": user["id"]}])
+        return group_id, user
+
+    @s("DELETE /groups/{group_id}/members/{user_id}")
+    def remove_member(c, i):
+        group_id, user = _new_member(c)
+        return Call("DELETE", f"/groups/{group_id}/members/{user['id']}",
+                    user=c.users_by_id[c.group_admins[group_id]])
+
+    @s("POST /groups/{group_id}/leave")
+    def leave_group(c, i):
+        group_id, user = _new_member(c)
+        return Call("POST", f"/groups/{group_id}/leave", user=user)
+
+    # -- posts ----------------------------------------------------------------
+    s("POST /posts")(lambda c, i: Call("POST", "/posts", user=c.user(), json={"content": f"Post {i}"}))
+    s("GET /posts")(lambda c, i: Call("GET", "/posts", user=c.user()))
+    s("GET /posts/{post_id}")(lambda c, i: Call("GET", f"/posts/{c.rng.choice(c.data.post_ids)}", user=c.user()))
+    s("GET /posts/{post_id} (revalidate)")(lambda c, i: Call(
+        "GET", f"/posts/{c.rng.choice(c.data.post_ids)}", user=c.user(), revalidate=True
+    ))
+
+    @s("DELETE /posts/{post_id}")
+    def delete_post(c, i):
+        user = c.user()
+        post = c.fake.load("posts", [{"user_id": user["id"], "content": "to delete"}])[0]
+        return Call("DELETE", f"/posts/{post['id']}", user=user)
+
+    s("POST /posts/{post_id}/like")(lambda c, i: Call(
+        "POST", f"/posts/{c.rng.choice(c.data.post_ids)}/like", user=c.user()
+    ))
+
+    return scenarios
+
+
+SCENARIOS = _scenarios()
+
+
+def _clear_response_caches() -> None:
+    clear_all_caches()
+    import api.sports
+    api.sports._sports_cache = None
+
+
+def _reset_app_state() -> None:
+    _clear_response_caches()
+    from services.candidates import reset_candidate_index
+    reset_candidate_index()
+    from services.upcoming_events import reset_upcoming_index
+    reset_upcoming_index()
+    from services.recommendations import reset_recommendations
+    reset_recommendations()
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    ctx: BenchContext,
+    scenario: Scenario,
+    iterations: int,
+    warmup: int,
+    max_seconds: float,
+    cold: bool,
+    start: int = 0
+) -> Result:
+    result = Result(scenario.name)
+    deadline = time.perf_counter() + max_seconds
+    for i in range(warmup + iterations):
+        call = scenario.build(ctx, start + i)
+        headers = {"Authorization": f"Bearer {token_for(call.user['email'])}"} if call.user else {}
+        if call.revalidate:
+            primed = await client.request(call.method, call.url, params=call.params, headers=headers)
+            headers["If-None-Match"] = primed.headers.get("etag", "")
+        if cold:
+            _clear_response_caches()
+        with track_queries(scenario.name) as log:
+            started = time.perf_counter()
+            response = await client.request(call.method, call.url, json=call.json, params=call.params, headers=headers)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if i < warmup:
+            continue
+        result.latencies_ms.append(elapsed_ms)
+        result.queries.append(log.count())
+        result.rows.append(log.total_rows)
+        result.statuses[response.status_code] = result.statuses.get(response.status_code, 0) + 1
+        if response.status_code >= 400:
+            result.errors += 1
+        if time.perf_counter() > deadline:
+            break
+    return result
+
+
+async def run_scale(users: int, args) -> Dict[str, dict]:
+    fake = FakeSupabase(latency_ms=args.latency_ms)
+    started = time.perf_counter()
+    data = generate(fake, users=users, seed=args.seed)
+    print(f"\n🌱 Seeded {users:,} users in {time.perf_counter() - started:.1f}s "
+          f"({', '.join(f'{k}={v:,}' for k, v in data.counts.items() if v)})")
+
+    override_supabase(fake)
+    _reset_app_state()
+    from main import app
+
+    ctx = BenchContext(fake, data, seed=args.seed)
+    selected = [s for s in SCENARIOS if not args.only or any(o in s.name for o in args.only)]
+    summaries: Dict[str, dict] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'endpoint':<55} {'cache':>5} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'rows':>8}  status")
+        for scenario in selected:
+            summaries[scenario.name] = {}
+            for cache in ("cold", "warm"):
+                result = await run_scenario(
+                    client, ctx, scenario, args.iterations, args.warmup, args.max_seconds,
+                    cold=cache == "cold", start=0 if cache == "cold" else args.warmup + args.iterations
+                )
+                summary = summaries[scenario.name][cache] = result.summary()
+                statuses = ",".join(f"{k}x{v}" for k, v in summary["statuses"].items())
+                print(f"{scenario.name:<55} {cache:>5} {summary['p50_ms']:>9.2f} {summary['p95_ms']:>9.2f} "
+                      f"{summary['queries']:>8} {summary['rows']:>8}  {statuses}")
+    override_supabase(None)
+    return summaries
+
+
+def compare(results: Dict[str, Dict[str, dict]], baseline: Dict[str, Dict[str, dict]], tolerance: float) -> List[str]:
+    regressions = []
+    for scale, endpoints in results.items():
+        for name, caches in endpoints.items():
+            for cache, current in caches.items():
+                before = baseline.get(scale, {}).get(name, {}).get(cache)
+                if not before:
+                    continue
+                label = f"{scale} users {name} ({cache})"
+                if current["queries"] > before["queries"]:
+                    regressions.append(f"{label}: queries {before['queries']} -> {current['queries']}")
+                # Ignore sub-millisecond noise
+                if current["p50_ms"] > max(before["p50_ms"] * (1 + tolerance), before["p50_ms"] + 1.0):
+                    regressions.append(f"{label}: p50 {before['p50_ms']}ms -> {current['p50_ms']}ms")
+    return regressions
+
+
+async def main(args) -> int:
+    results = {}
+    for users in args.users:
+        results[str(users)] = await run_scale(users, args)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions vs baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n✅ No regressions vs baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API endpoints against an in-memory Supabase")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Per-endpoint time budget")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated round-trip per query")
+    parser.add_argument("--only", nargs="*", help="Only endpoints whose name contains one of these")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown vs baseline")
+    parser.add_argument("--verbose", action="store_true", help="Keep per-request query logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("dots.queries").setLevel(logging.ERROR)
+    sys.exit(asyncio.run(main(args)))
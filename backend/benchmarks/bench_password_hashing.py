@@ -0,0 +1,95 @@
+"""
+Event-loop impact of login bursts: bcrypt inline vs on the password pool.
+
+Fires a burst of concurrent password verifications (what /auth/login does)
+while GET /health requests and a 5ms heartbeat run on the same event loop,
+and reports how long those were stalled.
+
+Run with: PYTHONPATH=/path/to/backend python -m benchmarks.bench_password_hashing
+    [--logins 20] [--rounds 12] [--probes 50]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+
+from benchmarks.bench_endpoints import percentile
+from core.config import settings
+from core.security import get_password_hash, verify_password, verify_password_async
+
+
+async def _inline_login(password: str, hashed: str) -> bool:
+    # What an async handler calling verify_password directly does
+    return verify_password(password, hashed)
+
+
+async def _pooled_login(password: str, hashed: str) -> bool:
+    return await verify_password_async(password, hashed)
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.005) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def _health_probes(client: httpx.AsyncClient, count: int, latencies: list) -> None:
+    for _ in range(count):
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run(mode: str, logins: int, probes: int, hashed: str) -> dict:
+    from main import app
+    login = _inline_login if mode == "inline" else _pooled_login
+    lags, latencies = [], []
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            _health_probes(client, probes, latencies),
+            *(login("correct horse battery staple", hashed) for _ in range(logins)),
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await heartbeat
+    assert all(results[1:]), "password verification failed"
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "logins_per_s": logins / elapsed,
+        "health_p50_ms": percentile(latencies, 50),
+        "health_p99_ms": percentile(latencies, 99),
+        "max_loop_lag_ms": max(lags) if lags else 0.0,
+    }
+
+
+async def main(args) -> None:
+    settings.BCRYPT_ROUNDS = args.rounds
+    hashed = get_password_hash("correct horse battery staple", rounds=args.rounds)
+    started = time.perf_counter()
+    verify_password("correct horse battery staple", hashed)
+    print(f"🔐 bcrypt cost {args.rounds}: {(time.perf_counter() - started) * 1000:.0f}ms per verification, "
+          f"{settings.PASSWORD_HASH_WORKERS} pool workers, burst of {args.logins} logins\n")
+    print(f"{'mode':<10} {'burst s':>8} {'logins/s':>9} {'/health p50':>12} {'/health p99':>12} {'max lag ms':>11}")
+    for mode in ("inline", "pool"):
+        r = await run(mode, args.logins, args.probes, hashed)
+        print(f"{r['mode']:<10} {r['elapsed_s']:>8.2f} {r['logins_per_s']:>9.1f} {r['health_p50_ms']:>12.1f} "
+              f"{r['health_p99_ms']:>12.1f} {r['max_loop_lag_ms']:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure event-loop stalls caused by password hashing")
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    parser.add_argument("--probes", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,104 @@
+"""
+Response serialization cost per 1k events / messages.
+
+Compares what happens to a handler's already-built models on the way out:
+  - response_model + JSONResponse: validate again, convert to JSON-able
+    Python, json.dumps (FastAPI's classic path)
+  - response_model + ORJSONResponse: same, rendered with orjson
+  - model_response: pydantic-core dumps the models once, no re-validation
+Model construction (the handler's own, single validation) is reported
+separately for scale.
+
+Run with: PYTHONPATH=/path/to/backend python -m benchmarks.bench_serialization [--items 1000] [--repeat 20]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pydantic import TypeAdapter
+
+from core.responses import ORJSONResponse, dump_json
+from schemas.event import EventResponse
+from schemas.message import MessageDetail
+
+
+def _event_rows(n: int) -> List[dict]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [{
+        "id": i, "title": f"Saturday run #{i}", "description": "Easy 5k along the river, all paces welcome. " * 4,
+        "location": "San Francisco, CA", "start_time": (start + timedelta(hours=i)).isoformat(),
+        "end_time": None, "sport_id": i % 50 + 1, "host_id": i % 997 + 1, "max_participants": 12,
+        "is_cancelled": False, "is_public": True, "image_url": None, "cover_image_url": None,
+        "created_at": start.isoformat(), "updated_at": None, "participant_count": i % 12,
+        "pending_requests_count": 0, "sport": {"id": i % 50 + 1, "name": "Running", "icon": "🏃"},
+        "host": {"id": i % 997 + 1, "full_name": "Alex Kim", "avatar_url": None},
+    } for i in range(n)]
+
+
+def _message_rows(n: int) -> List[dict]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [{
+        "id": i, "sender_id": 1 + i % 2, "receiver_id": 2 - i % 2, "event_id": None, "group_id": None,
+        "content": f"See you at the trailhead at {i % 12 + 1}?", "image_url": None, "is_read": i % 3 == 0,
+        "created_at": start + timedelta(minutes=i),
+        "sender": {"id": 1 + i % 2, "full_name": "Alex Kim", "avatar_url": None},
+        "receiver": {"id": 2 - i % 2, "full_name": "Sam Lee", "avatar_url": None}, "event": None,
+    } for i in range(n)]
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def run(label: str, model: type, rows: List[dict], repeat: int) -> None:
+    adapter = TypeAdapter(List[model])
+    models = [model(**row) for row in rows]
+    per_k = 1000 / len(rows)
+
+    def classic():
+        return json.dumps(adapter.dump_python(adapter.validate_python(models), mode="json"),
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def orjson_response():
+        return ORJSONResponse(adapter.dump_python(adapter.validate_python(models), mode="json")).body
+
+    pipelines = [
+        ("build models (handler)", lambda: [model(**row) for row in rows]),
+        ("response_model + JSONResponse", classic),
+        ("response_model + ORJSONResponse", orjson_response),
+        ("model_response (pre-validated)", lambda: dump_json(models)),
+    ]
+    assert json.loads(classic()) == json.loads(dump_json(models)), "serializers disagree"
+    print(f"\n{label}: {len(rows):,} items, {len(dump_json(models)) / 1024:.0f} KiB")
+    baseline = None
+    for name, fn in pipelines:
+        ms = _time(fn, repeat) * per_k
+        note = ""
+        if name.startswith("response_model + JSON"):
+            baseline = ms
+        elif baseline and not name.startswith("build"):
+            note = f"{baseline / ms:>6.1f}x"
+        print(f"  {name:<34} {ms:>8.2f} ms/1k {note}")
+
+
+def main(args) -> None:
+    print("⏱️  Serialization cost (ms per 1k items, lower is better)")
+    run("EventResponse (GET /events)", EventResponse, _event_rows(args.items), args.repeat)
+    run("MessageDetail (GET /messages/conversations/{id})", MessageDetail, _message_rows(args.items), args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure response serialization cost")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,533 @@
+"""
+Synthetic Dots dataset generator for benchmarks and load tests.
+
+Produces users, sport/goal links, events, RSVPs, buddies, posts, likes,
+group chats and messages with production-like skew:
+
+- activity is power-law distributed: a few users host most events, post,
+  like and message the most (Pareto weights drive every "who does it" pick)
+- users cluster in cities with Zipf-distributed sizes, and events, RSVPs,
+  buddies and groups stay mostly within a city
+- sport popularity is skewed too, so some sport filters are much hotter
+
+The same seed always produces the same rows; timestamps are relative to
+the current hour unless an `anchor` time is given. Rows are streamed to a sink in
+batches: FakeSinks load straight into the in-memory stand-in, PostgresSinks
+use COPY (or multi-row INSERTs) and advance the id sequences afterwards.
+
+Run with: PYTHONPATH=/path/to/backend python -m benchmarks.datagen --users 100000
+    [--seed 42] [--database-url postgresql://...] [--method copy|insert]
+Without --database-url the data is generated into a FakeSupabase (timing only).
+"""
+import argparse
+import bisect
+import csv
+import io
+import itertools
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_supabase import FakeSupabase
+from scripts.seed_supabase_sports_goals import GOALS, SPORTS
+from services.geo import encode_geohash
+from services.geocoder import geocode
+
+# City, relative population (roughly Zipf: a few metros hold most users)
+CITIES = [
+    ("New York, NY", 100), ("Los Angeles, CA", 60), ("Chicago, IL", 40), ("San Francisco, CA", 35),
+    ("Houston, TX", 30), ("Seattle, WA", 25), ("Austin, TX", 22), ("Boston, MA", 20),
+    ("Denver, CO", 18), ("Miami, FL", 16), ("Atlanta, GA", 15), ("Oakland, CA", 12),
+    ("Portland, OR", 11), ("San Diego, CA", 10), ("Phoenix, AZ", 9), ("Minneapolis, MN", 8),
+    ("Philadelphia, PA", 8), ("Nashville, TN", 6), ("Salt Lake City, UT", 5), ("Boulder, CO", 3),
+    ("Berkeley, CA", 3), ("Santa Cruz, CA", 2), ("Asheville, NC", 1), ("Bend, OR", 1),
+]
+FIRST_NAMES = [
+    "Alex", "Sam", "Jordan", "Taylor", "Casey", "Riley", "Morgan", "Jamie", "Avery", "Quinn",
+    "Maya", "Leo", "Nina", "Omar", "Priya", "Chen", "Sofia", "Diego", "Hana", "Kofi",
+    "Lucia", "Mateo", "Aisha", "Yuki", "Ingrid", "Tariq", "Elena", "Ravi", "Zoe", "Malik",
+]
+LAST_NAMES = [
+    "Smith", "Garcia", "Nguyen", "Patel", "Kim", "Johnson", "Lopez", "Brown", "Silva", "Okafor",
+    "Müller", "Rossi", "Cohen", "Tanaka", "Haddad", "Kowalski", "Andersen", "Reyes", "Ali", "Park",
+]
+BIOS = [
+    "Looking for workout partners", "Training for my first marathon", "Weekend warrior",
+    "New to the city, want to meet active people", "Early morning runner", "Gym rat and hiker",
+]
+
+
+@dataclass
+class DataProfile:
+    """Per-user rates and distribution shapes. Counts scale linearly with the number of users."""
+    events_per_user: float = 0.1
+    buddies_per_user: float = 1.0
+    posts_per_user: float = 0.5
+    likes_per_user: float = 2.0
+    groups_per_user: float = 0.01
+    messages_per_user: float = 3.0
+    # Pareto shape for user activity; lower = more skewed
+    activity_alpha: float = 1.2
+    # Share of RSVPs/buddies/messages that stay within the user's city
+    locality: float = 0.8
+    discoverable_share: float = 0.3
+    past_event_share: float = 0.35
+    max_rsvps_per_event: int = 60
+
+
+@dataclass
+class Dataset:
+    """Ids of the generated rows, for building benchmark requests."""
+    users: List[dict] = field(default_factory=list)
+    sport_ids: List[int] = field(default_factory=list)
+    goal_ids: List[int] = field(default_factory=list)
+    event_ids: List[int] = field(default_factory=list)
+    post_ids: List[int] = field(default_factory=list)
+    group_ids: List[int] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------------------
+# Sinks
+# ---------------------------------------------------------------------------
+
+class FakeSink:
+    """Loads rows into a FakeSupabase."""
+
+    def __init__(self, fake: FakeSupabase):
+        self.fake = fake
+
+    def next_id(self, table: str) -> int:
+        return self.fake.tables[table].next_id
+
+    def existing(self, table: str) -> List[dict]:
+        return self.fake.rows(table)
+
+    def write(self, table: str, columns: List[str], rows: Iterable[tuple]) -> int:
+        written = 0
+        for batch in _batches(rows, 50_000):
+            self.fake.load(table, [dict(zip(columns, row)) for row in batch])
+            written += len(batch)
+        return written
+
+    def finish(self) -> None:
+        pass
+
+
+class PostgresSink:
+    """
+    Writes to Postgres with COPY FROM STDIN (default) or multi-row INSERTs.
+    Ids are assigned by the generator, so serial sequences are advanced in finish().
+    """
+
+    SERIAL_TABLES = ("users", "sports", "goals", "events", "buddies", "posts", "likes", "group_chats", "messages")
+
+    def __init__(self, database_url: str, method: str = "copy", batch_size: int = 50_000):
+        import psycopg2
+        self.conn = psycopg2.connect(database_url.replace("postgresql+psycopg2://", "postgresql://"))
+        self.method = method
+        self.batch_size = batch_size
+
+    def next_id(self, table: str) -> int:
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM public.{table}")
+            return cur.fetchone()[0]
+
+    def existing(self, table: str) -> List[dict]:
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT id, name FROM public.{table}")
+            return [{"id": row[0], "name": row[1]} for row in cur.fetchall()]
+
+    def write(self, table: str, columns: List[str], rows: Iterable[tuple]) -> int:
+        from psycopg2.extras import execute_values
+        written = 0
+        column_list = ", ".join(columns)
+        with self.conn.cursor() as cur:
+            for batch in _batches(rows, self.batch_size):
+                if self.method == "copy":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    for row in batch:
+                        writer.writerow([_csv_value(v) for v in row])
+                    buffer.seek(0)
+                    cur.copy_expert(f"COPY public.{table} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+                else:
+                    execute_values(cur, f"INSERT INTO public.{table} ({column_list}) VALUES %s", batch, page_size=1000)
+                written += len(batch)
+        self.conn.commit()
+        return written
+
+    def finish(self) -> None:
+        with self.conn.cursor() as cur:
+            for table in self.SERIAL_TABLES:
+                cur.execute(
+                    f"SELECT setval(pg_get_serial_sequence('public.{table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM public.{table}))"
+                )
+        self.conn.commit()
+        self.conn.close()
+
+
+def _csv_value(value):
+    if value is None:
+        return None  # csv writes an empty unquoted field, which COPY reads as NULL
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    return value
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# Generator
+# ---------------------------------------------------------------------------
+
+class _WeightedPicker:
+    """O(log n) weighted sampling over a fixed population."""
+
+    def __init__(self, items: List[int], weights: List[float]):
+        self.items = items
+        self.cumulative = list(itertools.accumulate(weights))
+        self.total = self.cumulative[-1] if self.cumulative else 0.0
+
+    def pick(self, rng: random.Random) -> int:
+        return self.items[bisect.bisect(self.cumulative, rng.random() * self.total)]
+
+
+class Generator:
+    def __init__(
+        self,
+        sink,
+        users: int,
+        seed: int = 42,
+        profile: Optional[DataProfile] = None,
+        anchor: Optional[datetime] = None
+    ):
+        self.sink = sink
+        self.n_users = users
+        self.seed = seed
+        self.profile = profile or DataProfile()
+        self.rng = random.Random(seed)
+        # Separate stream so coordinates leave every other generated value unchanged
+        self.geo_rng = random.Random(seed + 1)
+        self.now = anchor or datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        self.data = Dataset()
+        self.counts: Dict[str, int] = {}
+
+    def run(self) -> Dataset:
+        self._reference_data()
+        self._users()
+        self._user_links()
+        self._events_and_rsvps()
+        self._buddies()
+        self._posts_and_likes()
+        self._groups()
+        self._messages()
+        self.sink.finish()
+        self.data.counts = self.counts
+        return self.data
+
+    # -- helpers ------------------------------------------------------------
+
+    def _write(self, table: str, columns: List[str], rows: Iterable[tuple]) -> None:
+        self.counts[table] = self.counts.get(table, 0) + self.sink.write(table, columns, rows)
+
+    def _ts(self, dt: datetime) -> str:
+        return dt.isoformat()
+
+    def _recent(self, max_days: int) -> datetime:
+        # Skewed towards now: most activity is recent
+        return self.now - timedelta(minutes=int((self.rng.random() ** 2) * max_days * 24 * 60))
+
+    def _point(self, city: int, spread_km: float) -> tuple:
+        """(latitude, longitude, geohash) scattered around the city centre"""
+        place = geocode(CITIES[city][0])
+        latitude = place.latitude + self.geo_rng.uniform(-spread_km, spread_km) / 111.32
+        longitude = place.longitude + self.geo_rng.uniform(-spread_km, spread_km) / (
+            111.32 * math.cos(math.radians(place.latitude)))
+        return round(latitude, 6), round(longitude, 6), encode_geohash(latitude, longitude)
+
+    def _user(self) -> int:
+        return self.activity.pick(self.rng)
+
+    def _user_near(self, city: int) -> int:
+        if self.rng.random() < self.profile.locality:
+            return self.city_pickers[city].pick(self.rng)
+        return self._user()
+
+    # -- tables ---------------------------------------------------------------
+
+    def _reference_data(self) -> None:
+        for table, defaults, target in (("sports", SPORTS, "sport_ids"), ("goals", GOALS, "goal_ids")):
+            existing = {row["name"]: row["id"] for row in self.sink.existing(table)}
+            missing = [d for d in defaults if d["name"] not in existing]
+            if missing:
+                start = self.sink.next_id(table)
+                columns = ["id", "name", "icon" if table == "sports" else "description", "created_at"]
+                rows = [
+                    (start + i, d["name"], d.get(columns[2]), self._ts(self.now))
+                    for i, d in enumerate(missing)
+                ]
+                self._write(table, columns, rows)
+                existing.update({row[1]: row[0] for row in rows})
+            setattr(self.data, target, sorted(existing.values()))
+        # Sport popularity: Zipf over a seeded shuffle of the sports
+        order = list(self.data.sport_ids)
+        self.rng.shuffle(order)
+        self.sport_picker = _WeightedPicker(order, [1 / (rank + 1) for rank in range(len(order))])
+
+    def _users(self) -> None:
+        p = self.profile
+        start = self.sink.next_id("users")
+        city_picker = _WeightedPicker(list(range(len(CITIES))), [w for _, w in CITIES])
+        self.user_ids = list(range(start, start + self.n_users))
+        self.user_city: Dict[int, int] = {}
+        weights = []
+        rows = []
+        for i, user_id in enumerate(self.user_ids):
+            city = city_picker.pick(self.rng)
+            self.user_city[user_id] = city
+            weights.append(self.rng.paretovariate(p.activity_alpha))
+            discoverable = self.rng.random() < p.discoverable_share
+            email = f"user{i}.s{self.seed}@bench.dots"
+            rows.append((
+                user_id, email,
+                f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                self.rng.randint(18, 65), self.rng.choice(BIOS), CITIES[city][0],
+                discoverable, discoverable or self.rng.random() < 0.7,
+                self._ts(self._recent(720)), *self._point(city, 15),
+            ))
+            self.data.users.append({"id": user_id, "email": email, "is_discoverable": discoverable})
+        self._write("users", [
+            "id", "email", "full_name", "age", "bio", "location",
+            "is_discoverable", "profile_completed", "created_at", "latitude", "longitude", "geohash",
+        ], rows)
+
+        self.activity = _WeightedPicker(self.user_ids, weights)
+        self.user_weight = dict(zip(self.user_ids, weights))
+        by_city: Dict[int, tuple] = {}
+        for user_id, weight in zip(self.user_ids, weights):
+            ids, ws = by_city.setdefault(self.user_city[user_id], ([], []))
+            ids.append(user_id)
+            ws.append(weight)
+        self.city_pickers = {city: _WeightedPicker(ids, ws) for city, (ids, ws) in by_city.items()}
+
+    def _user_links(self) -> None:
+        rng = self.rng
+
+        def sports():
+            for user_id in self.user_ids:
+                chosen = {self.sport_picker.pick(rng) for _ in range(rng.randint(1, 4))}
+                for sport_id in chosen:
+                    yield (user_id, sport_id)
+
+        def goals():
+            for user_id in self.user_ids:
+                for goal_id in rng.sample(self.data.goal_ids, rng.randint(1, min(3, len(self.data.goal_ids)))):
+                    yield (user_id, goal_id)
+
+        self._write("user_sports", ["user_id", "sport_id"], sports())
+        self._write("user_goals", ["user_id", "goal_id"], goals())
+
+    def _events_and_rsvps(self) -> None:
+        p, rng = self.profile, self.rng
+        start = self.sink.next_id("events")
+        n_events = max(1, int(self.n_users * p.events_per_user))
+        self.event_city: Dict[int, int] = {}
+        self.event_attendees: Dict[int, List[int]] = {}
+        events, rsvps = [], []
+        for event_id in range(start, start + n_events):
+            host = self._user()
+            city = self.user_city[host]
+            past = rng.random() < p.past_event_share
+            offset = -rng.randint(1, 90) if past else rng.randint(0, 60)
+            begins = self.now + timedelta(days=offset, hours=rng.randint(6, 20))
+            capacity = rng.choice([None, 8, 12, 20, 30, 50])
+            events.append((
+                event_id, f"{CITIES[city][0].split(',')[0]} meetup #{event_id}", "Synthetic event",
+                self.sport_picker.pick(rng), host, CITIES[city][0],
+                self._ts(begins), self._ts(begins + timedelta(hours=2)), capacity,
+                rng.random() < 0.02, rng.random() < 0.9, self._ts(begins - timedelta(days=rng.randint(1, 30))),
+                *self._point(city, 10),
+            ))
+            self.event_city[event_id] = city
+            self.data.event_ids.append(event_id)
+
+            # Popularity is heavy-tailed as well: most events get a handful of RSVPs
+            wanted = min(p.max_rsvps_per_event, int(rng.paretovariate(1.3) * 2))
+            attendees = {host}
+            rsvps.append((event_id, host, "approved", past, self._ts(begins - timedelta(days=30))))
+            approved = 0
+            for _ in range(wanted):
+                user_id = self._user_near(city)
+                if user_id in attendees:
+                    continue
+                attendees.add(user_id)
+                full = capacity is not None and approved >= capacity
+                status = "pending" if full else rng.choices(["approved", "pending", "rejected"], [75, 15, 10])[0]
+                approved += status == "approved"
+                rsvps.append((
+                    event_id, user_id, status, past and status == "approved" and rng.random() < 0.8,
+                    self._ts(begins - timedelta(days=rng.randint(0, 29))),
+                ))
+            self.event_attendees[event_id] = list(attendees)
+        self._write("events", [
+            "id", "title", "description", "sport_id", "host_id", "location", "start_time", "end_time",
+            "max_participants", "is_cancelled", "is_public", "created_at", "latitude", "longitude", "geohash",
+        ], events)
+        self._write("event_rsvps", ["event_id", "user_id", "status", "attended", "rsvp_at"], rsvps)
+
+    def _buddies(self) -> None:
+        p, rng = self.profile, self.rng
+        start = self.sink.next_id("buddies")
+        seen = set()
+        self.accepted_pairs: List[tuple] = []
+        rows = []
+        target = int(self.n_users * p.buddies_per_user)
+        attempts = 0
+        while len(rows) < target and attempts < target * 3:
+            attempts += 1
+            a = self._user()
+            b = self._user_near(self.user_city[a])
+            key = (min(a, b), max(a, b))
+            if a == b or key in seen:
+                continue
+            seen.add(key)
+            status = rng.choices(["accepted", "pending", "rejected"], [60, 30, 10])[0]
+            if status == "accepted":
+                self.accepted_pairs.append((a, b))
+            rows.append((start + len(rows), a, b, round(rng.uniform(20, 100), 1), status, self._ts(self._recent(365))))
+        self._write("buddies", ["id", "user1_id", "user2_id", "match_score", "status", "created_at"], rows)
+
+    def _posts_and_likes(self) -> None:
+        p, rng = self.profile, self.rng
+        start = self.sink.next_id("posts")
+        n_posts = max(1, int(self.n_users * p.posts_per_user))
+        authors = [self._user() for _ in range(n_posts)]
+        post_ids = list(range(start, start + n_posts))
+        self.data.post_ids = post_ids
+        self._write("posts", ["id", "user_id", "content", "created_at"], (
+            (post_id, author, f"Workout log #{post_id}", self._ts(self._recent(180)))
+            for post_id, author in zip(post_ids, authors)
+        ))
+
+        # Posts by active users attract more likes
+        popular = _WeightedPicker(post_ids, [self.user_weight[a] * rng.paretovariate(1.5) for a in authors])
+        like_start = self.sink.next_id("likes")
+        seen = set()
+
+        def likes():
+            for _ in range(int(self.n_users * p.likes_per_user)):
+                key = (popular.pick(rng), self._user())
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield (like_start + len(seen) - 1, key[0], key[1], self._ts(self._recent(90)))
+
+        self._write("likes", ["id", "post_id", "user_id", "created_at"], likes())
+
+    def _groups(self) -> None:
+        p, rng = self.profile, self.rng
+        start = self.sink.next_id("group_chats")
+        n_groups = max(1, int(self.n_users * p.groups_per_user))
+        self.group_members: Dict[int, List[int]] = {}
+        groups, members = [], []
+        for group_id in range(start, start + n_groups):
+            creator = self._user()
+            city = self.user_city[creator]
+            created = self._recent(365)
+            groups.append((
+                group_id, f"{CITIES[city][0].split(',')[0]} crew #{group_id}", "Synthetic group",
+                creator, self._ts(created),
+            ))
+            member_ids = {creator}
+            members.append((group_id, creator, True, self._ts(created)))
+            for _ in range(min(200, int(rng.paretovariate(1.2) * 5))):
+                user_id = self._user_near(city)
+                if user_id not in member_ids:
+                    member_ids.add(user_id)
+                    members.append((group_id, user_id, False, self._ts(created + (self.now - created) * rng.random())))
+            self.group_members[group_id] = list(member_ids)
+            self.data.group_ids.append(group_id)
+        self._write("group_chats", ["id", "name", "description", "created_by_id", "created_at"], groups)
+        self._write("group_members", ["group_id", "user_id", "is_admin", "joined_at"], members)
+
+    def _messages(self) -> None:
+        p, rng = self.profile, self.rng
+        start = self.sink.next_id("messages")
+        event_ids = list(self.event_attendees)
+        group_ids = list(self.group_members)
+
+        def messages():
+            for i in range(int(self.n_users * p.messages_per_user)):
+                sent = self._ts(self._recent(60))
+                kind = rng.random()
+                if kind < 0.8:
+                    if self.accepted_pairs and rng.random() < 0.7:
+                        sender, receiver = rng.choice(self.accepted_pairs)
+                        if rng.random() < 0.5:
+                            sender, receiver = receiver, sender
+                    else:
+                        sender = self._user()
+                        receiver = self._user_near(self.user_city[sender])
+                        if receiver == sender:
+                            continue
+                    yield (start + i, sender, receiver, None, None, f"Message {i}", rng.random() < 0.7, sent)
+                elif kind < 0.9:
+                    event_id = rng.choice(event_ids)
+                    sender = rng.choice(self.event_attendees[event_id])
+                    yield (start + i, sender, None, event_id, None, f"Message {i}", False, sent)
+                else:
+                    group_id = rng.choice(group_ids)
+                    sender = rng.choice(self.group_members[group_id])
+                    yield (start + i, sender, None, None, group_id, f"Message {i}", False, sent)
+
+        self._write("messages", [
+            "id", "sender_id", "receiver_id", "event_id", "group_id", "content", "is_read", "created_at",
+        ], messages())
+
+
+def generate(
+    target,
+    users: int = 1000,
+    seed: int = 42,
+    profile: Optional[DataProfile] = None,
+    anchor: Optional[datetime] = None
+) -> Dataset:
+    """Generate a dataset into a FakeSupabase or a sink (FakeSink/PostgresSink)."""
+    sink = FakeSink(target) if isinstance(target, FakeSupabase) else target
+    return Generator(sink, users=users, seed=seed, profile=profile, anchor=anchor).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Dots dataset")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Write to this Postgres database instead of an in-memory fake")
+    parser.add_argument("--method", choices=["copy", "insert"], default="copy")
+    args = parser.parse_args()
+
+    sink = PostgresSink(args.database_url, method=args.method) if args.database_url else FakeSink(FakeSupabase())
+    started = time.perf_counter()
+    dataset = generate(sink, users=args.users, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    total = sum(dataset.counts.values())
+    print(f"✅ Generated {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    for table, count in dataset.counts.items():
+        print(f"  {table}: {count:,}")
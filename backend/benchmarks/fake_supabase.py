@@ -0,0 +1,1195 @@
+"""
+In-memory stand-in for the supabase Client, for benchmarks and offline runs.
+
+Covers the query-builder surface the routers use:
+
+    client.table("events").select("*, sports(*)", count="exact")
+        .eq(...).neq(...).in_(...).gte(...).ilike(...).is_(...).or_(...)
+        .order(...).range(...).limit(...).single()/.maybe_single().execute()
+    client.table(...).insert/upsert/update/delete(...).eq(...).execute()
+    client.rpc("apply_rsvp", {...}).execute()      # and set_user_interests, event_map_clusters
+    client.auth.get_user(token)
+
+Tables mirror supabase_schema.sql: serial ids, column defaults, primary and
+unique keys, foreign keys (used for embedded selects such as
+"user_id, users(id, full_name)" and for ON DELETE CASCADE). Order columns
+must exist in the schema file, as they must against PostgREST. Equality
+filters are served from hash indexes built on first use, so large seeded
+datasets stay fast enough that measurements reflect the application code.
+
+Auth tokens are "fake-token:<email>" (see token_for()). Errors are raised
+as postgrest APIError with the Postgres error code, like the real client.
+
+    fake = FakeSupabase()
+    fake.load("users", [{"email": "a@example.com", "full_name": "A"}])
+    override_supabase(fake)        # core.database
+"""
+import copy
+import heapq
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from postgrest.exceptions import APIError
+
+TOKEN_PREFIX = "fake-token:"
+
+
+def token_for(email: str) -> str:
+    """Bearer token accepted by FakeSupabase.auth.get_user() for `email`."""
+    return f"{TOKEN_PREFIX}{email}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Schema
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ForeignKey:
+    column: str
+    target: str
+    name: str
+    cascade: bool = False
+
+
+@dataclass
+class TableSchema:
+    name: str
+    primary_key: Tuple[str, ...] = ("id",)
+    serial: bool = True
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    foreign_keys: Tuple[ForeignKey, ...] = ()
+    unique: Tuple[Tuple[str, ...], ...] = ()
+    # Generated (stored) columns: column -> fn(row)
+    generated: Dict[str, Callable[[dict], Any]] = field(default_factory=dict)
+
+
+def _fk(table: str, column: str, target: str, suffix: str, cascade: bool = True) -> ForeignKey:
+    return ForeignKey(column, target, f"fk_{table}_{suffix}", cascade)
+
+
+SCHEMA: Dict[str, TableSchema] = {s.name: s for s in [
+    TableSchema("users", defaults={
+        "role": "user", "is_active": True, "is_discoverable": False,
+        "profile_completed": False, "created_at": _now, "updated_at": None,
+        "latitude": None, "longitude": None, "geohash": None,
+    }, unique=(("email",),)),
+    TableSchema("sports", defaults={"created_at": _now}, unique=(("name",),)),
+    TableSchema("goals", defaults={"created_at": _now}, unique=(("name",),)),
+    TableSchema("waitlist_entries", defaults={"created_at": _now}, unique=(("email",),)),
+    TableSchema("buddy_suggestion_runs", defaults={
+        "started_at": _now, "finished_at": None, "is_full": False, "users_scored": None,
+    }),
+    TableSchema("user_photos", defaults={"display_order": 0, "created_at": _now}, foreign_keys=(
+        _fk("user_photos", "user_id", "users", "user"),
+    )),
+    TableSchema("subscriptions", defaults={
+        "tier": "free", "is_active": True, "started_at": _now, "expires_at": None,
+    }, foreign_keys=(
+        _fk("subscriptions", "user_id", "users", "user"),
+    ), unique=(("user_id",),)),
+    TableSchema("posts", defaults={"image_url": None, "created_at": _now, "updated_at": None}, foreign_keys=(
+        _fk("posts", "user_id", "users", "user"),
+    )),
+    TableSchema("buddies", defaults={
+        "match_score": None, "status": "pending", "created_at": _now, "updated_at": None,
+    }, foreign_keys=(
+        _fk("buddies", "user1_id", "users", "user1"),
+        _fk("buddies", "user2_id", "users", "user2"),
+    ), unique=(("low_id", "high_id"),), generated={
+        "low_id": lambda row: min(row["user1_id"], row["user2_id"]),
+        "high_id": lambda row: max(row["user1_id"], row["user2_id"]),
+    }),
+    TableSchema("group_chats", defaults={
+        "description": None, "avatar_url": None, "created_at": _now, "updated_at": None,
+    }, foreign_keys=(
+        _fk("group_chats", "created_by_id", "users", "created_by", cascade=False),
+    )),
+    TableSchema("events", defaults={
+        "description": None, "end_time": None, "max_participants": None, "is_cancelled": False,
+        "is_public": True, "image_url": None, "cover_image_url": None,
+        "created_at": _now, "updated_at": None, "latitude": None, "longitude": None, "geohash": None,
+    }, foreign_keys=(
+        _fk("events", "sport_id", "sports", "sport", cascade=False),
+        _fk("events", "host_id", "users", "host", cascade=False),
+    )),
+    TableSchema("user_sports", primary_key=("user_id", "sport_id"), serial=False, foreign_keys=(
+        _fk("user_sports", "user_id", "users", "user"),
+        _fk("user_sports", "sport_id", "sports", "sport"),
+    )),
+    TableSchema("user_goals", primary_key=("user_id", "goal_id"), serial=False, foreign_keys=(
+        _fk("user_goals", "user_id", "users", "user"),
+        _fk("user_goals", "goal_id", "goals", "goal"),
+    )),
+    TableSchema("event_rsvps", primary_key=("event_id", "user_id"), serial=False, defaults={
+        "attended": False, "status": "approved", "rsvp_at": _now,
+    }, foreign_keys=(
+        _fk("event_rsvps", "event_id", "events", "event"),
+        _fk("event_rsvps", "user_id", "users", "user"),
+    )),
+    TableSchema("buddy_suggestions", primary_key=("user_id", "candidate_id"), serial=False, defaults={
+        "computed_at": _now,
+    }, foreign_keys=(
+        _fk("buddy_suggestions", "user_id", "users", "user"),
+        _fk("buddy_suggestions", "candidate_id", "users", "candidate"),
+    )),
+    TableSchema("group_members", primary_key=("group_id", "user_id"), serial=False, defaults={
+        "is_admin": False, "joined_at": _now,
+    }, foreign_keys=(
+        _fk("group_members", "group_id", "group_chats", "group"),
+        _fk("group_members", "user_id", "users", "user"),
+    )),
+    TableSchema("likes", defaults={"created_at": _now}, foreign_keys=(
+        _fk("likes", "post_id", "posts", "post"),
+        _fk("likes", "user_id", "users", "user"),
+    ), unique=(("post_id", "user_id"),)),
+    TableSchema("messages", defaults={
+        "receiver_id": None, "event_id": None, "group_id": None, "image_url": None,
+        "is_read": False, "created_at": _now,
+    }, foreign_keys=(
+        _fk("messages", "sender_id", "users", "sender"),
+        _fk("messages", "receiver_id", "users", "receiver"),
+        _fk("messages", "event_id", "events", "event"),
+        _fk("messages", "group_id", "group_chats", "group"),
+    )),
+]}
+
+
+def _error(code: str, message: str, details: str = None) -> APIError:
+    return APIError({"code": code, "message": message, "details": details, "hint": None})
+
+
+SCHEMA_SQL_PATH = Path(__file__).parent.parent / "supabase_schema.sql"
+
+_CREATE_TABLE = re.compile(r"CREATE TABLE IF NOT EXISTS public\.(\w+) \((.*?)\n\);", re.S)
+_TABLE_CONSTRAINT = re.compile(r"(CONSTRAINT|PRIMARY KEY|UNIQUE|FOREIGN KEY|CHECK)\b")
+
+
+def _schema_columns(path: Path) -> Dict[str, frozenset]:
+    """table -> column names, from the CREATE TABLE statements of supabase_schema.sql"""
+    if not path.exists():
+        return {}
+    tables = {}
+    for match in _CREATE_TABLE.finditer(path.read_text(encoding="utf-8")):
+        lines = (line.strip() for line in match.group(2).splitlines())
+        tables[match.group(1)] = frozenset(
+            line.split()[0] for line in lines
+            if line and not line.startswith("--") and not _TABLE_CONSTRAINT.match(line)
+        )
+    return tables
+
+
+# Order columns are checked against these, so a query that real PostgREST
+# would reject (42703) fails here too
+_SCHEMA_COLUMNS = _schema_columns(SCHEMA_SQL_PATH)
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+class _Table:
+    """Rows keyed by primary key, plus lazily built hash indexes per column."""
+
+    def __init__(self, schema: TableSchema):
+        self.schema = schema
+        self.rows: Dict[tuple, dict] = {}
+        self.next_id = 1
+        self.indexes: Dict[str, Dict[Any, set]] = {}
+        self.unique_keys: Dict[Tuple[str, ...], Dict[tuple, tuple]] = {cols: {} for cols in schema.unique}
+        # Columns of the table in supabase_schema.sql (None = not checked)
+        self.columns: Optional[frozenset] = _SCHEMA_COLUMNS.get(schema.name)
+
+    def pk_of(self, row: dict) -> tuple:
+        return tuple(row.get(c) for c in self.schema.primary_key)
+
+    def index(self, column: str) -> Dict[Any, set]:
+        idx = self.indexes.get(column)
+        if idx is None:
+            idx = {}
+            for pk, row in self.rows.items():
+                idx.setdefault(_hashable(row.get(column)), set()).add(pk)
+            self.indexes[column] = idx
+        return idx
+
+    def prepare(self, values: dict) -> dict:
+        row = {}
+        for column, default in self.schema.defaults.items():
+            row[column] = default() if callable(default) else default
+        row.update(values)
+        if self.schema.serial and row.get("id") is None:
+            row["id"] = self.next_id
+        if self.schema.serial:
+            self.next_id = max(self.next_id, row["id"] + 1)
+        for column, fn in self.schema.generated.items():
+            row[column] = fn(row)
+        return row
+
+    def conflict(self, row: dict, ignore_pk: tuple = None) -> Optional[Tuple[Tuple[str, ...], tuple]]:
+        """The (columns, existing pk) of the first unique key `row` violates, if any."""
+        pk = self.pk_of(row)
+        if pk != ignore_pk and pk in self.rows:
+            return self.schema.primary_key, pk
+        for cols, keys in self.unique_keys.items():
+            key = tuple(row.get(c) for c in cols)
+            if None in key:
+                continue
+            existing = keys.get(key)
+            if existing is not None and existing != ignore_pk:
+                return cols, existing
+        return None
+
+    def find(self, columns: Tuple[str, ...], values: dict) -> Optional[tuple]:
+        """Primary key of the row whose `columns` equal those in `values` (the ON CONFLICT target)."""
+        key = tuple(values.get(c) for c in columns)
+        if None in key:
+            return None
+        if columns == self.schema.primary_key:
+            return key if key in self.rows else None
+        if columns in self.unique_keys:
+            return self.unique_keys[columns].get(key)
+        for pk in self.index(columns[0]).get(_hashable(key[0]), ()):
+            if tuple(self.rows[pk].get(c) for c in columns) == key:
+                return pk
+        return None
+
+    def add(self, row: dict) -> None:
+        pk = self.pk_of(row)
+        self.rows[pk] = row
+        for column, idx in self.indexes.items():
+            idx.setdefault(_hashable(row.get(column)), set()).add(pk)
+        for cols, keys in self.unique_keys.items():
+            key = tuple(row.get(c) for c in cols)
+            if None not in key:
+                keys[key] = pk
+
+    def remove(self, pk: tuple) -> dict:
+        row = self.rows.pop(pk)
+        for column, idx in self.indexes.items():
+            bucket = idx.get(_hashable(row.get(column)))
+            if bucket is not None:
+                bucket.discard(pk)
+        for cols, keys in self.unique_keys.items():
+            key = tuple(row.get(c) for c in cols)
+            if keys.get(key) == pk:
+                del keys[key]
+        return row
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Select parsing and filters
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Column:
+    name: str
+    alias: str
+
+
+@dataclass
+class _Embed:
+    table: str
+    alias: str
+    hint: Optional[str]
+    inner: bool
+    items: list
+    count_only: bool
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        current.append(ch)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def _parse_select(columns: str) -> list:
+    items = []
+    for part in _split_top_level(columns or "*"):
+        alias = None
+        head = part
+        if ":" in part.split("(", 1)[0]:
+            alias, head = part.split(":", 1)
+            alias = alias.strip()
+        if "(" in head:
+            name, inner = head.split("(", 1)
+            inner = inner.rsplit(")", 1)[0]
+            hint, is_inner = None, False
+            if "!" in name:
+                name, *modifiers = name.split("!")
+                for modifier in modifiers:
+                    if modifier == "inner":
+                        is_inner = True
+                    elif modifier != "left":
+                        hint = modifier
+            name = name.strip()
+            count_only = inner.strip() == "count"
+            items.append(_Embed(
+                table=name, alias=alias or name, hint=hint, inner=is_inner,
+                items=[] if count_only else _parse_select(inner), count_only=count_only,
+            ))
+        else:
+            name = head.split("::", 1)[0].strip()
+            items.append(_Column(name=name, alias=alias or name))
+    return items
+
+
+def _coerce(value: Any) -> Any:
+    """Values arriving as PostgREST text (or_ filters, is_) -> Python values."""
+    if not isinstance(value, str):
+        return value
+    lowered = value.lower()
+    if lowered == "null":
+        return None
+    if lowered == "true":
+        return True
+    if lowered == "false":
+        return False
+    if re.fullmatch(r"-?\d+", value):
+        return int(value)
+    if re.fullmatch(r"-?\d+\.\d+", value):
+        return float(value)
+    return value
+
+
+def _value_set(values) -> Any:
+    """in_() values as a set for O(1) membership (falls back to a list for unhashable values)."""
+    values = list(values)
+    try:
+        return frozenset(values)
+    except TypeError:
+        return values
+
+
+def _like_regex(pattern: str, case_insensitive: bool) -> "re.Pattern":
+    parts = []
+    for ch in pattern:
+        if ch in "%*":
+            parts.append(".*")
+        elif ch == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(ch))
+    return re.compile("^" + "".join(parts) + "$", re.IGNORECASE | re.DOTALL if case_insensitive else re.DOTALL)
+
+
+def _comparable(a: Any, b: Any) -> Tuple[Any, Any]:
+    if isinstance(a, str) and not isinstance(b, str) and b is not None:
+        return _coerce(a), b
+    if isinstance(b, str) and not isinstance(a, str) and a is not None:
+        return a, _coerce(b)
+    return a, b
+
+
+def _compare(op: str, actual: Any, expected: Any) -> bool:
+    if op == "is":
+        return actual is expected if expected in (None, True, False) else actual == expected
+    if op == "in":
+        return actual in expected
+    if actual is None:
+        return False
+    if op in ("like", "ilike"):
+        return bool(_like_regex(str(expected), op == "ilike").match(str(actual)))
+    if op in ("cs", "cd"):
+        actual_set, expected_set = set(actual or []), set(expected or [])
+        return expected_set <= actual_set if op == "cs" else actual_set <= expected_set
+    actual, expected = _comparable(actual, expected)
+    try:
+        if op == "eq":
+            return actual == expected
+        if op == "neq":
+            return actual != expected
+        if op == "gt":
+            return actual > expected
+        if op == "gte":
+            return actual >= expected
+        if op == "lt":
+            return actual < expected
+        if op == "lte":
+            return actual <= expected
+    except TypeError:
+        return False
+    raise _error("PGRST100", f"unsupported operator: {op}")
+
+
+@dataclass
+class _Condition:
+    column: str
+    op: str
+    value: Any
+    negate: bool = False
+
+    def matches(self, row: dict) -> bool:
+        result = _compare(self.op, row.get(self.column), self.value)
+        return not result if self.negate else result
+
+
+@dataclass
+class _AnyOf:
+    """or_() group: true if any member condition (or nested group) matches."""
+    conditions: list
+    negate: bool = False
+
+    def matches(self, row: dict) -> bool:
+        result = any(c.matches(row) for c in self.conditions)
+        return not result if self.negate else result
+
+
+@dataclass
+class _AllOf:
+    conditions: list
+    negate: bool = False
+
+    def matches(self, row: dict) -> bool:
+        result = all(c.matches(row) for c in self.conditions)
+        return not result if self.negate else result
+
+
+def _parse_logic(expression: str) -> list:
+    """Parse PostgREST logic tree syntax: "a.eq.1,and(b.gt.2,c.is.null),d.not.in.(1,2)"."""
+    conditions = []
+    for part in _split_top_level(expression):
+        negate = False
+        if part.startswith("not."):
+            negate, part = True, part[4:]
+        for keyword, group in (("and(", _AllOf), ("or(", _AnyOf)):
+            if part.startswith(keyword):
+                conditions.append(group(_parse_logic(part[len(keyword):-1]), negate=negate))
+                break
+        else:
+            column, rest = part.split(".", 1)
+            if rest.startswith("not."):
+                negate, rest = not negate, rest[4:]
+            op, raw = rest.split(".", 1)
+            if op == "in":
+                value = _value_set(_coerce(v.strip().strip('"')) for v in raw.strip("()").split(",") if v.strip())
+            else:
+                value = _coerce(raw) if op not in ("like", "ilike") else raw
+            conditions.append(_Condition(column, op, value, negate))
+    return conditions
+
+
+# ---------------------------------------------------------------------------
+# Query builder
+# ---------------------------------------------------------------------------
+
+class FakeResponse:
+    """Mirrors postgrest APIResponse: `.data` and `.count`."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self) -> str:
+        return f"FakeResponse(count={self.count}, data={self.data!r})"
+
+
+class _NotProxy:
+    """`query.not_.eq(...)` negates the next filter, like postgrest-py."""
+
+    def __init__(self, query: "FakeQuery"):
+        self._query = query
+
+    def __getattr__(self, name):
+        method = getattr(self._query, name)
+
+        def call(*args, **kwargs):
+            self._query._negate_next = True
+            return method(*args, **kwargs)
+        return call
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str):
+        if table not in client.tables:
+            raise _error("42P01", f'relation "public.{table}" does not exist')
+        self._client = client
+        self._table = table
+        self._operation = "select"
+        self._columns = "*"
+        self._payload: Any = None
+        self._count: Optional[str] = None
+        self._head = False
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+        self._conditions: list = []
+        self._order: List[Tuple[str, bool, Optional[bool]]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single = False
+        self._maybe_single = False
+        self._negate_next = False
+
+    # -- operations ---------------------------------------------------------
+
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None) -> "FakeQuery":
+        # After insert/update/delete this narrows the returned columns
+        self._columns = ",".join(columns) or "*"
+        self._count = count
+        self._head = bool(head)
+        return self
+
+    def insert(self, json: Any, count: Optional[str] = None, upsert: bool = False, **kwargs) -> "FakeQuery":
+        self._operation = "upsert" if upsert else "insert"
+        self._payload = json
+        self._count = count
+        return self
+
+    def upsert(
+        self,
+        json: Any,
+        count: Optional[str] = None,
+        on_conflict: str = "",
+        ignore_duplicates: bool = False,
+        **kwargs
+    ) -> "FakeQuery":
+        self._operation = "upsert"
+        self._payload = json
+        self._count = count
+        self._on_conflict = on_conflict or None
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json: dict, count: Optional[str] = None, **kwargs) -> "FakeQuery":
+        self._operation = "update"
+        self._payload = json
+        self._count = count
+        return self
+
+    def delete(self, count: Optional[str] = None, **kwargs) -> "FakeQuery":
+        self._operation = "delete"
+        self._count = count
+        return self
+
+    # -- filters ------------------------------------------------------------
+
+    def _add(self, column: str, op: str, value: Any) -> "FakeQuery":
+        if op == "in":
+            value = _value_set(value)
+        self._conditions.append(_Condition(column, op, value, self._negate_next))
+        self._negate_next = False
+        return self
+
+    @property
+    def not_(self) -> _NotProxy:
+        return _NotProxy(self)
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "FakeQuery":
+        return self._add(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "FakeQuery":
+        return self._add(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "is", _coerce(value) if isinstance(value, str) else value)
+
+    def in_(self, column: str, values) -> "FakeQuery":
+        return self._add(column, "in", [_coerce(v) if isinstance(v, str) else v for v in values])
+
+    def contains(self, column: str, value) -> "FakeQuery":
+        return self._add(column, "cs", value)
+
+    def contained_by(self, column: str, value) -> "FakeQuery":
+        return self._add(column, "cd", value)
+
+    def match(self, query: dict) -> "FakeQuery":
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def filter(self, column: str, operator: str, criteria: Any) -> "FakeQuery":
+        if operator.startswith("not."):
+            self._negate_next = not self._negate_next
+            operator = operator[4:]
+        if operator == "in" and isinstance(criteria, str):
+            criteria = [_coerce(v.strip()) for v in criteria.strip("()").split(",") if v.strip()]
+        elif operator == "is" or isinstance(criteria, str) and operator not in ("like", "ilike"):
+            criteria = _coerce(criteria)
+        return self._add(column, operator, criteria)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "FakeQuery":
+        self._conditions.append(_AnyOf(_parse_logic(filters), negate=self._negate_next))
+        self._negate_next = False
+        return self
+
+    # -- modifiers ----------------------------------------------------------
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None, **kwargs) -> "FakeQuery":
+        self._order.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, **kwargs) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    def offset(self, size: int) -> "FakeQuery":
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> "FakeQuery":
+        self._offset = start
+        self._limit = max(0, end - start + 1)
+        return self
+
+    def single(self) -> "FakeQuery":
+        self._single = True
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self._maybe_single = True
+        return self
+
+    # -- execution ----------------------------------------------------------
+
+    def execute(self) -> Optional[FakeResponse]:
+        self._client._simulate_latency()
+        with self._client.lock:
+            self._client.query_count += 1
+            table_columns = self._client.tables[self._table].columns
+            for column, _, _ in self._order:
+                if table_columns is not None and column not in table_columns:
+                    # PostgREST answers an unknown order column with 42703 like Postgres
+                    raise _error("42703", f"column {self._table}.{column} does not exist")
+            if self._operation == "select":
+                return self._execute_select()
+            if self._operation in ("insert", "upsert"):
+                return self._execute_insert()
+            if self._operation == "update":
+                return self._execute_update()
+            return self._execute_delete()
+
+    def _candidates(self) -> List[tuple]:
+        """Primary keys that may match, narrowed by the most selective indexed equality filter."""
+        table = self._client.tables[self._table]
+        best = None
+        for condition in self._conditions:
+            if not isinstance(condition, _Condition) or condition.negate or "." in condition.column:
+                continue
+            if condition.op == "eq":
+                keys = table.index(condition.column).get(_hashable(condition.value), ())
+            elif condition.op == "in":
+                idx = table.index(condition.column)
+                keys = set()
+                for value in condition.value:
+                    keys.update(idx.get(_hashable(value), ()))
+            else:
+                continue
+            if best is None or len(keys) < len(best):
+                best = keys
+        if best is None:
+            return list(table.rows.keys())
+        # Keep insertion (physical) order so unordered results look like a heap scan
+        if len(best) * 4 < len(table.rows):
+            return sorted(best, key=_pk_sort_key)
+        return [pk for pk in table.rows.keys() if pk in best]
+
+    def _matching(self) -> List[dict]:
+        table = self._client.tables[self._table]
+        rows = []
+        for pk in self._candidates():
+            row = table.rows.get(pk)
+            if row is not None and all(c.matches(row) for c in self._conditions):
+                rows.append(row)
+        return rows
+
+    @staticmethod
+    def _sort_key(column: str, desc: bool, nullsfirst: Optional[bool]) -> Callable[[dict], tuple]:
+        # Postgres default: NULLS LAST ascending, NULLS FIRST descending
+        nulls_first = desc if nullsfirst is None else nullsfirst
+        n = 1 if nulls_first == desc else 0
+        return lambda r: (n, 0) if r.get(column) is None else (1 - n, r.get(column))
+
+    def _sorted(self, rows: List[dict]) -> List[dict]:
+        if self._limit is not None and len(self._order) == 1:
+            # ORDER BY ... LIMIT on one column: partial sort, like a top-N heapsort
+            k = self._offset + self._limit
+            if len(rows) > 4 * k:
+                column, desc, nullsfirst = self._order[0]
+                pick = heapq.nlargest if desc else heapq.nsmallest
+                return pick(k, rows, key=self._sort_key(column, desc, nullsfirst))
+        return self._sorted_all(rows)
+
+    def _sorted_all(self, rows: List[dict]) -> List[dict]:
+        for column, desc, nullsfirst in reversed(self._order):
+            rows.sort(key=self._sort_key(column, desc, nullsfirst), reverse=desc)
+        return rows
+
+    def _execute_select(self) -> Optional[FakeResponse]:
+        items = _parse_select(self._columns)
+        rows = self._matching()
+        end = None if self._limit is None else self._offset + self._limit
+        inner_embeds = [i for i in items if isinstance(i, _Embed) and i.inner]
+        if not inner_embeds:
+            # Only the requested page needs sorting and projecting (and embedding)
+            total = len(rows)
+            rows = self._sorted(rows)
+            page = [] if self._head else [self._client._project(self._table, r, items) for r in rows[self._offset:end]]
+            return self._result(page, total)
+        projected = []
+        for row in self._sorted_all(rows):
+            out = self._client._project(self._table, row, items)
+            if any(out.get(e.alias) in (None, []) for e in inner_embeds):
+                continue
+            projected.append(out)
+        return self._result([] if self._head else projected[self._offset:end], len(projected))
+
+    def _result(self, rows: List[dict], total: Optional[int] = None) -> Optional[FakeResponse]:
+        count = (total if total is not None else len(rows)) if self._count else None
+        if self._single:
+            if len(rows) != 1:
+                raise _error(
+                    "PGRST116",
+                    "JSON object requested, multiple (or no) rows returned",
+                    f"The result contains {len(rows)} rows",
+                )
+            return FakeResponse(rows[0], count)
+        if self._maybe_single:
+            if not rows:
+                return None
+            if len(rows) > 1:
+                raise _error("PGRST116", "JSON object requested, multiple (or no) rows returned")
+            return FakeResponse(rows[0], count)
+        return FakeResponse(rows, count)
+
+    def _returning(self, rows: List[dict]) -> List[dict]:
+        items = _parse_select(self._columns)
+        return [self._client._project(self._table, row, items) for row in rows]
+
+    def _execute_insert(self) -> Optional[FakeResponse]:
+        table = self._client.tables[self._table]
+        payload = _json_roundtrip(self._payload)
+        records = payload if isinstance(payload, list) else [payload]
+        target = tuple(c.strip() for c in self._on_conflict.split(",")) if self._on_conflict else table.schema.primary_key
+        written = []
+        for values in records:
+            if self._operation == "upsert":
+                # The conflict target may include generated columns
+                probe = {**values, **{c: fn(values) for c, fn in table.schema.generated.items()}}
+                existing_pk = table.find(target, probe)
+                if existing_pk is not None:
+                    if self._ignore_duplicates:
+                        continue
+                    written.append(self._client._replace_row(table, existing_pk, values))
+                    continue
+            row = table.prepare(values)
+            self._client._check_foreign_keys(table, row)
+            conflict = table.conflict(row)
+            if conflict is not None:
+                raise _duplicate(self._table, conflict[0])
+            table.add(row)
+            written.append(row)
+        return self._result(self._returning(written))
+
+    def _execute_update(self) -> Optional[FakeResponse]:
+        table = self._client.tables[self._table]
+        values = _json_roundtrip(self._payload)
+        updated = []
+        for row in self._matching():
+            updated.append(self._client._replace_row(table, table.pk_of(row), values))
+        return self._result(self._returning(updated))
+
+    def _execute_delete(self) -> Optional[FakeResponse]:
+        table = self._client.tables[self._table]
+        deleted = []
+        for row in self._matching():
+            self._client._delete_row(self._table, table.pk_of(row))
+            deleted.append(row)
+        return self._result(self._returning(deleted))
+
+
+def _duplicate(table_name: str, columns: Tuple[str, ...]) -> APIError:
+    return _error(
+        "23505",
+        f'duplicate key value violates unique constraint "{table_name}_{"_".join(columns)}_key"',
+        f"Key ({', '.join(columns)}) already exists.",
+    )
+
+
+def _json_roundtrip(payload: Any) -> Any:
+    # The real client JSON-encodes payloads, so datetimes etc. must already be serializable
+    return json.loads(json.dumps(payload))
+
+
+def _pk_sort_key(pk: tuple) -> tuple:
+    return tuple((0, v) if isinstance(v, (int, float)) else (1, str(v)) for v in pk)
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class _FakeRPC:
+    def __init__(self, client: "FakeSupabase", fn: str, params: dict):
+        self._client = client
+        self._fn = fn
+        self._params = params or {}
+
+    def execute(self) -> FakeResponse:
+        function = self._client.functions.get(self._fn)
+        if function is None:
+            raise _error("PGRST202", f"Could not find the function public.{self._fn}")
+        self._client._simulate_latency()
+        with self._client.lock:
+            self._client.query_count += 1
+            return FakeResponse(copy.deepcopy(function(self._client, **self._params)))
+
+
+class _FakeAuth:
+    def __init__(self, client: "FakeSupabase"):
+        self._client = client
+
+    def get_user(self, jwt: Optional[str] = None):
+        if not jwt or not jwt.startswith(TOKEN_PREFIX):
+            raise ValueError("Invalid JWT")
+        email = jwt[len(TOKEN_PREFIX):]
+        return SimpleNamespace(user=SimpleNamespace(id=email, email=email))
+
+
+class FakeSupabase:
+    """
+    In-memory supabase Client. `latency_ms` adds a simulated network
+    round-trip to every query (outside the lock, so concurrent queries
+    overlap like they would against a real server).
+    """
+
+    def __init__(self, latency_ms: float = 0.0, schema: Optional[Dict[str, TableSchema]] = None):
+        self.latency_ms = latency_ms
+        self.tables: Dict[str, _Table] = {name: _Table(s) for name, s in (schema or SCHEMA).items()}
+        self.functions: Dict[str, Callable[..., Any]] = {
+            "apply_rsvp": apply_rsvp,
+            "set_user_interests": set_user_interests,
+            "event_map_clusters": event_map_clusters,
+            "approved_rsvp_counts": approved_rsvp_counts,
+        }
+        self.lock = threading.RLock()
+        self.query_count = 0
+        self.auth = _FakeAuth(self)
+        # Reverse foreign keys: target table -> [(child table, fk)]
+        self._referenced_by: Dict[str, List[Tuple[str, ForeignKey]]] = {}
+        for name, table in self.tables.items():
+            for fk in table.schema.foreign_keys:
+                self._referenced_by.setdefault(fk.target, []).append((name, fk))
+
+    # -- supabase.Client surface -------------------------------------------
+
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self, table_name)
+
+    def from_(self, table_name: str) -> FakeQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, *args, **kwargs) -> _FakeRPC:
+        return _FakeRPC(self, fn, params)
+
+    # -- seeding and inspection --------------------------------------------
+
+    def register_function(self, name: str, fn: Callable[..., Any]) -> None:
+        """fn(client, **params) runs under the client lock, i.e. as one transaction."""
+        self.functions[name] = fn
+
+    def load(self, table_name: str, rows: List[dict]) -> List[dict]:
+        """Bulk insert for seeding: applies defaults and unique keys, skips FK checks and JSON encoding."""
+        table = self.tables[table_name]
+        loaded = []
+        with self.lock:
+            for values in rows:
+                row = table.prepare(values)
+                if table.conflict(row) is not None:
+                    continue
+                table.add(row)
+                loaded.append(row)
+        return loaded
+
+    def rows(self, table_name: str) -> List[dict]:
+        with self.lock:
+            return [dict(r) for r in self.tables[table_name].rows.values()]
+
+    def get(self, table_name: str, *pk) -> Optional[dict]:
+        row = self._get(table_name, tuple(pk))
+        return dict(row) if row is not None else None
+
+    def count(self, table_name: str) -> int:
+        return len(self.tables[table_name].rows)
+
+    # -- internals ---------------------------------------------------------
+
+    def _simulate_latency(self) -> None:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    def _get(self, table_name: str, pk: tuple) -> Optional[dict]:
+        return self.tables[table_name].rows.get(pk)
+
+    def _check_foreign_keys(self, table: _Table, row: dict) -> None:
+        for fk in table.schema.foreign_keys:
+            value = row.get(fk.column)
+            if value is not None and (value,) not in self.tables[fk.target].rows:
+                raise _error(
+                    "23503",
+                    f'insert or update on table "{table.schema.name}" violates foreign key constraint "{fk.name}"',
+                    f"Key ({fk.column})=({value}) is not present in table \"{fk.target}\".",
+                )
+
+    def _replace_row(self, table: _Table, pk: tuple, values: dict) -> dict:
+        row = {**table.rows[pk], **values}
+        for column, fn in table.schema.generated.items():
+            row[column] = fn(row)
+        self._check_foreign_keys(table, row)
+        conflict = table.conflict(row, ignore_pk=pk)
+        if conflict is not None:
+            raise _duplicate(table.schema.name, conflict[0])
+        table.remove(pk)
+        table.add(row)
+        return row
+
+    def _delete_row(self, table_name: str, pk: tuple) -> None:
+        table = self.tables[table_name]
+        if pk not in table.rows:
+            return
+        if table.schema.primary_key == ("id",):
+            for child_name, fk in self._referenced_by.get(table_name, []):
+                child = self.tables[child_name]
+                child_pks = list(child.index(fk.column).get(pk[0], ()))
+                if not child_pks:
+                    continue
+                if not fk.cascade:
+                    raise _error(
+                        "23503",
+                        f'update or delete on table "{table_name}" violates foreign key constraint "{fk.name}"',
+                    )
+                for child_pk in child_pks:
+                    self._delete_row(child_name, child_pk)
+        table.remove(pk)
+
+    def _resolve_embed(self, table_name: str, embed: _Embed) -> Tuple[str, ForeignKey]:
+        """("one", fk on parent) for many-to-one, ("many", fk on child) for one-to-many."""
+        def hinted(fks):
+            if embed.hint is None:
+                return fks
+            return [fk for fk in fks if embed.hint in (fk.column, fk.name)]
+
+        parent = self.tables[table_name].schema
+        to_one = hinted([fk for fk in parent.foreign_keys if fk.target == embed.table])
+        to_many = hinted([
+            fk for fk in self.tables[embed.table].schema.foreign_keys if fk.target == table_name
+        ]) if embed.table in self.tables else []
+        candidates = [("one", fk) for fk in to_one] + [("many", fk) for fk in to_many]
+        if not candidates:
+            raise _error("PGRST200", f"Could not find a relationship between '{table_name}' and '{embed.table}'")
+        if len(candidates) > 1:
+            raise _error(
+                "PGRST201",
+                f"Could not embed because more than one relationship was found for '{table_name}' and '{embed.table}'",
+            )
+        return candidates[0]
+
+    def _project(self, table_name: str, row: dict, items: list) -> dict:
+        out: Dict[str, Any] = {}
+        for item in items:
+            if isinstance(item, _Column):
+                if item.name == "*":
+                    out.update(row)
+                else:
+                    out[item.alias] = row.get(item.name)
+                continue
+            kind, fk = self._resolve_embed(table_name, item)
+            if kind == "one":
+                value = row.get(fk.column)
+                target = self._get(item.table, (value,)) if value is not None else None
+                out[item.alias] = self._project(item.table, target, item.items) if target is not None else None
+            else:
+                child = self.tables[item.table]
+                pks = child.index(fk.column).get(row.get("id"), ())
+                if item.count_only:
+                    out[item.alias] = [{"count": len(pks)}]
+                else:
+                    children = [child.rows[pk] for pk in sorted(pks, key=_pk_sort_key)]
+                    out[item.alias] = [self._project(item.table, c, item.items) for c in children]
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Database functions
+# ---------------------------------------------------------------------------
+
+def apply_rsvp(client: FakeSupabase, p_event_id: int, p_user_id: int, p_action: str, p_actor_id: int = None) -> dict:
+    """Python port of public.apply_rsvp (supabase_schema.sql); runs under the client lock."""
+    event = client._get("events", (p_event_id,))
+    if event is None:
+        return {"ok": False, "error": "event_not_found"}
+    if p_action == "request":
+        if event.get("is_cancelled"):
+            return {"ok": False, "error": "event_cancelled"}
+        # Private events only take requests from the host's accepted buddies
+        host_id = event.get("host_id")
+        if event.get("is_public") is False and p_user_id != host_id:
+            buddies = client.tables["buddies"]
+            low, high = min(p_user_id, host_id), max(p_user_id, host_id)
+            if not any(
+                buddies.rows[pk].get("high_id") == high and buddies.rows[pk].get("status") == "accepted"
+                for pk in buddies.index("low_id").get(low, ())
+            ):
+                return {"ok": False, "error": "event_private"}
+    elif p_action == "approve":
+        if event.get("host_id") != p_actor_id:
+            return {"ok": False, "error": "not_host"}
+    else:
+        return {"ok": False, "error": "invalid_action"}
+
+    rsvps = client.tables["event_rsvps"]
+    current = rsvps.rows.get((p_event_id, p_user_id))
+    if p_action == "request" and current is not None:
+        return {"ok": False, "error": "already_rsvpd", "status": current.get("status")}
+    if p_action == "approve" and current is None:
+        return {"ok": False, "error": "rsvp_not_found"}
+
+    count = sum(
+        1 for pk in rsvps.index("event_id").get(p_event_id, ())
+        if rsvps.rows[pk].get("status") == "approved" and pk[1] != event.get("host_id")
+    )
+    if p_action == "approve" and current.get("status") == "approved":
+        return {"ok": True, "status": "approved", "participant_count": count}
+    if (event.get("max_participants") or 0) > 0 and count >= event["max_participants"]:
+        return {"ok": False, "error": "event_full", "participant_count": count}
+
+    if p_action == "request":
+        rsvps.add(rsvps.prepare({"event_id": p_event_id, "user_id": p_user_id, "status": "pending", "attended": False}))
+        return {"ok": True, "status": "pending", "participant_count": count}
+
+    rsvps.remove((p_event_id, p_user_id))
+    rsvps.add({**current, "status": "approved"})
+    return {"ok": True, "status": "approved", "participant_count": count + 1}
+
+
+def set_user_interests(client: FakeSupabase, p_user_id: int, p_sport_ids: Optional[List[int]] = None,
+                       p_goal_ids: Optional[List[int]] = None) -> dict:
+    """Python port of public.set_user_interests (supabase_schema.sql); runs under the client lock."""
+    plans = {}
+    for kind, table_name, column, ids in (
+        ("sports", "user_sports", "sport_id", p_sport_ids),
+        ("goals", "user_goals", "goal_id", p_goal_ids),
+    ):
+        if ids is None:
+            continue
+        table = client.tables[table_name]
+        wanted = {i for i in ids if i is not None}
+        current = {table.rows[pk][column] for pk in table.index("user_id").get(p_user_id, ())}
+        new_rows = [table.prepare({"user_id": p_user_id, column: i}) for i in sorted(wanted - current)]
+        # Check every insert before writing anything: the SQL function is all-or-nothing
+        for row in new_rows:
+            client._check_foreign_keys(table, row)
+        plans[kind] = (table, column, sorted(current - wanted), new_rows)
+
+    result = {"sports_added": [], "sports_removed": [], "goals_added": [], "goals_removed": []}
+    for kind, (table, column, removed, new_rows) in plans.items():
+        for value in removed:
+            table.remove((p_user_id, value))
+        for row in new_rows:
+            table.add(row)
+        result[f"{kind}_removed"] = removed
+        result[f"{kind}_added"] = [row[column] for row in new_rows]
+    return result
+
+
+def event_map_clusters(client: FakeSupabase, p_cells: List[str], p_sport_id: Optional[int] = None,
+                       p_start: Optional[str] = None, p_end: Optional[str] = None, p_sample: int = 3) -> list:
+    """Python port of public.event_map_clusters (supabase_schema.sql); runs under the client lock."""
+    def timestamp(value):
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+    start, end = timestamp(p_start), timestamp(p_end)
+    cells = set(p_cells)
+    lengths = sorted({len(cell) for cell in cells})
+    members: Dict[str, List[dict]] = {}
+    for event in client.tables["events"].rows.values():
+        geohash = event.get("geohash")
+        if not geohash or event.get("is_cancelled"):
+            continue
+        if p_sport_id is not None and event.get("sport_id") != p_sport_id:
+            continue
+        start_time = timestamp(event.get("start_time"))
+        if (start is not None and start_time < start) or (end is not None and start_time > end):
+            continue
+        for length in lengths:
+            if geohash[:length] in cells:
+                members.setdefault(geohash[:length], []).append(event)
+
+    now = datetime.now(timezone.utc)
+    clusters = []
+    for cell, events in members.items():
+        latitudes = [e["latitude"] for e in events]
+        longitudes = [e["longitude"] for e in events]
+        ranked = sorted(events, key=lambda e: (
+            timestamp(e["start_time"]) < now, abs((timestamp(e["start_time"]) - now).total_seconds())
+        ))
+        clusters.append({
+            "cell": cell,
+            "count": len(events),
+            "latitude": sum(latitudes) / len(latitudes),
+            "longitude": sum(longitudes) / len(longitudes),
+            "south": min(latitudes),
+            "west": min(longitudes),
+            "north": max(latitudes),
+            "east": max(longitudes),
+            "event_ids": [e["id"] for e in ranked[:p_sample]],
+        })
+    clusters.sort(key=lambda c: (-c["count"], c["cell"]))
+    return clusters
+
+
+def approved_rsvp_counts(client: FakeSupabase, p_user_ids: List[int]) -> list:
+    """Python port of public.approved_rsvp_counts (supabase_schema.sql); runs under the client lock."""
+    rsvps = client.tables["event_rsvps"]
+    by_user = rsvps.index("user_id")
+    counts = []
+    for user_id in dict.fromkeys(p_user_ids):
+        count = sum(1 for pk in by_user.get(user_id, ()) if rsvps.rows[pk].get("status") == "approved")
+        if count:
+            counts.append({"user_id": user_id, "count": count})
+    return counts
@@ -0,0 +1,373 @@
+"""
+Load-test harness: virtual users replay weighted journeys against the API
+and report throughput, p50/p95/p99 latency and error rate per step.
+
+Journeys (default weights):
+    browse_events (30)  GET /events -> GET /events/{id}
+    rsvp          (10)  GET /events?sport_id -> GET /events/{id} -> POST /events/{id}/rsvp
+    inbox         (20)  GET /messages/conversations -> GET /messages/conversations/{id} -> mark-read
+    chat          (10)  WS /messages/ws/{token}: connect, send messages, wait for the echo
+    feed          (20)  GET /posts (3 pages) -> POST /posts/{id}/like
+    buddies       (10)  GET /buddies/suggested -> GET /buddies
+
+By default a uvicorn server backed by FakeSupabase (seeded with
+benchmarks.datagen) runs in a background thread of this process. Load
+generation then shares the CPU with the server, so for capacity numbers
+start the server separately and point --url at it:
+
+    python -m benchmarks.loadtest --serve-only --users 10000 --port 8001
+    python -m benchmarks.loadtest --url http://127.0.0.1:8001 --users 10000 --concurrency 50 --duration 60
+
+Against a real deployment pass --tokens-file (one bearer token per line).
+With --url and no tokens file, tokens are derived from the same
+--users/--seed dataset the --serve-only server was started with.
+
+Run with: PYTHONPATH=/path/to/backend python -m benchmarks.loadtest
+    [--users 10000] [--concurrency 50] [--duration 30] [--ramp-up 5]
+    [--think-ms 200] [--journeys browse_events=3,chat=1] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+import websockets
+
+from benchmarks.bench_endpoints import percentile
+from benchmarks.datagen import generate
+from benchmarks.fake_supabase import FakeSupabase, token_for
+
+DEFAULT_WEIGHTS = {
+    "browse_events": 30,
+    "rsvp": 10,
+    "inbox": 20,
+    "chat": 10,
+    "feed": 20,
+    "buddies": 10,
+}
+
+
+@dataclass
+class StepStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class Recorder:
+    def __init__(self):
+        self.steps: Dict[str, StepStats] = defaultdict(StepStats)
+        self.journeys: Dict[str, int] = defaultdict(int)
+
+    def record(self, step: str, elapsed_ms: float, outcome: str, ok: bool) -> None:
+        stats = self.steps[step]
+        stats.latencies_ms.append(elapsed_ms)
+        stats.statuses[outcome] += 1
+        if not ok:
+            stats.errors += 1
+
+    def report(self, duration: float) -> dict:
+        steps = {}
+        for name, stats in sorted(self.steps.items()):
+            n = len(stats.latencies_ms)
+            steps[name] = {
+                "requests": n,
+                "rps": round(n / duration, 2),
+                "error_rate": round(stats.errors / n, 4) if n else 0.0,
+                "p50_ms": round(percentile(stats.latencies_ms, 50), 2),
+                "p95_ms": round(percentile(stats.latencies_ms, 95), 2),
+                "p99_ms": round(percentile(stats.latencies_ms, 99), 2),
+                "statuses": dict(stats.statuses),
+            }
+        total = sum(s["requests"] for s in steps.values())
+        errors = sum(self.steps[name].errors for name in steps)
+        return {
+            "duration_s": round(duration, 2),
+            "requests": total,
+            "rps": round(total / duration, 2) if duration else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "journeys": dict(self.journeys),
+            "steps": steps,
+        }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, ws_base: str, token: str, recorder: Recorder,
+                 rng: random.Random, think_ms: float):
+        self.client = client
+        self.ws_base = ws_base
+        self.token = token
+        self.recorder = recorder
+        self.rng = rng
+        self.think_ms = think_ms
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.user_id: Optional[int] = None
+
+    async def think(self) -> None:
+        if self.think_ms > 0:
+            await asyncio.sleep(self.rng.expovariate(1000 / self.think_ms))
+
+    async def step(self, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except Exception as e:
+            self.recorder.record(name, (time.perf_counter() - started) * 1000, type(e).__name__, ok=False)
+            return None
+        self.recorder.record(
+            name, (time.perf_counter() - started) * 1000, str(response.status_code), ok=response.status_code < 400
+        )
+        await self.think()
+        return response if response.status_code < 400 else None
+
+    async def identify(self) -> None:
+        response = await self.step("GET /users/me", "GET", "/users/me")
+        if response is not None:
+            self.user_id = response.json().get("id")
+
+
+def _json_list(response: Optional[httpx.Response]) -> list:
+    if response is None:
+        return []
+    data = response.json()
+    return data if isinstance(data, list) else []
+
+
+# ---------------------------------------------------------------------------
+# Journeys
+# ---------------------------------------------------------------------------
+
+async def browse_events(vu: VirtualUser) -> None:
+    events = _json_list(await vu.step("GET /events", "GET", "/events"))
+    if events:
+        event = vu.rng.choice(events[:50])
+        await vu.step("GET /events/{id}", "GET", f"/events/{event['id']}")
+
+
+async def rsvp(vu: VirtualUser) -> None:
+    events = _json_list(await vu.step("GET /events?sport_id", "GET", "/events",
+                                      params={"sport_id": vu.rng.randint(1, 20)}))
+    if not events:
+        return
+    event = vu.rng.choice(events[:50])
+    detail = await vu.step("GET /events/{id}", "GET", f"/events/{event['id']}")
+    if detail is not None and detail.json().get("rsvp_status") is None:
+        await vu.step("POST /events/{id}/rsvp", "POST", f"/events/{event['id']}/rsvp")
+
+
+async def inbox(vu: VirtualUser) -> None:
+    conversations = _json_list(await vu.step("GET /messages/conversations", "GET", "/messages/conversations"))
+    if not conversations:
+        return
+    conversation = vu.rng.choice(conversations[:10])
+    params = {"conversation_type": conversation.get("type", "user")}
+    await vu.step("GET /messages/conversations/{id}", "GET",
+                  f"/messages/conversations/{conversation['id']}", params=params)
+    await vu.step("POST /messages/conversations/{id}/mark-read", "POST",
+                  f"/messages/conversations/{conversation['id']}/mark-read", params=params)
+
+
+async def chat(vu: VirtualUser, messages: int = 3) -> None:
+    if vu.user_id is None:
+        return
+    started = time.perf_counter()
+    try:
+        connection = await websockets.connect(f"{vu.ws_base}/messages/ws/{quote(vu.token, safe='')}")
+    except Exception as e:
+        vu.recorder.record("WS connect", (time.perf_counter() - started) * 1000, type(e).__name__, ok=False)
+        return
+    vu.recorder.record("WS connect", (time.perf_counter() - started) * 1000, "open", ok=True)
+    try:
+        for i in range(messages):
+            started = time.perf_counter()
+            # Messages to self are echoed once, so the round-trip covers insert + fan-out
+            await connection.send(json.dumps({"type": "message", "content": f"load test {i}", "receiver_id": vu.user_id}))
+            try:
+                await asyncio.wait_for(connection.recv(), timeout=10)
+                vu.recorder.record("WS message round-trip", (time.perf_counter() - started) * 1000, "echo", ok=True)
+            except Exception as e:
+                vu.recorder.record("WS message round-trip", (time.perf_counter() - started) * 1000,
+                                   type(e).__name__, ok=False)
+                return
+            await vu.think()
+    finally:
+        await connection.close()
+
+
+async def feed(vu: VirtualUser) -> None:
+    posts = []
+    for page in range(3):
+        posts += _json_list(await vu.step("GET /posts", "GET", "/posts", params={"limit": 20, "offset": page * 20}))
+    if posts:
+        post = vu.rng.choice(posts)
+        await vu.step("POST /posts/{id}/like", "POST", f"/posts/{post['id']}/like")
+
+
+async def buddies(vu: VirtualUser) -> None:
+    await vu.step("GET /buddies/suggested", "GET", "/buddies/suggested")
+    await vu.step("GET /buddies", "GET", "/buddies")
+
+
+JOURNEYS: Dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+    "browse_events": browse_events,
+    "rsvp": rsvp,
+    "inbox": inbox,
+    "chat": chat,
+    "feed": feed,
+    "buddies": buddies,
+}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+async def run_load(base_url: str, tokens: List[str], weights: Dict[str, int], concurrency: int,
+                   duration: float, ramp_up: float, think_ms: float, seed: int) -> dict:
+    recorder = Recorder()
+    names = [n for n in weights if weights[n] > 0]
+    ws_base = base_url.replace("http://", "ws://").replace("https://", "wss://")
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    started = time.perf_counter()
+    deadline = started + ramp_up + duration
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def virtual_user(index: int) -> None:
+            rng = random.Random(seed * 7919 + index)
+            await asyncio.sleep(ramp_up * index / max(1, concurrency))
+            vu = VirtualUser(client, ws_base, tokens[index % len(tokens)], recorder, rng, think_ms)
+            await vu.identify()
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, [weights[n] for n in names])[0]
+                recorder.journeys[name] += 1
+                try:
+                    await JOURNEYS[name](vu)
+                except Exception as e:
+                    recorder.record(f"journey {name}", 0.0, type(e).__name__, ok=False)
+
+        await asyncio.gather(*(virtual_user(i) for i in range(concurrency)))
+    return recorder.report(time.perf_counter() - started)
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'step':<45} {'reqs':>7} {'req/s':>8} {'err %':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, s in report["steps"].items():
+        print(f"{name:<45} {s['requests']:>7} {s['rps']:>8.1f} {s['error_rate'] * 100:>7.2f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+    print(f"\n📊 {report['requests']:,} requests in {report['duration_s']}s: {report['rps']} req/s, "
+          f"{report['error_rate'] * 100:.2f}% errors")
+    print("   journeys: " + ", ".join(f"{k}={v}" for k, v in sorted(report["journeys"].items())))
+
+
+def parse_weights(spec: Optional[str]) -> Dict[str, int]:
+    if not spec:
+        return dict(DEFAULT_WEIGHTS)
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in JOURNEYS:
+            raise SystemExit(f"Unknown journey '{name}'. Known: {', '.join(JOURNEYS)}")
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int):
+    """Run main.app under uvicorn in a daemon thread; returns the uvicorn.Server."""
+    import uvicorn
+    from main import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.05)
+    return server
+
+
+def seeded_users(users: int, seed: int) -> tuple:
+    """Seed a FakeSupabase and pick load-test users (discoverable ones, so /buddies/suggested works)."""
+    fake = FakeSupabase()
+    data = generate(fake, users=users, seed=seed)
+    chosen = [u for u in data.users if u["is_discoverable"]] or data.users
+    return fake, [token_for(u["email"]) for u in chosen]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay weighted user journeys against the API")
+    parser.add_argument("--url", help="Target server; default starts an in-process server on a stand-in database")
+    parser.add_argument("--tokens-file", help="Bearer tokens, one per line (for real deployments)")
+    parser.add_argument("--serve-only", action="store_true", help="Only start the stand-in server and block")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--users", type=int, default=10000, help="Size of the seeded stand-in dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated round-trip per stand-in query")
+    parser.add_argument("--concurrency", type=int, default=50, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds at full concurrency")
+    parser.add_argument("--ramp-up", type=float, default=5.0)
+    parser.add_argument("--think-ms", type=float, default=200.0, help="Mean pause between steps")
+    parser.add_argument("--journeys", help="Weights, e.g. browse_events=3,chat=1")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("dots.queries").setLevel(logging.ERROR)
+    weights = parse_weights(args.journeys)
+
+    server = None
+    if args.url and args.tokens_file:
+        tokens = [t.strip() for t in Path(args.tokens_file).read_text().splitlines() if t.strip()]
+        base_url = args.url.rstrip("/")
+    else:
+        fake, tokens = seeded_users(args.users, args.seed)
+        print(f"🌱 Seeded stand-in dataset with {args.users:,} users (seed {args.seed})")
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            from core.database import override_supabase
+            fake.latency_ms = args.latency_ms
+            override_supabase(fake)
+            port = args.port or _free_port()
+            server = start_server(port)
+            base_url = f"http://127.0.0.1:{port}"
+            print(f"🚀 Stand-in server running at {base_url}")
+            if args.serve_only:
+                try:
+                    while True:
+                        time.sleep(3600)
+                except KeyboardInterrupt:
+                    return 0
+
+    print(f"🏃 {args.concurrency} virtual users for {args.duration}s (+{args.ramp_up}s ramp-up) against {base_url}")
+    report = asyncio.run(run_load(
+        base_url, tokens, weights, args.concurrency, args.duration, args.ramp_up, args.think_ms, args.seed
+    ))
+    if server is not None:
+        server.should_exit = True
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"💾 Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import asyncio
+import contextvars
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+from core.metrics import record_cache_lookup
+
+
+_MISSING = object()
+
+# Every cache instance, so benchmarks can start each run cold (see clear_all_caches)
+_instances: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class TTLCache:
+    """
+    Small process-local LRU cache with a per-entry TTL.
+    Thread-safe, so it can be shared by handlers and queries run in worker threads.
+    Each API worker has its own copy - keep TTLs short and invalidate on writes.
+    Named caches report hits/misses to /metrics.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if self.name:
+            record_cache_lookup(self.name, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Cached values for those keys that are present (missing/expired keys are left out)"""
+        found = {}
+        for key in keys:
+            value = self._lookup(key)
+            if self.name:
+                record_cache_lookup(self.name, value is not _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def _lookup(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SWRCache:
+    """
+    Async cache for computed responses with single-flight loading and
+    stale-while-revalidate.
+
+    - Fresh entries (younger than ttl) are returned as is.
+    - Stale entries (younger than stale_ttl) are returned immediately and one
+      background reload refreshes them.
+    - Concurrent misses for the same key await a single load.
+
+    invalidate() drops everything and discards loads that were already running,
+    so a write is never overwritten by a response computed before it.
+    Must be used from one event loop (one per API worker).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 10.0, stale_ttl: float = 60.0,
+                 name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+        _instances.add(self)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            now = time.monotonic()
+            if now < stale_until:
+                if self.name:
+                    record_cache_lookup(self.name, True)
+                self._data.move_to_end(key)
+                if now >= fresh_until and key not in self._inflight:
+                    # Revalidate outside the caller's context so the reload's
+                    # queries are not attributed to this request
+                    contextvars.Context().run(self._start_load, key, loader)
+                return value
+            del self._data[key]
+        if self.name:
+            record_cache_lookup(self.name, False)
+        future = self._inflight.get(key) or self._start_load(key, loader)
+        # A cancelled caller must not cancel the load other callers are awaiting
+        return await asyncio.shield(future)
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        future = asyncio.ensure_future(self._load(key, loader, self._generation))
+        future.add_done_callback(_consume_exception)
+        self._inflight[key] = future
+        return future
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        try:
+            value = await loader()
+            if generation == self._generation:
+                now = time.monotonic()
+                self._data[key] = (value, now + self.ttl, now + self.stale_ttl)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+            return value
+        finally:
+            if generation == self._generation:
+                self._inflight.pop(key, None)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._data.clear()
+        self._inflight.clear()
+
+    clear = invalidate
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Background reload failures are dropped (the stale value was served);
+    # awaited loads re-raise to their callers
+    if not future.cancelled():
+        future.exception()
+
+
+def clear_all_caches() -> None:
+    for cache in list(_instances):
+        cache.clear()
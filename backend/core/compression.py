@@ -0,0 +1,150 @@
+"""
+Response compression (brotli when available, else gzip) above a size threshold.
+
+Only textual content types are compressed, and responses that already carry a
+Content-Encoding pass through. Brotli needs the optional `brotli` package;
+without it clients that accept gzip still get gzip. Large single-chunk bodies
+are compressed off the event loop.
+"""
+import asyncio
+import gzip
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+# Compress bodies at least this big in a worker thread
+_THREAD_MINIMUM_SIZE = 256 * 1024
+
+
+def _accepted_encodings(header: str) -> List[str]:
+    accepted = []
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if name:
+            accepted.append(name.lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._stream = None
+
+    def compress_all(self, body: bytes) -> bytes:
+        if self.encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compress_chunk(self, body: bytes, last: bool) -> bytes:
+        if self._stream is None:
+            if self.encoding == "br":
+                self._stream = brotli.Compressor(quality=self.brotli_quality)
+            else:
+                self._stream = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        if self.encoding == "br":
+            out = self._stream.process(body)
+            return out + (self._stream.finish() if last else self._stream.flush())
+        out = self._stream.compress(body)
+        return out + self._stream.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingSend(self, encoding, send).run(scope, receive)
+
+
+class _CompressingSend:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.compressor = _Compressor(encoding, middleware.gzip_level, middleware.brotli_quality)
+        self.send = send
+        self.start: Optional[Message] = None
+        # None until the first body chunk decides; then "identity" or "compress"
+        self.mode: Optional[str] = None
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self)
+
+    def _eligible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers or self.start["status"] in (204, 304):
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.mode is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            if not self._eligible(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+                self.mode = "identity"
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.mode = "compress"
+            headers["Content-Encoding"] = self.compressor.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                body = await self._compress_all(body)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            await self.send(self.start)
+        elif self.mode == "identity":
+            await self.send(message)
+            return
+        await self.send({
+            "type": "http.response.body",
+            "body": self.compressor.compress_chunk(body, last=not more_body),
+            "more_body": more_body,
+        })
+
+    async def _compress_all(self, body: bytes) -> bytes:
+        if len(body) >= _THREAD_MINIMUM_SIZE:
+            return await asyncio.to_thread(self.compressor.compress_all, body)
+        return self.compressor.compress_all(body)
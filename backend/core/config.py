@@ -15,6 +15,15 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Lifetime of the signed match scores handed out with buddy suggestions
+    SCORE_TOKEN_EXPIRE_MINUTES: int = 60
+    # Suggestions stored per user by scripts/compute_buddy_suggestions.py
+    BUDDY_SUGGESTIONS_TOP_K: int = 50
+    
+    # Password hashing - bcrypt cost factor (each +1 doubles the work) and worker threads.
+    # Hashes with a different cost are upgraded transparently on the next login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
     
     # CORS - Allow localhost for dev and production domains
     CORS_ORIGINS: List[str] = [
@@ -29,6 +38,18 @@ class Settings(BaseSettings):
     # App
     DEBUG: bool = True
     
+    # Response compression - bodies at least this many bytes are gzip/brotli encoded
+    # (brotli only if the optional `brotli` package is installed)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    
+    # Query accounting - warn when the same query shape runs this many times in one request
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 5
+    # Send each response's query count as X-Query-Count (development only)
+    QUERY_LOG_HEADER: bool = False
+    
+    # /metrics requires "Authorization: Bearer <METRICS_TOKEN>"; empty disables the endpoint
+    METRICS_TOKEN: str = ""
+    
     class Config:
         env_file = [".env.local", ".env"]
         case_sensitive = True
@@ -0,0 +1,63 @@
+"""
+In-process change events for cache invalidation.
+
+Write paths publish a small event after the database change succeeds;
+process-local caches subscribe by event type and drop what the change
+affects. Handlers run synchronously in the publisher's thread, so they must
+be cheap (dict/cache operations). A failing handler is logged and does not
+affect the write or the other handlers. Events are per worker process - other
+workers rely on their caches' TTLs.
+
+    subscribe(UserProfileChanged, lambda e: summaries.delete(e.user_id))
+    publish(UserProfileChanged(user_id=1, fields=frozenset({"full_name"})))
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Type
+
+logger = logging.getLogger("dots.events")
+
+_subscribers: Dict[type, List[Callable]] = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class UserProfileChanged:
+    """Columns of a users row were written (profile edit, onboarding)."""
+    user_id: int
+    fields: FrozenSet[str] = frozenset()
+
+
+@dataclass(frozen=True)
+class UserInterestsChanged:
+    """A user's sports and/or goals changed. Only actual differences are listed."""
+    user_id: int
+    sports_added: FrozenSet[int] = frozenset()
+    sports_removed: FrozenSet[int] = frozenset()
+    goals_added: FrozenSet[int] = frozenset()
+    goals_removed: FrozenSet[int] = frozenset()
+
+
+def subscribe(event_type: Type, handler: Callable) -> Callable:
+    """Register handler(event) for events of event_type. Returns handler (usable as a decorator body)."""
+    with _lock:
+        _subscribers.setdefault(event_type, []).append(handler)
+    return handler
+
+
+def unsubscribe(event_type: Type, handler: Callable) -> None:
+    with _lock:
+        handlers = _subscribers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+
+def publish(event) -> None:
+    with _lock:
+        handlers = list(_subscribers.get(type(event), ()))
+    for handler in handlers:
+        try:
+            handler(event)
+        except Exception:
+            logger.exception(f"{type(event).__name__} handler {getattr(handler, '__name__', handler)} failed")
@@ -0,0 +1,53 @@
+"""
+Conditional GET helpers (weak ETags + 304 Not Modified).
+
+Handlers compute a version from a cheap probe query (updated_at columns and
+the rows a response depends on), turn it into an ETag with make_etag, and
+return not_modified() when the client already has that version - skipping
+the full fan-out of queries and the serialization of the body.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Cache-Control policies by resource type
+NO_CACHE_PRIVATE = "private, no-cache"  # per-viewer data: revalidate on every use
+NO_CACHE_PUBLIC = "public, no-cache"  # shared data that changes often
+SHORT_PUBLIC = "public, max-age=60, must-revalidate"  # shared data that rarely changes
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over the repr of the version parts (order matters)"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check using weak comparison (RFC 9110 13.1.2)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str, vary: Optional[str] = None) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if vary:
+        response.headers["Vary"] = vary
+
+
+def not_modified(etag: str, cache_control: str, vary: Optional[str] = None) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, cache_control, vary)
+    return response
@@ -0,0 +1,106 @@
+"""
+Process-local structures built from the database: the buddy candidate index,
+the upcoming event index and the recommendation attendee model.
+
+A LocalIndex builds its value on first use, in a worker thread when awaited
+so a cold worker does not block the event loop, and rebuilds it in a
+background thread once it is older than ttl while the old value keeps
+serving. Changes made in this process go through note(): they are applied
+to the current value, and the ones noted while a rebuild is loading are
+applied again to the new value before it is swapped in, so a rebuild that
+started before a write never loses it.
+
+    index = LocalIndex(load, ttl=60, apply=lambda value, change: ...)
+    value = await index.get(supabase)
+    index.note(change)
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LocalIndex(Generic[T]):
+    """
+    build(supabase) loads a fresh value; apply(value, change) applies a noted
+    change to a value (None before the first build). apply runs under the
+    index's lock, so it must be cheap and must not call back into the index.
+    """
+
+    def __init__(self, build: Callable[[Any], T], ttl: float, apply: Callable[[Optional[T], Any], None]):
+        self._build = build
+        self._apply = apply
+        self.ttl = ttl
+        self._value: Optional[T] = None
+        self._built_at = 0.0
+        # Changes noted while a rebuild is loading; None when no rebuild is running
+        self._changes: Optional[List[Any]] = None
+        self._lock = threading.Lock()
+        # Serializes cold builds, so concurrent first requests share one
+        self._build_lock = threading.Lock()
+
+    async def get(self, supabase) -> T:
+        """The current value; a cold build runs in a worker thread"""
+        if self._value is None:
+            return await asyncio.to_thread(self.get_blocking, supabase)
+        return self.get_blocking(supabase)
+
+    def get_blocking(self, supabase) -> T:
+        """get() for code already off the event loop (builds inline when cold)"""
+        with self._lock:
+            value, built_at = self._value, self._built_at
+        if value is None:
+            with self._build_lock:
+                value = self._value
+                if value is None:
+                    value = self.rebuild(supabase)
+        elif time.monotonic() - built_at > self.ttl:
+            self._start_background_rebuild(supabase)
+        return value
+
+    def rebuild(self, supabase) -> T:
+        """Load a fresh value and swap it in"""
+        with self._lock:
+            if self._changes is None:
+                self._changes = []
+        try:
+            value = self._build(supabase)
+        except Exception:
+            with self._lock:
+                self._changes = None
+            raise
+        with self._lock:
+            changes, self._changes = self._changes or [], None
+            for change in changes:
+                self._apply(value, change)
+            self._value, self._built_at = value, time.monotonic()
+        return value
+
+    def note(self, change) -> None:
+        """Apply a change made in this process, now and to a rebuild in progress"""
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append(change)
+            self._apply(self._value, change)
+
+    def reset(self) -> None:
+        """Drop the value; the next get() builds it again"""
+        with self._lock:
+            self._value = None
+
+    def _start_background_rebuild(self, supabase) -> None:
+        with self._lock:
+            if self._changes is not None:
+                return  # already running
+            self._changes = []
+        # A plain thread does not inherit the request's context, so its queries
+        # are not counted against the request (see core/query_log.py)
+        threading.Thread(target=self._rebuild_quietly, args=(supabase,), daemon=True).start()
+
+    def _rebuild_quietly(self, supabase) -> None:
+        try:
+            self.rebuild(supabase)
+        except Exception:
+            pass  # the expired value keeps serving; the next get() retries
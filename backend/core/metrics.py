@@ -0,0 +1,293 @@
+"""
+Minimal in-process metrics exposed in Prometheus text format at /metrics.
+
+Only counters, gauges and fixed-bucket histograms - enough for capacity
+planning without pulling in a client library. Updates are a dict lookup and
+an add under a lock, so they are cheap on the request path. Values are per
+worker process; Prometheus aggregates across workers/instances.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+# Latency buckets in seconds (HTTP requests and Supabase queries)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set_function(self, fn: Callable[[], float], *labelvalues: str) -> None:
+        """Compute the value at scrape time instead of on the hot path."""
+        with self._lock:
+            self._functions[labelvalues] = fn
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+            functions = list(self._functions.items())
+        for labels, fn in functions:
+            try:
+                items.append((labels, float(fn())))
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labelvalues)
+            if counts is None:
+                counts = self._counts[labelvalues] = [0] * (len(self.buckets) + 1)
+                self._sums[labelvalues] = 0.0
+            counts[index] += 1
+            self._sums[labelvalues] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v), self._sums[k]) for k, v in self._counts.items()]
+        lines = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            base = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format_value(total)}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+class RateWindow:
+    """Events per second over a sliding window, kept in one-second buckets."""
+
+    def __init__(self, window_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self._buckets: deque = deque()
+        self._lock = threading.Lock()
+
+    def mark(self, amount: int = 1) -> None:
+        now = int(time.monotonic())
+        with self._lock:
+            if self._buckets and self._buckets[-1][0] == now:
+                self._buckets[-1][1] += amount
+            else:
+                self._buckets.append([now, amount])
+            self._trim(now)
+
+    def rate(self) -> float:
+        now = int(time.monotonic())
+        with self._lock:
+            self._trim(now)
+            total = sum(count for _, count in self._buckets)
+        return total / self.window_seconds
+
+    def _trim(self, now: int) -> None:
+        while self._buckets and self._buckets[0][0] <= now - self.window_seconds:
+            self._buckets.popleft()
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+http_requests_total = Counter(
+    "dots_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "dots_http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "dots_http_requests_in_flight", "HTTP requests currently being handled"
+)
+supabase_query_duration_seconds = Histogram(
+    "dots_supabase_query_duration_seconds", "Supabase query latency by table", ("table",)
+)
+supabase_query_errors_total = Counter(
+    "dots_supabase_query_errors_total", "Failed Supabase queries by table", ("table",)
+)
+websocket_connections = Gauge(
+    "dots_websocket_connections", "Open messaging WebSocket connections"
+)
+websocket_messages_total = Counter(
+    "dots_websocket_messages_total", "WebSocket messages by direction", ("direction",)
+)
+websocket_messages_per_second = Gauge(
+    "dots_websocket_messages_per_second", "WebSocket messages per second over the last minute", ("direction",)
+)
+cache_requests_total = Counter(
+    "dots_cache_requests_total", "Cache lookups by cache and result", ("cache", "result")
+)
+cache_hit_ratio = Gauge(
+    "dots_cache_hit_ratio", "Cache hit ratio since process start", ("cache",)
+)
+
+_ws_rates: Dict[str, RateWindow] = {}
+_known_caches = set()
+
+
+def record_websocket_message(direction: str) -> None:
+    """direction is "received" (from clients) or "sent" (to clients)."""
+    websocket_messages_total.inc(direction)
+    window = _ws_rates.get(direction)
+    if window is None:
+        window = _ws_rates[direction] = RateWindow()
+        websocket_messages_per_second.set_function(window.rate, direction)
+    window.mark()
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    cache_requests_total.inc(cache, "hit" if hit else "miss")
+    if cache not in _known_caches:
+        _known_caches.add(cache)
+        cache_hit_ratio.set_function(lambda: _hit_ratio(cache), cache)
+
+
+def _hit_ratio(cache: str) -> float:
+    hits = cache_requests_total.value(cache, "hit")
+    total = hits + cache_requests_total.value(cache, "miss")
+    return hits / total if total else 0.0
+
+
+def record_query(record) -> None:
+    """core.query_log observer: Supabase latency by table."""
+    supabase_query_duration_seconds.observe(record.duration_ms / 1000, record.table)
+    if record.error:
+        supabase_query_errors_total.inc(record.table)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status and in-flight requests."""
+
+    def __init__(self, app, exclude_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        http_requests_in_flight.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            # Use the route template, not the raw path, to keep label cardinality bounded
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_request_duration_seconds.observe(time.perf_counter() - started, method, route_path)
+            http_requests_total.inc(method, route_path, str(status_code))
@@ -0,0 +1,235 @@
+"""
+Per-request Supabase query accounting.
+
+get_supabase() returns an InstrumentedClient that records every executed
+query (table, filter shape, duration, row count) into the QueryLog of the
+current request. QueryAccountingMiddleware opens a log per HTTP request,
+emits a summary and flags repeated same-shape queries (N+1 loops).
+
+Tests and benchmarks can assert on query counts directly:
+
+    with track_queries() as log:
+        ...
+    assert log.count("users") <= 2
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger("dots.queries")
+
+# Builder methods whose first argument is a column name worth keeping in the shape
+_COLUMN_METHODS = {
+    "eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is_", "in_",
+    "contains", "contained_by", "order", "match", "filter",
+}
+# Methods that carry the payload/operation, kept without arguments
+_OPERATION_METHODS = {"insert", "update", "upsert", "delete"}
+
+
+@dataclass
+class QueryRecord:
+    table: str
+    shape: str
+    duration_ms: float
+    rows: int
+    error: bool = False
+
+
+@dataclass
+class QueryLog:
+    """Queries executed within one request (or one track_queries() block)."""
+    label: str = ""
+    records: List[QueryRecord] = field(default_factory=list)
+    # Enclosing log (e.g. a benchmark's track_queries() around a request); receives the same records
+    parent: Optional["QueryLog"] = None
+
+    def add(self, record: QueryRecord) -> None:
+        self.records.append(record)
+        if self.parent is not None:
+            self.parent.add(record)
+
+    def count(self, table: Optional[str] = None) -> int:
+        if table is None:
+            return len(self.records)
+        return sum(1 for r in self.records if r.table == table)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(r.duration_ms for r in self.records)
+
+    @property
+    def total_rows(self) -> int:
+        return sum(r.rows for r in self.records)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Same-shape queries executed at least `threshold` times, most repeated first."""
+        counts = Counter(r.shape for r in self.records)
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+    def summary(self) -> str:
+        by_table = Counter(r.table for r in self.records)
+        tables = ", ".join(f"{t}={n}" for t, n in by_table.most_common())
+        return (
+            f"{self.label}: {self.count()} queries, {self.total_ms:.1f}ms, "
+            f"{self.total_rows} rows ({tables or 'none'})"
+        )
+
+
+_current_log: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+# Extra observers of every executed query (e.g. metrics); called with the QueryRecord
+_observers: List[Callable[[QueryRecord], None]] = []
+
+
+def add_query_observer(observer: Callable[[QueryRecord], None]) -> None:
+    _observers.append(observer)
+
+
+def current_query_log() -> Optional[QueryLog]:
+    return _current_log.get()
+
+
+@contextmanager
+def track_queries(label: str = ""):
+    """Collect the queries executed inside the block (including worker threads started from it)."""
+    log = QueryLog(label=label, parent=_current_log.get())
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+def _count_rows(data) -> int:
+    if isinstance(data, list):
+        return len(data)
+    return 0 if data is None else 1
+
+
+def _record(table: str, shape: str, started: float, response, error: bool) -> None:
+    record = QueryRecord(
+        table=table,
+        shape=shape,
+        duration_ms=(time.perf_counter() - started) * 1000,
+        rows=_count_rows(getattr(response, "data", None)),
+        error=error,
+    )
+    log = _current_log.get()
+    if log is not None:
+        log.add(record)
+    for observer in _observers:
+        try:
+            observer(record)
+        except Exception:
+            pass
+
+
+class _TrackedQuery:
+    """Proxy around a postgrest request builder that remembers the call chain."""
+
+    def __init__(self, builder, table: str, shape: Tuple[str, ...]):
+        self._builder = builder
+        self._table = table
+        self._shape = shape
+
+    def _extend(self, name: str, args) -> Tuple[str, ...]:
+        if name == "select":
+            return self._shape + (f"select({', '.join(a for a in args if isinstance(a, str))})",)
+        if name in _COLUMN_METHODS and args and isinstance(args[0], str):
+            return self._shape + (f"{name}({args[0]})",)
+        return self._shape + (name,)
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            # e.g. the `not_` property, which returns a builder
+            if hasattr(attr, "execute"):
+                return _TrackedQuery(attr, self._table, self._shape + (name,))
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _TrackedQuery(result, self._table, self._extend(name, args))
+            return result
+        return call
+
+    def execute(self):
+        shape = f"{self._table}." + ".".join(self._shape)
+        started = time.perf_counter()
+        try:
+            response = self._builder.execute()
+        except Exception:
+            _record(self._table, shape, started, None, error=True)
+            raise
+        _record(self._table, shape, started, response, error=False)
+        return response
+
+
+class InstrumentedClient:
+    """Wraps a supabase Client; table() and rpc() queries are recorded, everything else passes through."""
+
+    def __init__(self, client):
+        self._client = client
+
+    @property
+    def wrapped(self):
+        return self._client
+
+    def table(self, table_name: str) -> _TrackedQuery:
+        return _TrackedQuery(self._client.table(table_name), table_name, ())
+
+    def from_(self, table_name: str) -> _TrackedQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, *args, **kwargs) -> _TrackedQuery:
+        return _TrackedQuery(self._client.rpc(fn, params or {}, *args, **kwargs), f"rpc:{fn}", ())
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class QueryAccountingMiddleware:
+    """
+    ASGI middleware: one QueryLog per HTTP request. Logs a summary, warns
+    about repeated same-shape queries and optionally exposes the count in an
+    X-Query-Count response header.
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int = 5, expose_header: bool = False):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.expose_header = expose_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog(label=f"{scope.get('method')} {scope.get('path')}", parent=_current_log.get())
+        token = _current_log.set(log)
+
+        async def send_wrapper(message):
+            if self.expose_header and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(log.count()).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_log.reset(token)
+            self._report(log)
+
+    def _report(self, log: QueryLog) -> None:
+        if not log.records:
+            return
+        logger.info(log.summary())
+        for shape, n in log.repeated(self.n_plus_one_threshold):
+            logger.warning(f"{log.label}: possible N+1 - {n}x {shape}")
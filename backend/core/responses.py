@@ -0,0 +1,109 @@
+"""
+JSON response helpers.
+
+ORJSONResponse is the app's default response class (for routes without a
+response_model). Handlers that already build validated Pydantic models can
+return model_response(...) instead of the models: the body is serialized once
+by pydantic-core and FastAPI skips its second validation/serialization pass.
+Headers for such responses must be passed to model_response - headers set on
+an injected `response: Response` are not copied onto a returned Response.
+List endpoints accept an opt-in sparse fieldset (see sparse_fieldset).
+"""
+from functools import lru_cache
+from typing import Any, Callable, FrozenSet, List, Mapping, Optional
+
+import orjson
+from fastapi import HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (UTC datetimes as 'Z', like pydantic)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def dump_json(content: Any, fields: Optional[FrozenSet[str]] = None) -> bytes:
+    """
+    Serialize already-validated content without validating it again.
+    A model or a list of one model type is dumped by pydantic-core (same output
+    as FastAPI's response_model path); anything else goes through orjson.
+    fields limits each model (or dict) to those top-level keys.
+    """
+    if isinstance(content, BaseModel):
+        return content.model_dump_json(include=fields).encode("utf-8")
+    if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        model = type(content[0])
+        if all(type(item) is model for item in content):
+            include = {"__all__": set(fields)} if fields is not None else None
+            return _list_adapter(model).dump_json(content, include=include)
+    if fields is not None:
+        content = _select_fields(content, fields)
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+def _select_fields(content: Any, fields: FrozenSet[str]) -> Any:
+    if isinstance(content, BaseModel):
+        return content.model_dump(mode="json", include=fields)
+    if isinstance(content, dict):
+        return {k: v for k, v in content.items() if k in fields}
+    if isinstance(content, list):
+        return [_select_fields(item, fields) for item in content]
+    return content
+
+
+def json_response(body: bytes, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Response for a body that is already JSON (e.g. from dump_json or a cache)"""
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def model_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+    fields: Optional[FrozenSet[str]] = None
+) -> Response:
+    return json_response(dump_json(content, fields), status_code=status_code, headers=headers)
+
+
+def sparse_fieldset(model: type) -> Callable[..., Optional[FrozenSet[str]]]:
+    """
+    Dependency for an opt-in `fields=id,title,...` query parameter limiting the
+    top-level fields of `model` in the response. Returns None when absent;
+    unknown field names are a 400.
+    """
+    allowed = frozenset(model.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated subset of: {', '.join(model.model_fields)}"
+        )
+    ) -> Optional[FrozenSet[str]]:
+        if not fields:
+            return None
+        requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+        unknown = requested - allowed
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return requested
+
+    return dependency
@@ -1,27 +1,59 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from core.config import settings
 
+# bcrypt is CPU-bound (~250ms at cost 12) but releases the GIL, so async handlers
+# run it here instead of on the event loop. The pool size caps concurrent hashing.
+_password_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
+def _password_bytes(password: str) -> bytes:
+    # Truncate password to 72 bytes (bcrypt limit)
+    return password.encode('utf-8')[:72]
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a bcrypt hash"""
     try:
         return bcrypt.checkpw(
-            plain_password.encode('utf-8'),
+            _password_bytes(plain_password),
             hashed_password.encode('utf-8')
         )
     except Exception:
         return False
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     """Hash a password using bcrypt"""
-    # Truncate password to 72 bytes (bcrypt limit)
-    password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(_password_bytes(password), salt)
     return hashed.decode('utf-8')
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different cost than BCRYPT_ROUNDS ("$2b$<cost>$...")"""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (AttributeError, IndexError, ValueError):
+        return False
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password worker pool, for use in async handlers"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_pool, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the password worker pool, for use in async handlers"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_pool, get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -39,3 +71,31 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+def _score_signature(viewer_id: int, candidate_id: int, score: str, expires: str) -> str:
+    # Own prefix so a score signature can never be mistaken for another signed value
+    message = f"buddy-score|{viewer_id}|{candidate_id}|{score}|{expires}".encode("utf-8")
+    digest = hmac.new(settings.SECRET_KEY.encode("utf-8"), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+def create_score_token(viewer_id: int, candidate_id: int, score: float, expires_minutes: Optional[int] = None) -> str:
+    """
+    Signed "<score>.<expires>.<signature>" vouching that score was computed for
+    this viewer/candidate pair, so a buddy request can reuse it unrecomputed.
+    """
+    minutes = settings.SCORE_TOKEN_EXPIRE_MINUTES if expires_minutes is None else expires_minutes
+    score_text = repr(float(score))
+    expires = str(int(time.time()) + minutes * 60)
+    return f"{score_text}.{expires}.{_score_signature(viewer_id, candidate_id, score_text, expires)}"
+
+def verify_score_token(token: str, viewer_id: int, candidate_id: int) -> Optional[float]:
+    """The score in a valid, unexpired token for this pair, else None"""
+    try:
+        score_text, expires, signature = token.rsplit(".", 2)
+        if int(expires) < time.time():
+            return None
+        expected = _score_signature(viewer_id, candidate_id, score_text, expires)
+        if not hmac.compare_digest(signature, expected):
+            return None
+        return float(score_text)
+    except (AttributeError, ValueError):
+        return None
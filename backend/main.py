@@ -1,7 +1,15 @@
-from fastapi import FastAPI
+import hmac
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.datastructures import Default
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
 from core.database import get_supabase
+from core.query_log import QueryAccountingMiddleware, add_query_observer
+from core.metrics import MetricsMiddleware, record_query, render_metrics
+from core.responses import ORJSONResponse
+from core.compression import CompressionMiddleware
 from api.auth import router as auth_router
 from api.users import router as users_router
 from api.events import router as events_router
@@ -13,7 +21,9 @@ from api.goals import router as goals_router
 from api.waitlist import router as waitlist_router
 from api.posts import router as posts_router
 
-app = FastAPI(title="Dots API", version="1.0.0")
+# orjson for routes without a response_model. Wrapped in Default() so routes with
+# a response_model keep FastAPI's own serialization (pydantic-core on newer versions).
+app = FastAPI(title="Dots API", version="1.0.0", default_response_class=Default(ORJSONResponse))
 
 # Test Supabase connection on startup
 @app.on_event("startup")
@@ -35,8 +45,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # cursor pagination (GET /buddies)
 )
 
+# gzip/brotli for JSON and text bodies above the threshold
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# Per-request Supabase query accounting and N+1 detection
+app.add_middleware(
+    QueryAccountingMiddleware,
+    n_plus_one_threshold=settings.QUERY_N_PLUS_ONE_THRESHOLD,
+    expose_header=settings.QUERY_LOG_HEADER,
+)
+
+# Per-route latency, status and in-flight metrics (served at /metrics)
+app.add_middleware(MetricsMiddleware)
+add_query_observer(record_query)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(users_router)
@@ -57,3 +82,16 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus text-format metrics for this worker (scrape with METRICS_TOKEN as bearer token)"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -10,5 +10,6 @@ from models.subscription import Subscription
 from models.group_chat import GroupChat
 from models.post import Post, Like
 from models.user_photo import UserPhoto
+from models.buddy_suggestion import BuddySuggestion, BuddySuggestionRun
 
-__all__ = ["Base", "User", "Event", "Message", "Buddy", "Sport", "Goal", "Subscription", "GroupChat", "WaitlistEntry", "Post", "Like", "UserPhoto"]
+__all__ = ["Base", "User", "Event", "Message", "Buddy", "Sport", "Goal", "Subscription", "GroupChat", "WaitlistEntry", "Post", "Like", "UserPhoto", "BuddySuggestion", "BuddySuggestionRun"]
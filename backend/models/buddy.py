@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Computed, Index, Integer, Float, DateTime, ForeignKey, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -21,7 +21,12 @@ class Buddy(Base):
     status = Column(SQLEnum(BuddyStatus), default=BuddyStatus.PENDING)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Canonical pair key (unique together): one relationship per pair of users
+    low_id = Column(Integer, Computed("LEAST(user1_id, user2_id)", persisted=True))
+    high_id = Column(Integer, Computed("GREATEST(user1_id, user2_id)", persisted=True))
 
     # Relationships
     user1 = relationship("User", foreign_keys=[user1_id], back_populates="sent_buddies")
     user2 = relationship("User", foreign_keys=[user2_id], back_populates="received_buddies")
+
+    __table_args__ = (Index("uq_buddies_pair", "low_id", "high_id", unique=True),)
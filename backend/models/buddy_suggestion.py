@@ -0,0 +1,25 @@
+from sqlalchemy import Boolean, Column, Float, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class BuddySuggestion(Base):
+    """Precomputed top-K suggestion (see scripts/compute_buddy_suggestions.py)"""
+    __tablename__ = "buddy_suggestions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("idx_buddy_suggestions_user_score", "user_id", score.desc()),)
+
+
+class BuddySuggestionRun(Base):
+    __tablename__ = "buddy_suggestion_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    is_full = Column(Boolean, nullable=False, default=False)
+    users_scored = Column(Integer, nullable=True)
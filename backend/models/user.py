@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Float, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -21,6 +21,10 @@ class User(Base):
     age = Column(Integer, nullable=True)
     bio = Column(Text, nullable=True)
     location = Column(String, nullable=True)
+    # Geocoded from location (services/geocoder.py); geohash backs radius queries
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True)
     avatar_url = Column(String, nullable=True)
     cover_image_url = Column(String, nullable=True)
     role = Column(SQLEnum(UserRole), default=UserRole.USER)
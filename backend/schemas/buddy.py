@@ -23,6 +23,8 @@ class BuddyDetail(BuddyResponse):
 
 class BuddyRequest(BaseModel):
     user2_id: int
+    # score_token from GET /buddies/suggested; lets the request reuse the shown score
+    score_token: Optional[str] = None
 
 
 class BuddyUpdate(BaseModel):
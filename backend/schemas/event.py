@@ -55,3 +55,35 @@ class EventDetail(EventResponse):
     participants: List[dict] = []
     rsvp_status: Optional[str] = None  # Current user's status: pending, approved, rejected (when authenticated)
 
+
+
+class EventRecommendation(EventResponse):
+    score: float  # 0-100
+    buddies_attending: int = 0
+    distance_km: Optional[float] = None  # When both the viewer and the event are geocoded
+
+
+class EventMapMarker(BaseModel):
+    id: int
+    title: str
+    location: Optional[str] = None
+    start_time: datetime
+    latitude: float
+    longitude: float
+    sport: Optional[dict] = None  # Sport info (id, name, icon)
+
+
+class EventMapCluster(BaseModel):
+    cell: str  # Geohash cell the events fall in
+    count: int
+    latitude: float  # Mean position of the events
+    longitude: float
+    bounds: List[float]  # [south, west, north, east] of the events, to zoom into the cluster
+    events: List[EventMapMarker] = []  # Representative events, upcoming soonest first
+
+
+class EventMap(BaseModel):
+    zoom: int
+    precision: int  # Geohash length of the cluster cells
+    total: int
+    clusters: List[EventMapCluster] = []
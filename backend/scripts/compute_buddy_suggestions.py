@@ -0,0 +1,34 @@
+"""
+Batch job that precomputes buddy suggestions (see services/suggestions.py).
+Scores every discoverable user against every candidate across a process pool
+and stores each user's top-K in buddy_suggestions, which /buddies/suggested
+reads. After the first run only users whose profile or activity changed since
+the previous run are rescored; pass --full to rescore everyone.
+
+Run with: PYTHONPATH=/path/to/backend python scripts/compute_buddy_suggestions.py [--full] [--top-k 50] [--workers 8]
+Schedule it (e.g. cron) every few minutes; runs must not overlap.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import get_supabase
+from services.suggestions import compute_suggestions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute buddy suggestions")
+    parser.add_argument("--full", action="store_true", help="rescore every user instead of only changed ones")
+    parser.add_argument("--top-k", type=int, default=None, help="suggestions stored per user")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: CPU count)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = compute_suggestions(get_supabase(), full=args.full, top_k=args.top_k, workers=args.workers)
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(summary))
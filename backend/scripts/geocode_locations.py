@@ -0,0 +1,89 @@
+"""
+Backfill latitude/longitude/geohash for users and events that have a location
+but no coordinates yet, with the offline gazetteer (services/geocoder.py).
+Rows sharing a location string are updated together, so the number of
+updates is the number of distinct places, not rows. Safe to rerun; locations
+the gazetteer does not know as a city (unknown, or only a region) are left
+empty and reported.
+
+Run with: PYTHONPATH=/path/to/backend python scripts/geocode_locations.py
+With --all, every row is geocoded again (after gazetteer or matching changes;
+rows whose location is no longer known lose their coordinates). With --check,
+only verifies the gazetteer against KNOWN_LOCATIONS (no database).
+"""
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import fetch_all, get_supabase
+from services.geocoder import geocode, geocode_point, location_columns
+
+
+# location -> label it must geocode to (None = not geocoded)
+KNOWN_LOCATIONS = {
+    "Portland, OR": "Portland, OR",
+    "Portland, ME": "Portland, ME",
+    "Denver in May": "Denver, CO",
+    "Seattle, WA, USA": "Seattle, WA",
+    "Golden Gate Park, San Francisco": "San Francisco, CA",
+    "Toronto, Canada": "Toronto, ON",
+    "Paris": "Paris, FR",
+    "Texas": "Texas, TX",
+    # A city followed by a different region is not that city
+    "Paris, TX": "Texas, TX",
+    "Richmond, CA": "California, CA",
+    "Dublin, CA": "California, CA",
+    "Birmingham, UK": None,
+    "San Jose, Costa Rica": None,
+}
+
+
+def check() -> bool:
+    ok = True
+    for location, expected in KNOWN_LOCATIONS.items():
+        place = geocode(location)
+        label = place.label if place is not None else None
+        if label != expected:
+            print(f"  {location!r}: expected {expected!r}, got {label!r}")
+            ok = False
+        # Only cities get coordinates; a region match must not store its centroid
+        has_point = location_columns(location)["latitude"] is not None
+        if has_point != (place is not None and place.kind != "region"):
+            print(f"  {location!r}: coordinates {'stored' if has_point else 'missing'} for {label!r}")
+            ok = False
+    print(f"gazetteer check {'passed' if ok else 'FAILED'} ({len(KNOWN_LOCATIONS)} locations)")
+    return ok
+
+
+def backfill(supabase, table: str, everything: bool = False) -> None:
+    """Geocode the rows without coordinates - or, with everything, recompute every row's"""
+    def rows_query():
+        query = supabase.table(table).select("id, location").not_.is_("location", "null")
+        return query if everything else query.is_("geohash", "null")
+
+    rows = fetch_all(rows_query, "id")
+    counts = Counter(row["location"] for row in rows if row.get("location"))
+    unknown = Counter()
+    updated = 0
+    for location, count in counts.items():
+        if geocode_point(location) is None:
+            unknown[location] = count
+            if not everything:
+                continue
+        update = supabase.table(table).update(location_columns(location)).eq("location", location)
+        (update if everything else update.is_("geohash", "null")).execute()
+        updated += count
+    print(f"{table}: geocoded {updated:,} of {len(rows):,} rows ({len(counts) - len(unknown):,} places)")
+    for location, count in unknown.most_common(20):
+        print(f"  unknown: {location!r} ({count:,})")
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        sys.exit(0 if check() else 1)
+    supabase = get_supabase()
+    for table in ("users", "events"):
+        backfill(supabase, table, everything="--all" in sys.argv)
@@ -0,0 +1,237 @@
+"""
+Concurrency stress test for the apply_rsvp database function.
+Creates a throwaway event with a small max_participants, fires parallel RSVP
+requests (every user twice) and parallel host approvals, then checks that the
+event was never overbooked and no duplicate RSVPs exist. Also checks that a
+private event turns away everyone but the host's accepted buddies. Cleans up
+afterwards.
+
+Needs nothing but DATABASE_URL pointing at a database with the schema's tables
+(supabase_schema.sql); apply_rsvp itself is (re)installed from the schema file
+first, so the test always runs the function in this tree. Use a development
+database. Skips (exit 0) when the database is unreachable or has no tables.
+
+Run with: PYTHONPATH=/path/to/backend python scripts/stress_rsvp.py [--users 200] [--capacity 10] [--workers 50]
+Exits non-zero if overbooking, duplicates or a private event leak are detected.
+"""
+import argparse
+import json
+import re
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import psycopg2
+from core.config import settings
+
+
+SCHEMA_SQL_PATH = Path(__file__).parent.parent / "supabase_schema.sql"
+REQUIRED_TABLES = ("users", "sports", "events", "event_rsvps", "buddies")
+
+
+def connect():
+    return psycopg2.connect(
+        settings.DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://"),
+        connect_timeout=5
+    )
+
+
+def missing_tables(conn) -> list:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT t FROM unnest(%s::text[]) AS t WHERE to_regclass('public.' || t) IS NULL",
+            (list(REQUIRED_TABLES),)
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def install_apply_rsvp(conn):
+    """CREATE OR REPLACE public.apply_rsvp from supabase_schema.sql (STEP 10)"""
+    match = re.search(
+        r"CREATE OR REPLACE FUNCTION public\.apply_rsvp\(.*?\$\$ LANGUAGE plpgsql;",
+        SCHEMA_SQL_PATH.read_text(),
+        re.S
+    )
+    with conn.cursor() as cur:
+        cur.execute(match.group(0))
+    conn.commit()
+
+
+def call_apply_rsvp(event_id: int, user_id: int, action: str, actor_id: int) -> dict:
+    """One connection per call so every request is its own transaction, like separate API workers."""
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT public.apply_rsvp(%s, %s, %s, %s)", (event_id, user_id, action, actor_id))
+            result = cur.fetchone()[0]
+        conn.commit()
+        return result if isinstance(result, dict) else json.loads(result)
+    finally:
+        conn.close()
+
+
+def setup(conn, user_count: int, capacity: int):
+    tag = uuid.uuid4().hex[:8]
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO public.sports (name, icon) VALUES (%s, %s) RETURNING id",
+            (f"stress-sport-{tag}", "🏃")
+        )
+        sport_id = cur.fetchone()[0]
+        user_ids = []
+        for i in range(user_count + 1):
+            cur.execute(
+                "INSERT INTO public.users (email, full_name) VALUES (%s, %s) RETURNING id",
+                (f"stress-{tag}-{i}@example.com", f"Stress User {i}")
+            )
+            user_ids.append(cur.fetchone()[0])
+        host_id = user_ids.pop(0)
+        cur.execute(
+            """
+            INSERT INTO public.events (title, sport_id, host_id, location, start_time, max_participants)
+            VALUES (%s, %s, %s, %s, NOW() + INTERVAL '7 days', %s) RETURNING id
+            """,
+            (f"Stress event {tag}", sport_id, host_id, "Stress Test City", capacity)
+        )
+        event_id = cur.fetchone()[0]
+        # Host is auto-approved like create_event does; must not count against capacity
+        cur.execute(
+            "INSERT INTO public.event_rsvps (event_id, user_id, status, attended) VALUES (%s, %s, 'approved', false)",
+            (event_id, host_id)
+        )
+    conn.commit()
+    return sport_id, host_id, user_ids, event_id
+
+
+def check_private_event(conn, sport_id: int, host_id: int, user_ids: list) -> bool:
+    """A private event: the host's accepted buddy may request, a stranger may not."""
+    buddy_id, stranger_id = user_ids[0], user_ids[1]
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO public.events (title, sport_id, host_id, location, start_time, is_public)
+            VALUES (%s, %s, %s, %s, NOW() + INTERVAL '7 days', false) RETURNING id
+            """,
+            ("Private stress event", sport_id, host_id, "Stress Test City")
+        )
+        event_id = cur.fetchone()[0]
+        cur.execute(
+            "INSERT INTO public.buddies (user1_id, user2_id, status) VALUES (%s, %s, 'accepted')",
+            (buddy_id, host_id)
+        )
+    conn.commit()
+    try:
+        stranger = call_apply_rsvp(event_id, stranger_id, "request", stranger_id)
+        buddy = call_apply_rsvp(event_id, buddy_id, "request", buddy_id)
+        print(f"  private event: stranger -> {stranger.get('error') or 'ok'}, buddy -> {buddy.get('error') or 'ok'}")
+        ok = stranger.get("error") == "event_private" and buddy.get("ok")
+        if not ok:
+            print("❌ Private event visibility not enforced")
+        return bool(ok)
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM public.event_rsvps WHERE event_id = %s", (event_id,))
+            cur.execute("DELETE FROM public.events WHERE id = %s", (event_id,))
+            cur.execute("DELETE FROM public.buddies WHERE user1_id = %s AND user2_id = %s", (buddy_id, host_id))
+        conn.commit()
+
+
+def cleanup(conn, sport_id: int, host_id: int, user_ids: list, event_id: int):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM public.event_rsvps WHERE event_id = %s", (event_id,))
+        cur.execute("DELETE FROM public.events WHERE id = %s", (event_id,))
+        cur.execute("DELETE FROM public.users WHERE id = ANY(%s)", ([host_id] + user_ids,))
+        cur.execute("DELETE FROM public.sports WHERE id = %s", (sport_id,))
+    conn.commit()
+
+
+def run(user_count: int, capacity: int, workers: int) -> bool:
+    conn = connect()
+    sport_id, host_id, user_ids, event_id = setup(conn, user_count, capacity)
+    print(f"🧪 Event {event_id}: capacity {capacity}, {len(user_ids)} users, {workers} workers")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Every user requests twice in parallel - exactly one must succeed
+            request_results = list(pool.map(
+                lambda uid: call_apply_rsvp(event_id, uid, "request", uid),
+                user_ids + user_ids
+            ))
+            # Host approves everyone in parallel - at most `capacity` may succeed
+            approve_results = list(pool.map(
+                lambda uid: call_apply_rsvp(event_id, uid, "approve", host_id),
+                user_ids
+            ))
+
+        requested = sum(1 for r in request_results if r.get("ok"))
+        duplicates = sum(1 for r in request_results if r.get("error") == "already_rsvpd")
+        approved = sum(1 for r in approve_results if r.get("ok"))
+        full = sum(1 for r in approve_results if r.get("error") == "event_full")
+
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT COUNT(*) FROM public.event_rsvps WHERE event_id = %s AND status = 'approved' AND user_id <> %s",
+                (event_id, host_id)
+            )
+            approved_rows = cur.fetchone()[0]
+            cur.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM public.event_rsvps WHERE event_id = %s",
+                (event_id,)
+            )
+            total_rows, distinct_users = cur.fetchone()
+
+        print(f"  requests: {requested} created, {duplicates} rejected as duplicates")
+        print(f"  approvals: {approved} approved, {full} rejected as full")
+        print(f"  database: {approved_rows} approved participants, {total_rows} rows for {distinct_users} users")
+
+        expected_approved = min(capacity, len(user_ids))
+        ok = True
+        if requested != len(user_ids) or duplicates != len(user_ids):
+            print("❌ Duplicate RSVP detection failed")
+            ok = False
+        if total_rows != distinct_users:
+            print("❌ Duplicate RSVP rows found")
+            ok = False
+        if approved_rows > capacity:
+            print(f"❌ Event overbooked: {approved_rows} > {capacity}")
+            ok = False
+        if approved_rows != expected_approved or approved != expected_approved:
+            print(f"❌ Expected exactly {expected_approved} approvals")
+            ok = False
+        if len(user_ids) >= 2 and not check_private_event(conn, sport_id, host_id, user_ids):
+            ok = False
+        if ok:
+            print("✅ No overbooking or duplicates under parallel requests, private events enforced")
+        return ok
+    finally:
+        cleanup(conn, sport_id, host_id, user_ids, event_id)
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stress test apply_rsvp capacity enforcement")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        conn = connect()
+    except psycopg2.OperationalError as e:
+        print(f"⏭️  Skipped: no database reachable via DATABASE_URL ({' '.join(str(e).split())})")
+        sys.exit(0)
+    try:
+        missing = missing_tables(conn)
+        if missing:
+            print(f"⏭️  Skipped: database has no {', '.join(missing)} table(s) - apply supabase_schema.sql first")
+            sys.exit(0)
+        install_apply_rsvp(conn)
+    finally:
+        conn.close()
+
+    results = [run(args.users, args.capacity, args.workers) for _ in range(args.rounds)]
+    sys.exit(0 if all(results) else 1)
@@ -1,129 +1,67 @@
+from collections import defaultdict
 from supabase import Client
-from typing import List
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from datetime import datetime
+from core.cache import TTLCache
+from core.database import execute_concurrently
+from core.security import verify_score_token
+from services.candidates import MAX_CANDIDATES, get_candidate_index
+from services.geo import cells_for_radius, geohash_filter, haversine_km, point_of
+from services.match_features import features_from_user, load_match_features, score_features
 
 
-def _extract_ids(items: list, key: str = "id") -> set:
-    """Extract IDs from a list of dicts or primitives. Handles unhashable types."""
-    if not items:
-        return set()
-    first = items[0]
-    if isinstance(first, dict):
-        return {x.get(key) for x in items if x.get(key) is not None}
-    try:
-        return set(items)
-    except TypeError:
-        return set()
+# User columns needed to score and display a suggested buddy (not the whole row)
+CANDIDATE_COLUMNS = "id, full_name, age, location, avatar_url, bio"
+
+# user id -> ids of every user it has a buddy row with (any status, either direction).
+# Dropped for both users when a relationship is created or deleted; other workers
+# catch up within the TTL. The unique pair index stays the source of truth.
+_connections_cache = TTLCache(maxsize=10000, ttl=60, name="buddy_connections")
+
+
+def get_connected_user_ids(supabase: Client, user_id: int) -> FrozenSet[int]:
+    """Ids of users user_id already has a relationship with (cached; one query on a miss)"""
+    connected = _connections_cache.get(user_id)
+    if connected is None:
+        result = supabase.table("buddies").select("user1_id, user2_id").or_(
+            f"user1_id.eq.{user_id},user2_id.eq.{user_id}"
+        ).execute()
+        connected = frozenset(
+            b["user2_id"] if b["user1_id"] == user_id else b["user1_id"] for b in (result.data or [])
+        )
+        _connections_cache.set(user_id, connected)
+    return connected
+
+
+def known_connected(user_id: int, other_id: int) -> bool:
+    """True if the cache already shows a relationship between the two users (never queries)"""
+    connected = _connections_cache.get(user_id)
+    return connected is not None and other_id in connected
 
 
-def calculate_buddy_score(user1: dict, user2: dict, supabase: Client = None) -> float:
+def invalidate_connections(*user_ids: int) -> None:
+    for user_id in user_ids:
+        _connections_cache.delete(user_id)
+
+
+def insert_buddy_pair(supabase: Client, user1_id: int, user2_id: int, match_score: float) -> Optional[dict]:
     """
-    Calculate buddy score between two users based on:
-    - Sports overlap (35%)
-    - Goals overlap (25%)
-    - Location proximity (20%)
-    - Age compatibility (10%)
-    - Activity level similarity (10%)
+    Insert a pending buddy request from user1 to user2. Returns the new row, or
+    None if the pair already has a relationship in either direction - the
+    unique (low_id, high_id) index makes that a single INSERT ... ON CONFLICT
+    DO NOTHING instead of a lookup per direction.
     """
-    score = 0.0
-
-    # Sports overlap (35%) - Most important factor
-    raw1 = user1.get("sports") or []
-    raw2 = user2.get("sports") or []
-    user1_sports = _extract_ids(raw1 if isinstance(raw1, list) else [])
-    user2_sports = _extract_ids(raw2 if isinstance(raw2, list) else [])
-    
-    if user1_sports and user2_sports:
-        common_sports = user1_sports.intersection(user2_sports)
-        total_sports = user1_sports.union(user2_sports)
-        sports_score = len(common_sports) / len(total_sports) if total_sports else 0
-        score += sports_score * 0.35
-    elif not user1_sports and not user2_sports:
-        score += 0.175  # Both have no sports, neutral score
-    elif len(user1_sports) > 0 and len(user2_sports) > 0:
-        # Partial match - at least one sport overlap
-        if user1_sports.intersection(user2_sports):
-            score += 0.15  # Some overlap, partial score
-    
-    # Goals overlap (25%) - Important for compatibility
-    raw1 = user1.get("goals") or []
-    raw2 = user2.get("goals") or []
-    user1_goals = _extract_ids(raw1 if isinstance(raw1, list) else [])
-    user2_goals = _extract_ids(raw2 if isinstance(raw2, list) else [])
-    
-    if user1_goals and user2_goals:
-        common_goals = user1_goals.intersection(user2_goals)
-        total_goals = user1_goals.union(user2_goals)
-        goals_score = len(common_goals) / len(total_goals) if total_goals else 0
-        score += goals_score * 0.25
-    elif not user1_goals and not user2_goals:
-        score += 0.125  # Both have no goals, neutral score
-    
-    # Location proximity (20%) - Improved matching
-    loc1 = user1.get("location", "").lower().strip() if user1.get("location") else ""
-    loc2 = user2.get("location", "").lower().strip() if user2.get("location") else ""
-    
-    if loc1 and loc2:
-        # Exact match
-        if loc1 == loc2:
-            score += 0.20
-        # City/area match (e.g., "Washington, DC" matches "Washington DC")
-        elif loc1.replace(',', '').replace(' ', '') == loc2.replace(',', '').replace(' ', ''):
-            score += 0.18
-        # One location contains the other
-        elif loc1 in loc2 or loc2 in loc1:
-            score += 0.12
-        # Same state/region keywords
-        else:
-            loc1_words = set(loc1.split())
-            loc2_words = set(loc2.split())
-            common_words = loc1_words.intersection(loc2_words)
-            common_words = {w for w in common_words if len(w) > 2}
-            if common_words:
-                score += 0.08
-    else:
-        score += 0.05  # Neutral if location not set
-    
-    # Age compatibility (10%) - Similar age ranges match better
-    age1 = user1.get("age")
-    age2 = user2.get("age")
-    if age1 and age2:
-        age_diff = abs(age1 - age2)
-        if age_diff <= 3:
-            score += 0.10
-        elif age_diff <= 5:
-            score += 0.075
-        elif age_diff <= 10:
-            score += 0.05
-        elif age_diff <= 15:
-            score += 0.025
-    
-    # Activity level similarity (10%) - Based on event attendance
-    if supabase:
-        try:
-            user1_events_result = supabase.table("event_rsvps").select("id", count="exact").eq("user_id", user1.get("id")).eq("status", "approved").execute()
-            user1_events = user1_events_result.count if user1_events_result.count is not None else 0
-            
-            user2_events_result = supabase.table("event_rsvps").select("id", count="exact").eq("user_id", user2.get("id")).eq("status", "approved").execute()
-            user2_events = user2_events_result.count if user2_events_result.count is not None else 0
-            
-            if user1_events >= 5 and user2_events >= 5:
-                score += 0.10
-            elif user1_events >= 3 and user2_events >= 3:
-                score += 0.075
-            elif user1_events <= 2 and user2_events <= 2:
-                score += 0.05
-            elif abs(user1_events - user2_events) > 10:
-                score += 0.02
-            else:
-                score += 0.05
-        except Exception:
-            score += 0.05
-    
-    return round(score * 100, 2)  # Return as percentage
+    result = supabase.table("buddies").upsert({
+        "user1_id": user1_id,
+        "user2_id": user2_id,
+        "match_score": match_score,
+        "status": "pending"
+    }, on_conflict="low_id,high_id", ignore_duplicates=True).execute()
+    invalidate_connections(user1_id, user2_id)
+    return result.data[0] if result.data else None
 
 
-def find_potential_buddies(
+async def find_potential_buddies(
     user: dict,
     supabase: Client,
     limit: int = None,
@@ -132,29 +70,29 @@ def find_potential_buddies(
     """
     Find potential buddies for a user using Supabase
     Returns all discoverable users (regardless of score), sorted by score, limit can be applied by caller
+    Scores come from the match-feature store; sports and goals are attached to
+    the returned users only, so pass limit when only a page is needed.
+    With a limit of at most MAX_CANDIDATES, only the users the candidate index
+    (services.candidates) proposes are scored.
     """
     user_id = user.get("id")
     if not user_id:
         return []
     
     # Get existing buddy user IDs
-    existing_buddy_user_ids = set()
     try:
-        # Get buddies where user is user1
-        buddies1_result = supabase.table("buddies").select("user2_id").eq("user1_id", user_id).execute()
-        if buddies1_result.data:
-            existing_buddy_user_ids.update([b["user2_id"] for b in buddies1_result.data])
-        
-        # Get buddies where user is user2
-        buddies2_result = supabase.table("buddies").select("user1_id").eq("user2_id", user_id).execute()
-        if buddies2_result.data:
-            existing_buddy_user_ids.update([b["user1_id"] for b in buddies2_result.data])
+        existing_buddy_user_ids = get_connected_user_ids(supabase, user_id)
     except Exception:
-        pass
+        existing_buddy_user_ids = frozenset()
+    
+    if limit and limit <= MAX_CANDIDATES:
+        buddies = await _score_candidates(user, supabase, existing_buddy_user_ids, limit)
+        if buddies is not None:
+            return buddies
     
     # Get all discoverable users except current user and existing buddies
     try:
-        query = supabase.table("users").select("*").eq("is_active", True).eq("is_discoverable", True).neq("id", user_id)
+        query = supabase.table("users").select(CANDIDATE_COLUMNS).eq("is_active", True).eq("is_discoverable", True).neq("id", user_id)
         
         if existing_buddy_user_ids:
             # Exclude existing buddies - Supabase doesn't support NOT IN directly, so we filter in Python
@@ -166,36 +104,13 @@ def find_potential_buddies(
     except Exception:
         potential_users = []
     
-    # Get sports and goals for all potential users
-    for potential_user in potential_users:
-        user_id_potential = potential_user.get("id")
-        
-        # Get sports
-        try:
-            sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", user_id_potential).execute()
-            potential_user["sports"] = []
-            if sports_result.data:
-                for item in sports_result.data:
-                    if item.get("sports"):
-                        potential_user["sports"].append(item["sports"])
-        except Exception:
-            potential_user["sports"] = []
-        
-        # Get goals
-        try:
-            goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", user_id_potential).execute()
-            potential_user["goals"] = []
-            if goals_result.data:
-                for item in goals_result.data:
-                    if item.get("goals"):
-                        potential_user["goals"].append(item["goals"])
-        except Exception:
-            potential_user["goals"] = []
-    
-    # Calculate scores for all users (no filtering by score)
+    # Calculate scores for all users (no filtering by score) from the shared feature store
+    features = await load_match_features(supabase, [user_id] + [u.get("id") for u in potential_users])
+    user_features = features.get(user_id) or features_from_user(user, 0)
     buddies = []
     for potential_user in potential_users:
-        score = calculate_buddy_score(user, potential_user, supabase)
+        candidate_features = features.get(potential_user.get("id")) or features_from_user(potential_user, 0)
+        score = score_features(user_features, candidate_features)
         buddies.append({
             "user": potential_user,
             "score": score
@@ -206,82 +121,230 @@ def find_potential_buddies(
     
     # Apply limit if provided
     if limit:
-        return buddies[:limit]
+        buddies = buddies[:limit]
+    
+    # Sports and goals for display, only for the users returned
+    await attach_interests(supabase, [b["user"] for b in buddies])
+    return buddies
+
+
+async def _score_candidates(
+    user: dict,
+    supabase: Client,
+    exclude: FrozenSet[int],
+    limit: int
+) -> Optional[List[dict]]:
+    """
+    The top `limit` of the index's candidates for user, like find_potential_buddies(),
+    or None when the index cannot fill the page and every user must be scored.
+    """
+    user_id = user["id"]
+    try:
+        index = await get_candidate_index(supabase)
+        viewer = (await load_match_features(supabase, (user_id,))).get(user_id) or features_from_user(user, 0)
+        candidate_ids = index.candidates(viewer, exclude=exclude)
+        if len(candidate_ids) < limit:
+            return None
+        features = await load_match_features(supabase, candidate_ids)
+    except Exception:
+        return None
+    
+    scored = [(candidate_id, score_features(viewer, features[candidate_id]))
+              for candidate_id in candidate_ids if candidate_id in features]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    top = scored[:limit]
+    
+    try:
+        users_result = supabase.table("users").select(CANDIDATE_COLUMNS).in_(
+            "id", [candidate_id for candidate_id, _ in top]
+        ).eq("is_active", True).eq("is_discoverable", True).execute()
+        users = {u["id"]: u for u in (users_result.data or [])}
+    except Exception:
+        return None
+    buddies = [{"user": users[candidate_id], "score": score} for candidate_id, score in top if candidate_id in users]
+    await attach_interests(supabase, [b["user"] for b in buddies])
+    return buddies
+
+
+async def find_nearby_buddies(
+    user: dict,
+    supabase: Client,
+    radius_km: float,
+    limit: int
+) -> List[dict]:
+    """
+    Discoverable users within radius_km of user's geocoded location (not
+    already connected), best match first, as {"user", "score", "distance_km"}.
+    The geohash cells around the user turn the lookup into index range scans;
+    the exact distance is checked here. Raises ValueError if the user's
+    location has no coordinates.
+    """
+    origin = point_of(user)
+    if origin is None:
+        raise ValueError("Set a location on your profile to find buddies nearby")
+    user_id = user["id"]
+    try:
+        connected = get_connected_user_ids(supabase, user_id)
+    except Exception:
+        connected = frozenset()
+    
+    result = supabase.table("users").select(f"{CANDIDATE_COLUMNS}, latitude, longitude").eq(
+        "is_active", True
+    ).eq("is_discoverable", True).neq("id", user_id).or_(
+        geohash_filter(cells_for_radius(*origin, radius_km))
+    ).execute()
+    nearby = []
+    for candidate in result.data or []:
+        point = point_of(candidate)
+        if point is None or candidate["id"] in connected:
+            continue
+        distance = haversine_km(*origin, *point)
+        if distance <= radius_km:
+            nearby.append((candidate, distance))
+    
+    features = await load_match_features(supabase, [user_id] + [c["id"] for c, _ in nearby])
+    viewer = features.get(user_id) or features_from_user(user, 0)
+    buddies = [{
+        "user": candidate,
+        "score": score_features(viewer, features.get(candidate["id"]) or features_from_user(candidate, 0)),
+        "distance_km": round(distance, 1)
+    } for candidate, distance in nearby]
+    buddies.sort(key=lambda b: (-b["score"], b["distance_km"]))
+    buddies = buddies[:limit]
+    await attach_interests(supabase, [b["user"] for b in buddies])
     return buddies
 
 
-def create_buddy_request(
+async def attach_interests(supabase: Client, users: List[dict]) -> None:
+    """Set "sports" and "goals" (embedded rows) on each user dict, with two bulk queries"""
+    user_ids = [u["id"] for u in users if u.get("id") is not None]
+    if not user_ids:
+        return
+    sports_result, goals_result = await execute_concurrently(
+        supabase.table("user_sports").select("user_id, sports(id, name, icon)").in_("user_id", user_ids),
+        supabase.table("user_goals").select("user_id, goals(id, name, description)").in_("user_id", user_ids),
+    )
+    sports = _grouped(sports_result, "user_id", "sports")
+    goals = _grouped(goals_result, "user_id", "goals")
+    for user in users:
+        user["sports"] = sports[user.get("id")]
+        user["goals"] = goals[user.get("id")]
+
+
+async def create_buddy_request(
     user1_id: int,
     user2_id: int,
-    supabase: Client
+    supabase: Client,
+    score_token: Optional[str] = None
 ) -> dict:
     """
     Create a buddy request using Supabase
     Returns the created buddy dict
+    The match score comes from score_token (the signed score shown with the
+    suggestion) when it is valid for this pair, else from the feature store.
+    Raises ValueError if the pair already has a relationship.
     """
-    # Check if buddy already exists
-    try:
-        # Check both directions
-        existing1 = supabase.table("buddies").select("*").eq("user1_id", user1_id).eq("user2_id", user2_id).execute()
-        existing2 = supabase.table("buddies").select("*").eq("user1_id", user2_id).eq("user2_id", user1_id).execute()
-        
-        if (existing1.data and len(existing1.data) > 0) or (existing2.data and len(existing2.data) > 0):
-            raise ValueError("Buddy already exists")
-    except ValueError:
-        raise
-    except Exception:
-        pass  # If query fails, continue (might be a connection issue)
+    # Known duplicates are rejected without a query; the insert below catches the rest
+    if known_connected(user1_id, user2_id):
+        raise ValueError("Buddy already exists")
     
-    # Get user data for score calculation
-    try:
-        user1_result = supabase.table("users").select("*").eq("id", user1_id).single().execute()
-        user1_data = user1_result.data if user1_result.data else {}
-        
-        user2_result = supabase.table("users").select("*").eq("id", user2_id).single().execute()
-        user2_data = user2_result.data if user2_result.data else {}
-        
-        # Get sports and goals for both users
-        user1_sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", user1_id).execute()
-        user1_data["sports"] = []
-        if user1_sports_result.data:
-            for item in user1_sports_result.data:
-                if item.get("sports"):
-                    user1_data["sports"].append(item["sports"])
-        
-        user2_sports_result = supabase.table("user_sports").select("sport_id, sports(*)").eq("user_id", user2_id).execute()
-        user2_data["sports"] = []
-        if user2_sports_result.data:
-            for item in user2_sports_result.data:
-                if item.get("sports"):
-                    user2_data["sports"].append(item["sports"])
-        
-        user1_goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", user1_id).execute()
-        user1_data["goals"] = []
-        if user1_goals_result.data:
-            for item in user1_goals_result.data:
-                if item.get("goals"):
-                    user1_data["goals"].append(item["goals"])
-        
-        user2_goals_result = supabase.table("user_goals").select("goal_id, goals(*)").eq("user_id", user2_id).execute()
-        user2_data["goals"] = []
-        if user2_goals_result.data:
-            for item in user2_goals_result.data:
-                if item.get("goals"):
-                    user2_data["goals"].append(item["goals"])
-        
-        score = calculate_buddy_score(user1_data, user2_data, supabase)
-    except Exception:
-        score = 50.0  # Default score if calculation fails
+    score = await resolve_match_score(supabase, user1_id, user2_id, score_token)
     
     # Create buddy request
-    buddy_result = supabase.table("buddies").insert({
-        "user1_id": user1_id,
-        "user2_id": user2_id,
-        "match_score": score,
-        "status": "pending"
-    }).execute()
-    
-    if not buddy_result.data or len(buddy_result.data) == 0:
-        raise ValueError("Failed to create buddy request")
+    buddy = insert_buddy_pair(supabase, user1_id, user2_id, score)
+    if buddy is None:
+        raise ValueError("Buddy already exists")
     
-    return buddy_result.data[0]
+    return buddy
+
+
+async def resolve_match_score(
+    supabase: Client,
+    user1_id: int,
+    user2_id: int,
+    score_token: Optional[str] = None
+) -> float:
+    """Score from a valid score token, else computed from cached match features (50.0 on failure)"""
+    if score_token:
+        score = verify_score_token(score_token, user1_id, user2_id)
+        if score is not None:
+            return score
+    try:
+        features = await load_match_features(supabase, (user1_id, user2_id))
+        return score_features(features[user1_id], features[user2_id])
+    except Exception:
+        return 50.0  # Default score if calculation fails
+
+def _grouped(result, user_key: str, embed: str) -> Dict[int, list]:
+    """user_id -> embedded rows from a user_sports/user_goals result (empty if the query failed)"""
+    grouped = defaultdict(list)
+    if isinstance(result, Exception) or result is None:
+        return grouped
+    for item in (result.data or []):
+        if item.get(embed):
+            grouped[item.get(user_key)].append(item[embed])
+    return grouped
+
+
+async def load_buddy_list(
+    supabase: Client,
+    user_id: int,
+    status: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[dict], Optional[int]]:
+    """
+    Buddy relationships of user_id (either side), newest first, with both
+    users' profile, sports and goals.
+    One query finds the relationships; the profiles, sports and goals of all
+    users involved are then loaded with three bulk queries, run concurrently,
+    so the query count does not grow with the number of buddies.
+    cursor is the id of the last buddy on the previous page. Returns
+    (buddies, next_cursor); next_cursor is None on the last page.
+    """
+    query = supabase.table("buddies").select(
+        "id, user1_id, user2_id, match_score, status, created_at"
+    ).or_(f"user1_id.eq.{user_id},user2_id.eq.{user_id}")
+    if status:
+        query = query.eq("status", status)
+    if cursor is not None:
+        query = query.lt("id", cursor)
+    query = query.order("id", desc=True)
+    if limit is not None:
+        # One extra row tells whether there is a next page
+        query = query.limit(limit + 1)
+    rows = query.execute().data or []
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["id"]
+    if not rows:
+        return [], None
+
+    user_ids = sorted({user_id} | {r["user1_id"] for r in rows} | {r["user2_id"] for r in rows})
+    users_result, sports_result, goals_result = await execute_concurrently(
+        supabase.table("users").select(CANDIDATE_COLUMNS).in_("id", user_ids),
+        supabase.table("user_sports").select("user_id, sports(id, name, icon)").in_("user_id", user_ids),
+        supabase.table("user_goals").select("user_id, goals(id, name)").in_("user_id", user_ids),
+    )
+    users = {}
+    if not isinstance(users_result, Exception):
+        users = {u["id"]: u for u in (users_result.data or [])}
+    sports = _grouped(sports_result, "user_id", "sports")
+    goals = _grouped(goals_result, "user_id", "goals")
+
+    def side(uid: int) -> dict:
+        user = users.get(uid) or {"id": uid}
+        return {
+            "id": user.get("id"),
+            "full_name": user.get("full_name") or "Unknown",
+            "age": user.get("age"),
+            "location": user.get("location"),
+            "avatar_url": user.get("avatar_url"),
+            "bio": user.get("bio"),
+            "sports": [{"id": s.get("id"), "name": s.get("name"), "icon": s.get("icon")} for s in sports[uid]],
+            "goals": [{"id": g.get("id"), "name": g.get("name")} for g in goals[uid]]
+        }
+
+    return [{**row, "user1": side(row["user1_id"]), "user2": side(row["user2_id"])} for row in rows], next_cursor
@@ -0,0 +1,284 @@
+"""
+Candidate generation for buddy matching.
+
+Scoring every discoverable user is O(N) per request. CandidateIndex narrows
+that to a few hundred likely matches first, with locality-sensitive hashing
+of what the scorer weighs most:
+
+- MinHash bands of the user's sport/goal set: users whose sets are similar
+  (high Jaccard overlap) share a band bucket with high probability
+- the same bands within the user's geohash cell (or canonical location key)
+- location + 5-year age bracket
+
+A query reads a bounded sample of each of the user's buckets (seeded by the
+user's id, so it is stable between queries) and ranks the users it meets by
+how many buckets they share, so its cost does not grow with the number of
+users. The exact scorer then ranks the candidates.
+
+The index is process-local (core.local_index). It is built from the database
+on first use and rebuilt every INDEX_TTL; in between, profile and interest
+changes (see core.events) mark users dirty and they are reindexed before the
+next query.
+"""
+import heapq
+import random
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from supabase import Client
+
+from core.database import fetch_all
+from core.events import UserInterestsChanged, UserProfileChanged, subscribe
+from core.local_index import LocalIndex
+from services.geo import encode_geohash
+from services.match_features import MatchFeatures, build_match_features
+
+NUM_BANDS = 32
+ROWS_PER_BAND = 2
+# Users read from one bucket per query; bounds the cost of a query
+BUCKET_SAMPLE = 64
+MAX_CANDIDATES = 300
+INDEX_TTL = 600
+
+# users columns that decide a user's buckets or whether they are indexed at all
+_INDEXED_FIELDS = frozenset({"location", "latitude", "longitude", "age", "is_active", "is_discoverable"})
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20261019)
+_HASHES = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_BANDS * ROWS_PER_BAND)]
+
+# Bucket families and how much sharing one counts towards the ranking
+_INTERESTS_NEARBY, _INTERESTS, _PEERS_NEARBY = "il", "i", "pl"
+_WEIGHTS = {_INTERESTS_NEARBY: 3, _INTERESTS: 1, _PEERS_NEARBY: 2}
+
+
+# Geohash cell used as the "nearby" key of geocoded users (~40 x 20 km)
+_NEARBY_PRECISION = 4
+
+
+def _location_key(features: MatchFeatures):
+    if features.latitude is not None and features.longitude is not None:
+        return encode_geohash(features.latitude, features.longitude, _NEARBY_PRECISION)
+    # The scorer treats "Washington, DC" and "Washington DC" as the same place (0 = no location)
+    return features.location.key
+
+
+@lru_cache(maxsize=4096)
+def _token_hashes(token: str) -> Tuple[int, ...]:
+    # There are only a few dozen sports and goals, so every token is hashed once
+    value = zlib.crc32(token.encode())
+    return tuple((a * value + b) % _PRIME for a, b in _HASHES)
+
+
+def minhash(tokens: Iterable[str]) -> Tuple[int, ...]:
+    """MinHash signature of a token set; all empty sets share one signature"""
+    hashes = [_token_hashes(token) for token in tokens]
+    if not hashes:
+        return (-1,) * len(_HASHES)
+    return tuple(map(min, zip(*hashes)))
+
+
+def bucket_keys(features: MatchFeatures) -> Tuple[tuple, ...]:
+    tokens = [f"s{sport_id}" for sport_id in features.sport_ids] + [f"g{goal_id}" for goal_id in features.goal_ids]
+    signature = minhash(tokens)
+    location = _location_key(features)
+    keys = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        keys.append((_INTERESTS, band, rows))
+        if location:
+            keys.append((_INTERESTS_NEARBY, location, band, rows))
+    if location and features.age:
+        keys.append((_PEERS_NEARBY, location, features.age // 5))
+    return tuple(keys)
+
+
+class _Bucket:
+    """Set of user ids with O(1) add/remove and O(k) random samples"""
+
+    __slots__ = ("members", "positions")
+
+    def __init__(self):
+        self.members: List[int] = []
+        self.positions: Dict[int, int] = {}
+
+    def add(self, user_id: int) -> None:
+        if user_id not in self.positions:
+            self.positions[user_id] = len(self.members)
+            self.members.append(user_id)
+
+    def remove(self, user_id: int) -> None:
+        position = self.positions.pop(user_id, None)
+        if position is None:
+            return
+        last = self.members.pop()
+        if last != user_id:
+            self.members[position] = last
+            self.positions[last] = position
+
+    def sample(self, k: int, rng: random.Random) -> List[int]:
+        if len(self.members) <= k:
+            return self.members
+        return rng.sample(self.members, k)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+
+class CandidateIndex:
+    """LSH buckets over match features. Thread-safe."""
+
+    def __init__(self):
+        self._buckets: Dict[tuple, _Bucket] = {}
+        self._keys: Dict[int, Tuple[tuple, ...]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, features: MatchFeatures) -> None:
+        keys = bucket_keys(features)
+        with self._lock:
+            self._remove(features.user_id)
+            self._keys[features.user_id] = keys
+            for key in keys:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = _Bucket()
+                bucket.add(features.user_id)
+
+    def remove(self, user_id: int) -> None:
+        with self._lock:
+            self._remove(user_id)
+
+    def _remove(self, user_id: int) -> None:
+        for key in self._keys.pop(user_id, ()):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.remove(user_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def candidates(
+        self,
+        features: MatchFeatures,
+        limit: int = MAX_CANDIDATES,
+        exclude: Iterable[int] = ()
+    ) -> List[int]:
+        """Up to limit indexed users most likely to score well against features, best first"""
+        excluded = set(exclude)
+        excluded.add(features.user_id)
+        if len(self._keys) <= limit + len(excluded):
+            # Small enough to score everyone
+            with self._lock:
+                return [user_id for user_id in self._keys if user_id not in excluded][:limit]
+        keys = self._keys.get(features.user_id) or bucket_keys(features)
+        # Seeded per viewer, so repeated queries (pages of one listing) see the
+        # same sample while the buckets are unchanged
+        rng = random.Random(features.user_id)
+        hits: Counter = Counter()
+        with self._lock:
+            for key in keys:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                weight = _WEIGHTS[key[0]]
+                for user_id in bucket.sample(BUCKET_SAMPLE, rng):
+                    hits[user_id] += weight
+        for user_id in excluded:
+            hits.pop(user_id, None)
+        return [user_id for user_id, _ in heapq.nlargest(limit, hits.items(), key=lambda item: item[1])]
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def build_index(features: Iterable[MatchFeatures]) -> CandidateIndex:
+    index = CandidateIndex()
+    for item in features:
+        index.add(item)
+    return index
+
+
+# -- process-wide index -------------------------------------------------------
+
+_dirty: Set[int] = set()
+_dirty_lock = threading.Lock()
+
+
+def _load_features(supabase: Client, user_ids: Optional[List[int]] = None) -> Dict[int, MatchFeatures]:
+    """Features of the discoverable, active users (all, or among user_ids) - activity is not indexed"""
+    def users():
+        query = supabase.table("users").select("id, age, location, latitude, longitude").eq("is_active", True).eq("is_discoverable", True)
+        return query if user_ids is None else query.in_("id", user_ids)
+
+    def links(table: str, column: str):
+        def make():
+            query = supabase.table(table).select(f"user_id, {column}")
+            return query if user_ids is None else query.in_("user_id", user_ids)
+        return fetch_all(make, "user_id", column)
+
+    return build_match_features(
+        fetch_all(users, "id"), links("user_sports", "sport_id"), links("user_goals", "goal_id"), ()
+    )
+
+
+def _mark_dirty(index: Optional[CandidateIndex], user_id: int) -> None:
+    # Also noted while a rebuild loads, so the user is reindexed in the new index too
+    with _dirty_lock:
+        _dirty.add(user_id)
+
+
+_local = LocalIndex(lambda supabase: build_index(_load_features(supabase).values()), INDEX_TTL, _mark_dirty)
+
+
+async def get_candidate_index(supabase: Client) -> CandidateIndex:
+    """
+    The index of discoverable, active users. The first call builds it; an
+    expired index keeps serving while a background thread rebuilds it.
+    Dirty users are reindexed first (one round of queries).
+    """
+    index = await _local.get(supabase)
+    with _dirty_lock:
+        dirty = set(_dirty)
+        _dirty.clear()
+    if dirty:
+        try:
+            fresh = _load_features(supabase, sorted(dirty))
+        except Exception:
+            with _dirty_lock:
+                _dirty.update(dirty)
+            raise
+        for user_id in dirty:
+            if user_id in fresh:
+                index.add(fresh[user_id])
+            else:
+                index.remove(user_id)
+    return index
+
+
+def invalidate_candidate(user_id: int) -> None:
+    """Reindex user_id before the next query (in this process)"""
+    _local.note(user_id)
+
+
+def reset_candidate_index() -> None:
+    _local.reset()
+    with _dirty_lock:
+        _dirty.clear()
+
+
+def _on_profile_changed(event: UserProfileChanged) -> None:
+    if event.fields & _INDEXED_FIELDS:
+        invalidate_candidate(event.user_id)
+
+
+def _on_interests_changed(event: UserInterestsChanged) -> None:
+    invalidate_candidate(event.user_id)
+
+
+subscribe(UserProfileChanged, _on_profile_changed)
+subscribe(UserInterestsChanged, _on_interests_changed)
@@ -0,0 +1,118 @@
+"""
+Clustered event markers for the map view (GET /events/map).
+
+The viewport is covered with geohash cells sized for the zoom level (about
+CLUSTER_PIXELS across on screen), capped at MAX_CLUSTERS cells, so a
+response stays small however many events the viewport holds. The
+event_map_clusters database function (supabase_schema.sql) counts the events
+of every cell with one range scan of the geohash index each and picks the
+cell's representative events; only those are loaded as markers.
+
+Cells are whole geohash cells, so a cluster at the edge of the viewport also
+counts its events just outside it. That keeps clusters stable while the map
+pans, and the same cells make the same cache key.
+"""
+import math
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from supabase import Client
+
+from schemas.event import EventMap, EventMapCluster, EventMapMarker
+from services.geo import GEOHASH_PRECISION, cell_size_degrees, cells_for_bbox
+
+CLUSTER_PIXELS = 64
+MAX_CLUSTERS = 128
+# Representative events per cluster
+CLUSTER_SAMPLE = 3
+MAX_ZOOM = 22
+
+_TILE_PIXELS = 256
+
+MARKER_COLUMNS = "id, title, location, start_time, latitude, longitude, sports(id, name, icon)"
+
+
+def _cell_count(south: float, west: float, north: float, east: float, precision: int) -> int:
+    height, width = cell_size_degrees(precision)
+    rows = math.floor((north + 90) / height) - math.floor((south + 90) / height) + 1
+    cols = math.floor((east + 180) / width) - math.floor((west + 180) / width) + 1
+    return rows * cols
+
+
+def cluster_precision(south: float, west: float, north: float, east: float, zoom: int) -> int:
+    """
+    Geohash length of the cluster cells: the longest whose cells are still
+    about CLUSTER_PIXELS wide at this zoom (web mercator tiles) and of which
+    the box needs at most MAX_CLUSTERS.
+    """
+    min_width = CLUSTER_PIXELS * 360.0 / (_TILE_PIXELS * 2 ** zoom)
+    precision = 1
+    for candidate in range(2, GEOHASH_PRECISION + 1):
+        if cell_size_degrees(candidate)[1] < min_width:
+            break
+        if _cell_count(south, west, north, east, candidate) > MAX_CLUSTERS:
+            break
+        precision = candidate
+    return precision
+
+
+def map_cells(
+    south: float, west: float, north: float, east: float, zoom: int
+) -> Tuple[int, List[str]]:
+    """(precision, cluster cells covering the box). Raises ValueError for an empty or inverted box."""
+    south, north = max(-90.0, south), min(90.0, north)
+    west, east = max(-180.0, west), min(180.0, east)
+    if south >= north or west >= east:
+        raise ValueError("Bounding box must have south < north and west < east")
+    precision = cluster_precision(south, west, north, east, zoom)
+    return precision, cells_for_bbox(south, west, north, east, precision)
+
+
+async def load_event_map(
+    supabase: Client,
+    precision: int,
+    cells: List[str],
+    zoom: int,
+    sport_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> EventMap:
+    """Clusters of the non-cancelled events in the cells, largest first (two queries)"""
+    result = supabase.rpc("event_map_clusters", {
+        "p_cells": cells,
+        "p_sport_id": sport_id,
+        "p_start": start_date.isoformat() if start_date else None,
+        "p_end": end_date.isoformat() if end_date else None,
+        "p_sample": CLUSTER_SAMPLE,
+    }).execute()
+    rows = result.data if isinstance(result.data, list) else []
+
+    event_ids = sorted({event_id for row in rows for event_id in (row.get("event_ids") or [])})
+    markers = {}
+    if event_ids:
+        events_result = supabase.table("events").select(MARKER_COLUMNS).in_("id", event_ids).execute()
+        for event in (events_result.data or []):
+            if event.get("latitude") is None or event.get("longitude") is None:
+                continue
+            markers[event["id"]] = EventMapMarker(
+                id=event["id"],
+                title=event["title"],
+                location=event.get("location"),
+                start_time=event["start_time"],
+                latitude=event["latitude"],
+                longitude=event["longitude"],
+                sport=event.get("sports"),
+            )
+
+    clusters = [
+        EventMapCluster(
+            cell=row["cell"],
+            count=row["count"],
+            latitude=row["latitude"],
+            longitude=row["longitude"],
+            bounds=[row["south"], row["west"], row["north"], row["east"]],
+            events=[markers[event_id] for event_id in (row.get("event_ids") or []) if event_id in markers],
+        )
+        for row in rows
+    ]
+    return EventMap(zoom=zoom, precision=precision, total=sum(c.count for c in clusters), clusters=clusters)
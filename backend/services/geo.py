@@ -0,0 +1,109 @@
+"""
+Coordinates, distances and geohash cells.
+
+Users and events store latitude/longitude plus a geohash (GEOHASH_PRECISION
+characters). A geohash prefix is a grid cell, and the geohash column has a
+text_pattern_ops index, so "everything within r km" becomes a few
+`geohash LIKE 'prefix%'` range scans (cells_for_radius) followed by an
+exact distance check (haversine_km).
+"""
+import math
+from typing import List, Optional, Tuple
+
+GEOHASH_PRECISION = 9  # ~5 m cells; queries use shorter prefixes
+EARTH_RADIUS_KM = 6371.0088
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def cell_size_degrees(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a geohash cell with this many characters"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def cells_for_bbox(south: float, west: float, north: float, east: float, precision: int) -> List[str]:
+    """Geohash cells of the given length covering the box (no antimeridian wrap)"""
+    south, north = max(-90.0, south), min(90.0, north)
+    west, east = max(-180.0, west), min(180.0, east)
+    height, width = cell_size_degrees(precision)
+    cells = set()
+    lat = south
+    while True:
+        lng = west
+        while True:
+            cells.add(encode_geohash(lat, lng, precision))
+            if lng >= east:
+                break
+            lng = min(east, lng + width)
+        if lat >= north:
+            break
+        lat = min(north, lat + height)
+    return sorted(cells)
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) around a point"""
+    dlat = radius_km / _KM_PER_DEGREE
+    dlng = radius_km / (_KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - dlat, longitude - dlng, latitude + dlat, longitude + dlng
+
+
+def cells_for_radius(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """
+    Geohash prefixes whose cells together cover the circle: the longest prefix
+    length at which the cells are at least as large as the radius (at most
+    3x3 cells, usually 4).
+    """
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size_degrees(candidate)
+        if height * _KM_PER_DEGREE >= radius_km and width * _KM_PER_DEGREE * cos_lat >= radius_km:
+            precision = candidate
+            break
+    return cells_for_bbox(*radius_bbox(latitude, longitude, radius_km), precision)
+
+
+def geohash_filter(cells: List[str], column: str = "geohash") -> str:
+    """PostgREST or_() filter matching rows in any of the cells (prefix LIKEs)"""
+    return ",".join(f"{column}.like.{cell}*" for cell in cells)
+
+
+def point_of(row: dict) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) of a users/events row, or None if it is not geocoded"""
+    latitude, longitude = row.get("latitude"), row.get("longitude")
+    if latitude is None or longitude is None:
+        return None
+    return latitude, longitude
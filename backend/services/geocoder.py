@@ -0,0 +1,236 @@
+"""
+Offline geocoder for free-text locations ("Portland, OR", "Golden Gate Park,
+San Francisco", "NYC") backed by the gazetteer bundled in data/gazetteer.csv.
+No network calls; unknown places geocode to None.
+
+Matching, on lowercased alphanumeric tokens:
+1. the whole text is an alias (NYC, SF, Bay Area, ...)
+2. the best city name found anywhere in the text - one followed by its
+   state/region/country ("Portland, ME") wins, then the most populous
+3. the whole text is a state/region name (its centroid)
+
+A city followed by a different region is not that city: "Paris, TX" is not
+Paris, FR, and geocodes to the Texas region instead (None for regions
+without one, like "Birmingham, UK"). Only cities and aliases get stored
+coordinates (location_columns); a region only counts as a region. A capitalized last comma part the
+gazetteer does not know ("San Jose, Costa Rica") is taken as such a region.
+"""
+import csv
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from services.geo import encode_geohash
+
+GAZETTEER_PATH = Path(__file__).parent.parent / "data" / "gazetteer.csv"
+
+# Longest city name in the gazetteer, in tokens
+_MAX_NAME_TOKENS = 4
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_WORD = re.compile(r"[A-Za-z0-9]+")
+
+# Region qualifiers that are not in the gazetteer as region rows: countries
+# and provinces of the non-US cities ("usa" is added from the US region rows)
+_EXTRA_QUALIFIERS = {
+    "uk": ("GB",), "united kingdom": ("GB",), "england": ("GB",), "ireland": ("IE",),
+    "france": ("FR",), "germany": ("DE",), "spain": ("ES",), "portugal": ("PT",), "italy": ("IT",),
+    "netherlands": ("NL",), "japan": ("JP",), "korea": ("KR",), "south korea": ("KR",),
+    "singapore": ("SG",), "hong kong": ("HK",), "uae": ("AE",), "united arab emirates": ("AE",),
+    "australia": ("AU",), "mexico": ("MX",), "brazil": ("BR",),
+    "canada": ("ON", "QC", "BC", "AB"), "ontario": ("ON",), "quebec": ("QC",),
+    "british columbia": ("BC",), "alberta": ("AB",),
+}
+_US_NAMES = ("usa", "us", "united states", "united states of america", "america")
+
+# Longest qualifier, in tokens
+_MAX_QUALIFIER_TOKENS = 4
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    region: str
+    latitude: float
+    longitude: float
+    population: int
+    kind: str  # city, alias or region
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}, {self.region}"
+
+    @property
+    def is_point(self) -> bool:
+        """A city or alias; a region's centroid is not where anything in it is"""
+        return self.kind in ("city", "alias")
+
+
+def normalize(text: str) -> str:
+    return " ".join(_NON_ALNUM.split(text.lower())).strip()
+
+
+class Gazetteer:
+    def __init__(self, places: List[Place]):
+        self.cities: Dict[str, List[Place]] = {}
+        self.aliases: Dict[str, Place] = {}
+        self.regions: Dict[str, Place] = {}
+        # Region code -> its centroid place
+        self.centroids: Dict[str, Place] = {}
+        qualifiers: Dict[str, set] = {key: set(codes) for key, codes in _EXTRA_QUALIFIERS.items()}
+        for place in places:
+            key = normalize(place.name)
+            if place.kind == "alias":
+                self.aliases[key] = place
+            elif place.kind == "region":
+                self.regions[key] = place
+                self.centroids[place.region] = place
+                # "New York State" also qualifies as plain "New York"
+                qualifiers.setdefault(key.removesuffix(" state"), set()).add(place.region)
+                self.regions.setdefault(key.removesuffix(" state"), place)
+            else:
+                self.cities.setdefault(key, []).append(place)
+            qualifiers.setdefault(place.region.lower(), set()).add(place.region)
+        for name in _US_NAMES:
+            qualifiers[name] = set(self.centroids)
+        self.qualifiers: Dict[str, FrozenSet[str]] = {key: frozenset(codes) for key, codes in qualifiers.items()}
+
+    def lookup(self, text: str) -> Optional[Place]:
+        key = normalize(text or "")
+        if not key:
+            return None
+        if key in self.aliases:
+            return self.aliases[key]
+
+        tokens, strong, tail = _tokenize(text)
+        matches = []  # (place, start, regions the city is qualified with, whether they rule it out)
+        for size in range(min(_MAX_NAME_TOKENS, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                places = self.cities.get(" ".join(tokens[start:start + size]))
+                if not places:
+                    continue
+                regions, explicit = self._qualifier(tokens, strong, start + size)
+                for place in places:
+                    matches.append((place, start, size, regions, explicit or len(places) > 1))
+
+        # A capitalized last comma part that names no place we know is a region we do not know
+        unknown_tail = (
+            tail is not None
+            and all(word[0].isupper() or word.isdigit() for word in _WORD.findall(text.rsplit(",", 1)[1]))
+            and not any(start >= tail for _, start, _, _, _ in matches)
+            and self._qualifier(tokens, strong, tail)[0] is None
+            and " ".join(tokens[tail:]) not in self.aliases
+            and not all(token.isdigit() for token in tokens[tail:])
+        )
+
+        best, best_rank, ruled_out = None, None, None
+        for place, start, size, regions, explicit in matches:
+            if unknown_tail and start < tail:
+                continue
+            qualified = regions is not None and place.region in regions
+            if regions is not None and not qualified and explicit:
+                ruled_out = ruled_out or regions
+                continue
+            rank = (qualified, size, place.population)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = place, rank
+        if best is not None:
+            return best
+        if key in self.regions:
+            return self.regions[key]
+        if ruled_out is not None and len(ruled_out) == 1:
+            return self.centroids.get(next(iter(ruled_out)))
+        return None
+
+    def region_of(self, text: str) -> Optional[str]:
+        """
+        Region code a location names even when the place itself is unknown:
+        the geocoded place's region, else the part after the last comma
+        ("Smallville, KS") or the whole text when it is a region name.
+        """
+        place = self.lookup(text)
+        if place is not None:
+            return place.region
+        if "," in text:
+            regions = self.qualifiers.get(normalize(text.rsplit(",", 1)[1]))
+            if regions is not None and len(regions) == 1:
+                return next(iter(regions))
+        return None
+
+    def _qualifier(self, tokens: List[str], strong: List[bool], start: int) -> Tuple[Optional[FrozenSet[str]], bool]:
+        """
+        (region codes named right after a city name - "portland or", "albany new york",
+        "toronto canada" - or None, and whether they are explicit: after a comma,
+        written in capitals or spelled out, unlike the "in" of "Denver in May")
+        """
+        for size in range(_MAX_QUALIFIER_TOKENS, 0, -1):
+            if start + size > len(tokens):
+                continue
+            regions = self.qualifiers.get(" ".join(tokens[start:start + size]))
+            if regions:
+                return regions, strong[start] or size > 1 or len(tokens[start]) > 2
+        return None, False
+
+
+def _tokenize(text: str) -> Tuple[List[str], List[bool], Optional[int]]:
+    """
+    (lowercased tokens as normalize() splits them, whether each starts a comma
+    part after the first or is written in capitals, index of the first token
+    of the last comma part or None without a comma)
+    """
+    tokens: List[str] = []
+    strong: List[bool] = []
+    tail = None
+    parts = text.split(",")
+    for i, part in enumerate(parts):
+        words = _WORD.findall(part)
+        if i and i == len(parts) - 1 and words:
+            tail = len(tokens)
+        for j, word in enumerate(words):
+            tokens.append(word.lower())
+            strong.append((i > 0 and j == 0) or (word.isupper() and not word.isdigit()))
+    return tokens, strong, tail
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        places = [
+            Place(
+                name=row["name"], region=row["region"], latitude=float(row["latitude"]),
+                longitude=float(row["longitude"]), population=int(row["population"]), kind=row["kind"],
+            )
+            for row in csv.DictReader(f)
+        ]
+    return Gazetteer(places)
+
+
+@lru_cache(maxsize=4096)
+def geocode(text: Optional[str]) -> Optional[Place]:
+    """The gazetteer place a free-text location refers to, or None"""
+    if not text:
+        return None
+    return get_gazetteer().lookup(text)
+
+
+def geocode_point(text: Optional[str]) -> Optional[Place]:
+    """geocode() when the location is a city (or alias), else None - regions have no coordinates"""
+    place = geocode(text)
+    return place if place is not None and place.is_point else None
+
+
+def location_columns(text: Optional[str]) -> dict:
+    """
+    latitude/longitude/geohash values to store alongside a location (None unless
+    it geocodes to a city; region-only locations are matched by region_of())
+    """
+    place = geocode_point(text)
+    if place is None:
+        return {"latitude": None, "longitude": None, "geohash": None}
+    return {
+        "latitude": place.latitude,
+        "longitude": place.longitude,
+        "geohash": encode_geohash(place.latitude, place.longitude),
+    }
@@ -0,0 +1,318 @@
+"""
+Match features - everything the buddy score looks at for one user
+(sports, goals, location and its coordinates, age, approved event count) -
+and the pure scorer over them.
+
+Features are cached per user and loaded in bulk: misses cost four queries
+(users, user_sports, user_goals, approved_rsvp_counts()) per _ID_CHUNK users. Profile and
+interest changes drop the user's entry (see core.events); the approved event
+count only feeds the coarse activity bucket and is left to the TTL.
+
+Locations are normalized once per distinct string (normalize_location) when
+features are built, so the scorer compares interned ids instead of strings.
+"""
+import asyncio
+import itertools
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from supabase import Client
+
+from core.cache import TTLCache
+from core.database import fetch_all
+from core.events import UserInterestsChanged, UserProfileChanged, subscribe
+from services.geo import haversine_km
+from services.geocoder import get_gazetteer, normalize
+
+FEATURE_TTL = 300
+
+# User ids per query (keeps the in_() filters within URL limits)
+_ID_CHUNK = 500
+
+_feature_cache = TTLCache(maxsize=20000, ttl=FEATURE_TTL, name="match_features")
+
+# users columns the scorer depends on
+_PROFILE_FIELDS = frozenset({"location", "latitude", "longitude", "age"})
+
+# Bumped by every invalidation; a load that started before one is not cached
+_epoch = 0
+
+
+# Process-local ids for location strings, tokens and regions; 0 means none.
+# itertools.count hands out ids atomically, so concurrent interning never
+# gives two strings one id.
+_interned: Dict[str, int] = {}
+_next_id = itertools.count(1)
+
+
+def _intern(value: str) -> int:
+    if not value:
+        return 0
+    interned = _interned.get(value)
+    if interned is None:
+        interned = _interned.setdefault(value, next(_next_id))
+    return interned
+
+
+@dataclass(frozen=True)
+class Location:
+    """
+    A location string in the form the scorer compares, as interned ids: the
+    lowercased text, a canonical key (alphanumerics only, so "Washington, DC"
+    and "washington dc" share it), its tokens, its tokens longer than two
+    characters, and the region (state) it is in, when known.
+    """
+    text: int = 0
+    key: int = 0
+    tokens: FrozenSet[int] = frozenset()
+    keywords: FrozenSet[int] = frozenset()
+    region: int = 0
+
+
+NO_LOCATION = Location()
+
+
+@lru_cache(maxsize=65536)
+def normalize_location(text: Optional[str]) -> Location:
+    """The scorer's form of a users.location value, computed once per distinct string"""
+    text = (text or "").lower().strip()
+    if not text:
+        return NO_LOCATION
+    words = normalize(text).split()
+    return Location(
+        text=_intern(text),
+        key=_intern("".join(words)),
+        tokens=frozenset(_intern(w) for w in words),
+        keywords=frozenset(_intern(w) for w in words if len(w) > 2),
+        region=_intern(get_gazetteer().region_of(text) or ""),
+    )
+
+
+@dataclass(frozen=True)
+class MatchFeatures:
+    user_id: int
+    sport_ids: FrozenSet[int] = frozenset()
+    goal_ids: FrozenSet[int] = frozenset()
+    location: Location = NO_LOCATION
+    # Geocoded location; when both users have one, location scores by distance
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    age: Optional[int] = None
+    # None when unknown - the activity component is then left out of the score
+    approved_events: Optional[int] = None
+
+
+def _ids(items) -> FrozenSet[int]:
+    if not isinstance(items, list):
+        return frozenset()
+    ids = set()
+    for item in items:
+        value = item.get("id") if isinstance(item, dict) else item
+        try:
+            hash(value)
+        except TypeError:
+            continue
+        if value is not None:
+            ids.add(value)
+    return frozenset(ids)
+
+
+def features_from_user(user: dict, approved_events: Optional[int] = None) -> MatchFeatures:
+    """Features from a user dict with embedded sports/goals (lists of dicts or ids)"""
+    return MatchFeatures(
+        user_id=user.get("id"),
+        sport_ids=_ids(user.get("sports") or []),
+        goal_ids=_ids(user.get("goals") or []),
+        location=normalize_location(user.get("location")),
+        latitude=user.get("latitude"),
+        longitude=user.get("longitude"),
+        age=user.get("age"),
+        approved_events=approved_events,
+    )
+
+
+async def load_match_features(supabase: Client, user_ids: Iterable[int]) -> Dict[int, MatchFeatures]:
+    """
+    Features for the given users; ids without a users row are left out.
+    Cached entries cost nothing; misses are loaded _ID_CHUNK at a time, four
+    concurrent queries per chunk (paged with fetch_all).
+    """
+    wanted = {user_id for user_id in user_ids if user_id is not None}
+    found = _feature_cache.get_many(wanted)
+    missing = sorted(wanted - found.keys())
+    if not missing:
+        return found
+
+    epoch = _epoch
+    chunks = await asyncio.gather(*(
+        _load_chunk(supabase, missing[i:i + _ID_CHUNK]) for i in range(0, len(missing), _ID_CHUNK)
+    ))
+    for built in chunks:
+        for user_id, features in built.items():
+            if epoch == _epoch:
+                _feature_cache.set(user_id, features)
+            found[user_id] = features
+    return found
+
+
+async def _load_chunk(supabase: Client, user_ids: List[int]) -> Dict[int, MatchFeatures]:
+    def links(table: str, column: str) -> list:
+        return fetch_all(
+            lambda: supabase.table(table).select(f"user_id, {column}").in_("user_id", user_ids), "user_id", column
+        )
+
+    users, sport_rows, goal_rows, counts = await asyncio.gather(
+        asyncio.to_thread(
+            fetch_all,
+            lambda: supabase.table("users").select("id, age, location, latitude, longitude").in_("id", user_ids),
+            "id"
+        ),
+        asyncio.to_thread(links, "user_sports", "sport_id"),
+        asyncio.to_thread(links, "user_goals", "goal_id"),
+        asyncio.to_thread(supabase.rpc("approved_rsvp_counts", {"p_user_ids": user_ids}).execute),
+        return_exceptions=True
+    )
+    if isinstance(users, Exception):
+        raise users
+
+    # A failed sports/goals/count query counts as none
+    def rows(result) -> list:
+        if isinstance(result, Exception):
+            return []
+        data = getattr(result, "data", result)
+        return data if isinstance(data, list) else []
+
+    return build_match_features(users, rows(sport_rows), rows(goal_rows), rows(counts))
+
+
+def build_match_features(
+    users: Iterable[dict],
+    sport_rows: Iterable[dict],
+    goal_rows: Iterable[dict],
+    approved_rsvp_rows: Iterable[dict]
+) -> Dict[int, MatchFeatures]:
+    """
+    Features from raw rows: users (id, age, location, latitude, longitude), user_sports (user_id,
+    sport_id), user_goals (user_id, goal_id) and approved event_rsvps (user_id) - or
+    approved_rsvp_counts() rows (user_id, count) in their place.
+    """
+    sports, goals, events = defaultdict(set), defaultdict(set), defaultdict(int)
+    for row in sport_rows:
+        sports[row["user_id"]].add(row["sport_id"])
+    for row in goal_rows:
+        goals[row["user_id"]].add(row["goal_id"])
+    for row in approved_rsvp_rows:
+        events[row["user_id"]] += row.get("count", 1)
+    return {
+        user["id"]: MatchFeatures(
+            user_id=user["id"],
+            sport_ids=frozenset(sports[user["id"]]),
+            goal_ids=frozenset(goals[user["id"]]),
+            location=normalize_location(user.get("location")),
+            latitude=user.get("latitude"),
+            longitude=user.get("longitude"),
+            age=user.get("age"),
+            approved_events=events[user["id"]],
+        )
+        for user in users
+    }
+
+
+def score_features(a: MatchFeatures, b: MatchFeatures) -> float:
+    """
+    Buddy score (0-100) between two users:
+    - Sports overlap (35%)
+    - Goals overlap (25%)
+    - Location proximity (20%)
+    - Age compatibility (10%)
+    - Activity level similarity (10%)
+    """
+    score = 0.0
+
+    # Sports overlap (35%) - Most important factor
+    if a.sport_ids and b.sport_ids:
+        score += len(a.sport_ids & b.sport_ids) / len(a.sport_ids | b.sport_ids) * 0.35
+    elif not a.sport_ids and not b.sport_ids:
+        score += 0.175  # Both have no sports, neutral score
+
+    # Goals overlap (25%) - Important for compatibility
+    if a.goal_ids and b.goal_ids:
+        score += len(a.goal_ids & b.goal_ids) / len(a.goal_ids | b.goal_ids) * 0.25
+    elif not a.goal_ids and not b.goal_ids:
+        score += 0.125  # Both have no goals, neutral score
+
+    # Location proximity (20%) - by distance when both are geocoded
+    loc1, loc2 = a.location, b.location
+    if None not in (a.latitude, a.longitude, b.latitude, b.longitude):
+        distance = haversine_km(a.latitude, a.longitude, b.latitude, b.longitude)
+        if distance <= 5:
+            score += 0.20
+        elif distance <= 15:
+            score += 0.18
+        elif distance <= 40:
+            score += 0.12
+        elif distance <= 100:
+            score += 0.08
+    elif loc1.text and loc2.text:
+        if loc1.text == loc2.text:
+            score += 0.20
+        # City/area match (e.g., "Washington, DC" matches "Washington DC")
+        elif loc1.key == loc2.key:
+            score += 0.18
+        # One names a place within the other (e.g., "Portland" and "Portland, OR")
+        elif loc1.tokens and loc2.tokens and (loc1.tokens <= loc2.tokens or loc2.tokens <= loc1.tokens):
+            score += 0.12
+        # Same state/region, or shared keywords
+        elif (loc1.region and loc1.region == loc2.region) or not loc1.keywords.isdisjoint(loc2.keywords):
+            score += 0.08
+    else:
+        score += 0.05  # Neutral if location not set
+
+    # Age compatibility (10%) - Similar age ranges match better
+    if a.age and b.age:
+        age_diff = abs(a.age - b.age)
+        if age_diff <= 3:
+            score += 0.10
+        elif age_diff <= 5:
+            score += 0.075
+        elif age_diff <= 10:
+            score += 0.05
+        elif age_diff <= 15:
+            score += 0.025
+
+    # Activity level similarity (10%) - Based on event attendance
+    if a.approved_events is not None and b.approved_events is not None:
+        events1, events2 = a.approved_events, b.approved_events
+        if events1 >= 5 and events2 >= 5:
+            score += 0.10
+        elif events1 >= 3 and events2 >= 3:
+            score += 0.075
+        elif events1 <= 2 and events2 <= 2:
+            score += 0.05
+        elif abs(events1 - events2) > 10:
+            score += 0.02
+        else:
+            score += 0.05
+
+    return round(score * 100, 2)  # Return as percentage
+
+
+def invalidate_match_features(user_id: int) -> None:
+    global _epoch
+    _epoch += 1
+    _feature_cache.delete(user_id)
+
+
+def _on_profile_changed(event: UserProfileChanged) -> None:
+    if event.fields & _PROFILE_FIELDS:
+        invalidate_match_features(event.user_id)
+
+
+def _on_interests_changed(event: UserInterestsChanged) -> None:
+    invalidate_match_features(event.user_id)
+
+
+subscribe(UserProfileChanged, _on_profile_changed)
+subscribe(UserInterestsChanged, _on_interests_changed)
@@ -0,0 +1,47 @@
+from typing import Iterable, Optional
+
+from supabase import Client
+
+from core.events import UserInterestsChanged, publish
+
+
+def _id_list(ids: Optional[Iterable[int]]) -> Optional[list]:
+    return None if ids is None else sorted({int(i) for i in ids})
+
+
+def update_interests(
+    supabase: Client,
+    user_id: int,
+    sport_ids: Optional[Iterable[int]] = None,
+    goal_ids: Optional[Iterable[int]] = None
+) -> UserInterestsChanged:
+    """
+    Set the user's sports and/or goals (None leaves a set unchanged) with the
+    set_user_interests database function (see supabase_schema.sql): only added
+    and removed ids are written, in one transaction and one round-trip.
+    Publishes UserInterestsChanged when anything actually changed.
+    Raises ValueError if an id does not exist (nothing is written).
+    """
+    if sport_ids is None and goal_ids is None:
+        return UserInterestsChanged(user_id=user_id)
+    try:
+        response = supabase.rpc("set_user_interests", {
+            "p_user_id": user_id,
+            "p_sport_ids": _id_list(sport_ids),
+            "p_goal_ids": _id_list(goal_ids)
+        }).execute()
+    except Exception as e:
+        if getattr(e, "code", None) == "23503":
+            raise ValueError("Unknown sport or goal id") from e
+        raise
+    data = response.data if isinstance(response.data, dict) else {}
+    changes = UserInterestsChanged(
+        user_id=user_id,
+        sports_added=frozenset(data.get("sports_added") or ()),
+        sports_removed=frozenset(data.get("sports_removed") or ()),
+        goals_added=frozenset(data.get("goals_added") or ()),
+        goals_removed=frozenset(data.get("goals_removed") or ()),
+    )
+    if changes.sports_added or changes.sports_removed or changes.goals_added or changes.goals_removed:
+        publish(changes)
+    return changes
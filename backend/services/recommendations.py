@@ -0,0 +1,379 @@
+"""
+Event recommendations (GET /events/recommended).
+
+Upcoming public events (services/upcoming_events.py) are ranked for a viewer by:
+- Sport affinity (40%): the viewer's sport-affinity vector at the event's sport
+- Proximity (25%): distance bands when both are geocoded, else the location key/region
+- Buddies attending (25%): accepted buddies among the approved attendees
+- Capacity left (10%)
+
+Events known to be more than radius_km from the viewer are left out.
+
+Both sides are precomputed, so ranking a few thousand events is dictionary
+lookups and integer operations:
+- Per-user sport-affinity vectors (declared sports, sports of events the user
+  attended, and sports common among recent users with the same goals), cached per
+  user and dropped on interest changes.
+- Per-event attendee bitmaps: every user with an RSVP to an upcoming event
+  gets a bit, so "buddies attending" is popcount(attendees & buddies).
+
+The attendee model is process-local (core.local_index) and rebuilt every
+MODEL_TTL in a background thread; RSVP writes mark their event dirty (invalidate_event_attendees)
+and it is reloaded before the next ranking, like new events.
+"""
+import heapq
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from supabase import Client
+
+from core.cache import TTLCache
+from core.database import execute_concurrently, fetch_all
+from core.events import UserInterestsChanged, subscribe
+from core.local_index import LocalIndex
+from services.geo import haversine_km, point_of
+from services.match_features import normalize_location
+from services.upcoming_events import get_upcoming_index, get_upcoming_index_blocking
+
+MODEL_TTL = 300
+AFFINITY_TTL = 300
+DEFAULT_DAYS = 30
+DEFAULT_RADIUS_KM = 100.0
+
+# Contributions to a sport-affinity vector (before scaling its largest entry to 1)
+_DECLARED_WEIGHT = 1.0
+_ATTENDED_WEIGHT = 0.5
+_GOAL_WEIGHT = 0.5
+
+# user_goals rows the goal -> sport prior is estimated from (one page)
+_PRIOR_SAMPLE = 1000
+
+# Event ids per RSVP query (keeps the in_() filter within URL limits)
+_RSVP_CHUNK = 500
+
+SportAffinity = Dict[int, float]
+
+_affinity_cache = TTLCache(maxsize=20000, ttl=AFFINITY_TTL, name="sport_affinity")
+
+# Bumped by every invalidation; a load that started before one is not cached
+_epoch = 0
+
+
+@dataclass(frozen=True)
+class _Attendance:
+    attendees: int  # bitmap of approved RSVPs
+    requested: int  # bitmap of every RSVP (pending, approved or rejected)
+    participants: int  # approved, not counting the host
+
+
+class AttendeeModel:
+    """Attendee bitmaps of upcoming events and the goal -> sport prior. Thread-safe."""
+
+    def __init__(self, goal_sports: Dict[int, SportAffinity]):
+        self.goal_sports = goal_sports
+        self._slots: Dict[int, int] = {}
+        self._events: Dict[int, _Attendance] = {}
+        self._lock = threading.Lock()
+
+    def set_event(self, event_id: int, host_id: Optional[int], rsvp_rows: Iterable[dict]) -> None:
+        attendees = requested = participants = 0
+        with self._lock:
+            for row in rsvp_rows:
+                user_id = row["user_id"]
+                slot = self._slots.get(user_id)
+                if slot is None:
+                    slot = self._slots[user_id] = len(self._slots)
+                bit = 1 << slot
+                requested |= bit
+                if row.get("status") == "approved":
+                    attendees |= bit
+                    if user_id != host_id:
+                        participants += 1
+            self._events[event_id] = _Attendance(attendees, requested, participants)
+
+    def attendance(self, event_id: int) -> Optional[_Attendance]:
+        return self._events.get(event_id)
+
+    def bitmap(self, user_ids: Iterable[int]) -> int:
+        """Bits of the given users; users without an RSVP to an upcoming event have none"""
+        bits = 0
+        for user_id in user_ids:
+            slot = self._slots.get(user_id)
+            if slot is not None:
+                bits |= 1 << slot
+        return bits
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._events
+
+
+# -- sport affinity -----------------------------------------------------------
+
+def _goal_sport_prior(supabase: Client) -> Dict[int, SportAffinity]:
+    """
+    goal id -> how common each sport is among users with that goal (largest = 1),
+    estimated from the goals of the most recent users (_PRIOR_SAMPLE rows)
+    """
+    goal_rows = supabase.table("user_goals").select("user_id, goal_id").order(
+        "user_id", desc=True
+    ).limit(_PRIOR_SAMPLE).execute().data or []
+    user_ids = sorted({row["user_id"] for row in goal_rows})
+    sport_rows = fetch_all(
+        lambda: supabase.table("user_sports").select("user_id, sport_id").in_("user_id", user_ids),
+        "user_id", "sport_id"
+    ) if user_ids else []
+    sports = defaultdict(list)
+    for row in sport_rows:
+        sports[row["user_id"]].append(row["sport_id"])
+    counts: Dict[int, Counter] = defaultdict(Counter)
+    for row in goal_rows:
+        counts[row["goal_id"]].update(sports.get(row["user_id"], ()))
+    prior = {}
+    for goal_id, counter in counts.items():
+        top = max(counter.values(), default=0)
+        if top:
+            prior[goal_id] = {sport_id: count / top for sport_id, count in counter.items()}
+    return prior
+
+
+def build_sport_affinity(
+    sport_ids: Iterable[int],
+    goal_ids: Iterable[int],
+    attended_sport_ids: Iterable[int],
+    goal_sports: Dict[int, SportAffinity]
+) -> SportAffinity:
+    """Sport id -> affinity in [0, 1]; empty when nothing is known about the user"""
+    vector: Dict[int, float] = defaultdict(float)
+    for sport_id in set(sport_ids):
+        vector[sport_id] += _DECLARED_WEIGHT
+    attended = Counter(attended_sport_ids)
+    if attended:
+        most = max(attended.values())
+        for sport_id, count in attended.items():
+            vector[sport_id] += _ATTENDED_WEIGHT * count / most
+    priors = [goal_sports[goal_id] for goal_id in set(goal_ids) if goal_id in goal_sports]
+    for prior in priors:
+        for sport_id, weight in prior.items():
+            vector[sport_id] += _GOAL_WEIGHT * weight / len(priors)
+    top = max(vector.values(), default=0)
+    return {sport_id: value / top for sport_id, value in vector.items()} if top else {}
+
+
+async def load_sport_affinity(supabase: Client, user_id: int, model: AttendeeModel) -> SportAffinity:
+    """The user's sport-affinity vector (cached; three concurrent queries on a miss)"""
+    cached = _affinity_cache.get(user_id)
+    if cached is not None:
+        return cached
+    epoch = _epoch
+    sports_result, goals_result, attended_result = await execute_concurrently(
+        supabase.table("user_sports").select("sport_id").eq("user_id", user_id),
+        supabase.table("user_goals").select("goal_id").eq("user_id", user_id),
+        supabase.table("event_rsvps").select("events(sport_id)").eq("user_id", user_id).eq("status", "approved"),
+    )
+
+    # A failed query counts as nothing known
+    def rows(result) -> list:
+        return [] if isinstance(result, Exception) else (result.data or [])
+
+    affinity = build_sport_affinity(
+        (r["sport_id"] for r in rows(sports_result)),
+        (r["goal_id"] for r in rows(goals_result)),
+        (r["events"]["sport_id"] for r in rows(attended_result) if r.get("events")),
+        model.goal_sports,
+    )
+    if epoch == _epoch:
+        _affinity_cache.set(user_id, affinity)
+    return affinity
+
+
+def invalidate_sport_affinity(user_id: int) -> None:
+    global _epoch
+    _epoch += 1
+    _affinity_cache.delete(user_id)
+
+
+def _on_interests_changed(event: UserInterestsChanged) -> None:
+    invalidate_sport_affinity(event.user_id)
+
+
+subscribe(UserInterestsChanged, _on_interests_changed)
+
+
+# -- attendee model -----------------------------------------------------------
+
+_dirty_events: Set[int] = set()
+_dirty_lock = threading.Lock()
+
+
+def _load_attendance(supabase: Client, model: AttendeeModel, events: List[dict]) -> None:
+    by_event = defaultdict(list)
+    event_ids = [e["id"] for e in events]
+    for i in range(0, len(event_ids), _RSVP_CHUNK):
+        chunk = event_ids[i:i + _RSVP_CHUNK]
+        rows = fetch_all(
+            lambda: supabase.table("event_rsvps").select("event_id, user_id, status").in_("event_id", chunk),
+            "event_id", "user_id"
+        )
+        for row in rows:
+            by_event[row["event_id"]].append(row)
+    for event in events:
+        model.set_event(event["id"], event.get("host_id"), by_event.get(event["id"], ()))
+
+
+def _build_model(supabase: Client) -> AttendeeModel:
+    model = AttendeeModel(_goal_sport_prior(supabase))
+    events = get_upcoming_index_blocking(supabase).query(datetime.now(timezone.utc))
+    _load_attendance(supabase, model, events)
+    return model
+
+
+def _mark_dirty(model: Optional[AttendeeModel], event_id: int) -> None:
+    # Also noted while a rebuild loads, so the event is reloaded into the new model too
+    with _dirty_lock:
+        _dirty_events.add(event_id)
+
+
+_local = LocalIndex(_build_model, MODEL_TTL, _mark_dirty)
+
+
+async def get_attendee_model(supabase: Client, events: List[dict]) -> AttendeeModel:
+    """
+    The model of this process, covering the given upcoming events: dirty
+    events and events it has not seen yet are loaded first (one round of queries).
+    """
+    model = await _local.get(supabase)
+    with _dirty_lock:
+        dirty = set(_dirty_events)
+        _dirty_events.clear()
+    stale = [e for e in events if e["id"] in dirty or e["id"] not in model]
+    if stale:
+        try:
+            _load_attendance(supabase, model, stale)
+        except Exception:
+            with _dirty_lock:
+                _dirty_events.update(dirty)
+            raise
+    return model
+
+
+def invalidate_event_attendees(event_id: int) -> None:
+    """Reload event_id's RSVPs before the next ranking (in this process)"""
+    _local.note(event_id)
+
+
+def reset_recommendations() -> None:
+    _local.reset()
+    with _dirty_lock:
+        _dirty_events.clear()
+
+
+# -- ranking ------------------------------------------------------------------
+
+def _proximity(viewer_point, viewer_location, event: dict) -> tuple:
+    """(proximity in [0, 1], distance in km or None)"""
+    event_point = point_of(event)
+    if viewer_point and event_point:
+        distance = haversine_km(*viewer_point, *event_point)
+        if distance <= 5:
+            return 1.0, distance
+        if distance <= 15:
+            return 0.8, distance
+        if distance <= 40:
+            return 0.5, distance
+        if distance <= 100:
+            return 0.2, distance
+        return 0.0, distance
+    event_location = normalize_location(event.get("location"))
+    if viewer_location.key and viewer_location.key == event_location.key:
+        return 0.8, None
+    if viewer_location.region and viewer_location.region == event_location.region:
+        return 0.3, None
+    return 0.0, None
+
+
+def rank_events(
+    viewer: dict,
+    affinity: SportAffinity,
+    buddies: int,
+    events: List[dict],
+    model: AttendeeModel,
+    limit: int,
+    radius_km: float = DEFAULT_RADIUS_KM
+) -> List[dict]:
+    """
+    The best `limit` events for the viewer as {"event", "score", "buddies_attending",
+    "distance_km"}, best first (soonest first on ties). Skips the viewer's own
+    events, events they already RSVPed to, private and full events, and
+    events known to be more than radius_km away.
+    """
+    viewer_id = viewer["id"]
+    viewer_bit = model.bitmap((viewer_id,))
+    viewer_point = point_of(viewer)
+    viewer_location = normalize_location(viewer.get("location"))
+    # Without a known interest every sport counts the same
+    default_affinity = 0.0 if affinity else 0.5
+
+    scored = []
+    for event in events:
+        if event.get("host_id") == viewer_id or not event.get("is_public", True):
+            continue
+        attendance = model.attendance(event["id"])
+        if attendance is None or attendance.requested & viewer_bit:
+            continue
+        capacity = event.get("max_participants") or 0
+        if capacity > 0:
+            left = capacity - attendance.participants
+            if left <= 0:
+                continue
+            room = left / capacity
+        else:
+            room = 1.0
+        proximity, distance = _proximity(viewer_point, viewer_location, event)
+        if distance is not None and distance > radius_km:
+            continue
+        attending = (attendance.attendees & buddies).bit_count() if buddies else 0
+        score = (
+            affinity.get(event.get("sport_id"), default_affinity) * 0.40
+            + proximity * 0.25
+            + min(attending, 3) / 3 * 0.25
+            + room * 0.10
+        )
+        scored.append((round(score * 100, 2), event, attending, distance))
+
+    best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]["start_time"], item[1]["id"]))
+    return [
+        {
+            "event": event,
+            "score": score,
+            "buddies_attending": attending,
+            "distance_km": round(distance, 1) if distance is not None else None,
+        }
+        for score, event, attending, distance in best
+    ]
+
+
+async def recommend_events(
+    supabase: Client,
+    viewer: dict,
+    limit: int,
+    offset: int = 0,
+    days: int = DEFAULT_DAYS,
+    radius_km: float = DEFAULT_RADIUS_KM
+) -> List[dict]:
+    """A page of rank_events() over the public events of the next `days` days"""
+    now = datetime.now(timezone.utc)
+    events = (await get_upcoming_index(supabase)).query(now, now + timedelta(days=days))
+    model = await get_attendee_model(supabase, events)
+
+    affinity = await load_sport_affinity(supabase, viewer["id"], model)
+    buddies_result = supabase.table("buddies").select("user1_id, user2_id").or_(
+        f"user1_id.eq.{viewer['id']},user2_id.eq.{viewer['id']}"
+    ).eq("status", "accepted").execute()
+    buddy_ids = [
+        b["user2_id"] if b["user1_id"] == viewer["id"] else b["user1_id"] for b in (buddies_result.data or [])
+    ]
+    ranked = rank_events(viewer, affinity, model.bitmap(buddy_ids), events, model, offset + limit, radius_km)
+    return ranked[offset:]
@@ -0,0 +1,38 @@
+from supabase import Client
+
+
+class RSVPError(ValueError):
+    """Raised when the RSVP engine rejects a state change. `code` is the error returned by apply_rsvp."""
+
+    def __init__(self, code: str, result: dict = None):
+        super().__init__(code)
+        self.code = code
+        self.result = result or {}
+
+
+def _apply(supabase: Client, event_id: int, user_id: int, action: str, actor_id: int = None) -> dict:
+    """
+    Run the apply_rsvp database function (see supabase_schema.sql).
+    Visibility, duplicate and capacity checks plus the write happen in one
+    transaction with the event row locked, so this is a single round-trip.
+    """
+    response = supabase.rpc("apply_rsvp", {
+        "p_event_id": event_id,
+        "p_user_id": user_id,
+        "p_action": action,
+        "p_actor_id": actor_id
+    }).execute()
+    result = response.data if isinstance(response.data, dict) else {}
+    if not result.get("ok"):
+        raise RSVPError(result.get("error") or "unknown", result)
+    return result
+
+
+def request_rsvp(supabase: Client, event_id: int, user_id: int) -> dict:
+    """Create a pending RSVP for user_id. Returns {"status", "participant_count"}."""
+    return _apply(supabase, event_id, user_id, "request", actor_id=user_id)
+
+
+def approve_rsvp(supabase: Client, event_id: int, user_id: int, host_id: int) -> dict:
+    """Approve user_id's RSVP on behalf of host_id, enforcing max_participants."""
+    return _apply(supabase, event_id, user_id, "approve", actor_id=host_id)
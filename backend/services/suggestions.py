@@ -0,0 +1,292 @@
+"""
+Precomputed buddy suggestions.
+
+compute_suggestions() is the batch job behind scripts/compute_buddy_suggestions.py:
+it loads the match features of every user once, scores every viewer against
+every discoverable, active candidate across a process pool, and stores each
+viewer's top-K in buddy_suggestions. /buddies/suggested serves pages from that
+table (load_stored_suggestions) and only falls back to live scoring when the
+table cannot answer the page.
+
+Incremental runs only rescore users whose profile changed (users.updated_at
+or created_at, which profile and interest writes bump) or who RSVPed since the
+last finished run started. Changed users get a full recompute; everyone else
+only has the changed users merged into their stored list.
+"""
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from supabase import Client
+
+from core.config import settings
+from core.database import fetch_all
+from services.buddying import CANDIDATE_COLUMNS, attach_interests, get_connected_user_ids
+from services.match_features import MatchFeatures, build_match_features, score_features
+
+WRITE_BATCH_SIZE = 500
+
+# Below this many viewers the pool costs more to start than it saves
+_MIN_PARALLEL_VIEWERS = 200
+
+Ranking = List[Tuple[int, float]]
+
+
+# -- loading ------------------------------------------------------------------
+
+def _load_population(supabase: Client) -> Tuple[Dict[int, MatchFeatures], List[int], Dict[int, Set[int]]]:
+    """(features of every user, ids of suggestible candidates, user id -> connected user ids)"""
+    users = fetch_all(lambda: supabase.table("users").select("id, age, location, latitude, longitude, is_active, is_discoverable"), "id")
+    sport_rows = fetch_all(lambda: supabase.table("user_sports").select("user_id, sport_id"), "user_id", "sport_id")
+    goal_rows = fetch_all(lambda: supabase.table("user_goals").select("user_id, goal_id"), "user_id", "goal_id")
+    rsvp_rows = fetch_all(lambda: supabase.table("event_rsvps").select("user_id").eq("status", "approved"), "event_id", "user_id")
+    buddy_rows = fetch_all(lambda: supabase.table("buddies").select("user1_id, user2_id"), "id")
+
+    features = build_match_features(users, sport_rows, goal_rows, rsvp_rows)
+    candidates = [u["id"] for u in users if u.get("is_discoverable") and u.get("is_active")]
+    connected: Dict[int, Set[int]] = {}
+    for row in buddy_rows:
+        connected.setdefault(row["user1_id"], set()).add(row["user2_id"])
+        connected.setdefault(row["user2_id"], set()).add(row["user1_id"])
+    return features, candidates, connected
+
+
+def _changed_user_ids(supabase: Client, since: str) -> Set[int]:
+    """Users whose profile, interests or RSVPs changed after `since`"""
+    changed = set()
+    for column in ("created_at", "updated_at"):
+        rows = fetch_all(lambda: supabase.table("users").select("id").gt(column, since), "id")
+        changed.update(r["id"] for r in rows)
+    rows = fetch_all(lambda: supabase.table("event_rsvps").select("user_id").gt("rsvp_at", since), "event_id", "user_id")
+    changed.update(r["user_id"] for r in rows)
+    return changed
+
+
+def _load_stored(supabase: Client) -> Dict[int, Ranking]:
+    rows = fetch_all(
+        lambda: supabase.table("buddy_suggestions").select("user_id, candidate_id, score"), "user_id", "candidate_id"
+    )
+    stored: Dict[int, Ranking] = {}
+    for row in rows:
+        stored.setdefault(row["user_id"], []).append((row["candidate_id"], row["score"]))
+    for ranking in stored.values():
+        ranking.sort(key=lambda item: item[1], reverse=True)
+    return stored
+
+
+def _last_finished_run(supabase: Client) -> Optional[dict]:
+    result = supabase.table("buddy_suggestion_runs").select("id, started_at").not_.is_(
+        "finished_at", "null"
+    ).order("started_at", desc=True).limit(1).execute()
+    return result.data[0] if result.data else None
+
+
+# -- scoring (runs in the worker processes) -----------------------------------
+
+_features: Dict[int, MatchFeatures] = {}
+_candidates: List[int] = []
+_connected: Dict[int, Set[int]] = {}
+
+
+def _init_worker(features: Dict[int, MatchFeatures], candidates: List[int], connected: Dict[int, Set[int]]) -> None:
+    global _features, _candidates, _connected
+    _features, _candidates, _connected = features, candidates, connected
+
+
+def _rank_chunk(task: Tuple[List[int], Optional[List[int]], int]) -> List[Tuple[int, Ranking]]:
+    """Top-k (candidate, score) per viewer, over the given candidates (None = all)"""
+    viewer_ids, candidate_ids, top_k = task
+    pool = _candidates if candidate_ids is None else candidate_ids
+    results = []
+    for viewer_id in viewer_ids:
+        viewer = _features[viewer_id]
+        excluded = _connected.get(viewer_id, ())
+        scored = (
+            (candidate_id, score_features(viewer, _features[candidate_id]))
+            for candidate_id in pool
+            if candidate_id != viewer_id and candidate_id not in excluded
+        )
+        results.append((viewer_id, heapq.nlargest(top_k, scored, key=lambda item: item[1])))
+    return results
+
+
+def _rank(
+    viewer_ids: List[int],
+    candidate_ids: Optional[List[int]],
+    top_k: int,
+    features: Dict[int, MatchFeatures],
+    candidates: List[int],
+    connected: Dict[int, Set[int]],
+    workers: int
+) -> Dict[int, Ranking]:
+    if not viewer_ids:
+        return {}
+    if workers <= 1 or len(viewer_ids) < _MIN_PARALLEL_VIEWERS:
+        _init_worker(features, candidates, connected)
+        return dict(_rank_chunk((viewer_ids, candidate_ids, top_k)))
+
+    # A few chunks per worker keeps the pool busy when chunks differ in cost
+    chunk_size = max(1, len(viewer_ids) // (workers * 4))
+    tasks = [(viewer_ids[i:i + chunk_size], candidate_ids, top_k) for i in range(0, len(viewer_ids), chunk_size)]
+    rankings: Dict[int, Ranking] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(features, candidates, connected)
+    ) as pool:
+        for chunk in pool.map(_rank_chunk, tasks):
+            rankings.update(chunk)
+    return rankings
+
+
+def _merge(
+    stored: Ranking,
+    fresh: Ranking,
+    changed: Set[int],
+    excluded: Iterable[int],
+    top_k: int
+) -> Optional[Ranking]:
+    """
+    Stored ranking updated with fresh scores against the changed candidates, or
+    None if it can no longer be trusted: an unchanged candidate that missed the
+    old cut-off may now belong in the top-k, so the viewer needs a full rescore.
+    """
+    excluded = set(excluded)
+    kept = [(c, s) for c, s in stored if c not in changed and c not in excluded]
+    merged = heapq.nlargest(top_k, kept + fresh, key=lambda item: item[1])
+    if len(stored) < top_k:
+        # The old list held every candidate, so nothing was cut off
+        return merged
+    cutoff = stored[-1][1]
+    if len(merged) < top_k or merged[-1][1] < cutoff:
+        return None
+    return merged
+
+
+# -- storing ------------------------------------------------------------------
+
+def _write(supabase: Client, rankings: Dict[int, Ranking], clear: Iterable[int] = ()) -> None:
+    """Replace the stored suggestions of every user in rankings (and delete those in clear)"""
+    user_ids = sorted(set(rankings) | set(clear))
+    computed_at = datetime.now(timezone.utc).isoformat()
+    for i in range(0, len(user_ids), WRITE_BATCH_SIZE):
+        chunk = user_ids[i:i + WRITE_BATCH_SIZE]
+        supabase.table("buddy_suggestions").delete().in_("user_id", chunk).execute()
+        rows = [
+            {"user_id": user_id, "candidate_id": candidate_id, "score": score, "computed_at": computed_at}
+            for user_id in chunk
+            for candidate_id, score in rankings.get(user_id, ())
+        ]
+        for j in range(0, len(rows), WRITE_BATCH_SIZE):
+            supabase.table("buddy_suggestions").insert(rows[j:j + WRITE_BATCH_SIZE]).execute()
+
+
+def compute_suggestions(
+    supabase: Client,
+    full: bool = False,
+    top_k: Optional[int] = None,
+    workers: Optional[int] = None
+) -> dict:
+    """
+    Compute and store buddy suggestions. Runs incrementally when a previous run
+    finished, unless full is set. Returns a summary of the run.
+    """
+    top_k = top_k or settings.BUDDY_SUGGESTIONS_TOP_K
+    workers = workers or os.cpu_count() or 1
+
+    previous = None if full else _last_finished_run(supabase)
+    run = supabase.table("buddy_suggestion_runs").insert({"is_full": previous is None}).execute().data[0]
+
+    features, candidates, connected = _load_population(supabase)
+    suggestible = set(candidates)
+
+    if previous is None:
+        rankings = _rank(candidates, None, top_k, features, candidates, connected, workers)
+        # Users who are no longer suggestible lose their lists
+        stale = _load_stored(supabase).keys() - suggestible
+        rescored = len(rankings)
+    else:
+        changed = _changed_user_ids(supabase, previous["started_at"]) & features.keys()
+        stored = _load_stored(supabase)
+        stale = stored.keys() - suggestible
+
+        # Changed viewers, and suggestible users without a stored list, are scored from scratch ...
+        full_viewers = sorted((changed | (suggestible - stored.keys())) & suggestible)
+        rankings = _rank(full_viewers, None, top_k, features, candidates, connected, workers)
+
+        # ... everyone else only against the changed candidates, merged into their stored list
+        changed_candidates = sorted(changed & suggestible)
+        others = sorted((stored.keys() & suggestible) - changed)
+        fresh = {}
+        if changed_candidates:
+            fresh = _rank(others, changed_candidates, top_k, features, candidates, connected, workers)
+        retry = []
+        for viewer_id in others:
+            merged = _merge(stored[viewer_id], fresh.get(viewer_id, []), changed, connected.get(viewer_id, ()), top_k)
+            if merged is None:
+                retry.append(viewer_id)
+            elif set(merged) != set(stored[viewer_id]):
+                rankings[viewer_id] = merged
+        rankings.update(_rank(retry, None, top_k, features, candidates, connected, workers))
+        rescored = len(full_viewers) + len(retry)
+
+    _write(supabase, rankings, stale)
+    supabase.table("buddy_suggestion_runs").update({
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "users_scored": len(rankings),
+    }).eq("id", run["id"]).execute()
+    return {
+        "run_id": run["id"],
+        "full": previous is None,
+        "users": len(features),
+        "candidates": len(candidates),
+        "rescored": rescored,
+        "written": len(rankings),
+        "cleared": len(stale),
+    }
+
+
+# -- serving ------------------------------------------------------------------
+
+async def load_stored_suggestions(
+    supabase: Client,
+    user_id: int,
+    offset: int,
+    limit: int
+) -> Optional[List[dict]]:
+    """
+    A page of precomputed suggestions, shaped like find_potential_buddies()
+    results ({"user", "score"}, with sports and goals), or None when the stored
+    list cannot serve it: nothing stored for the user, or the page runs past a
+    truncated top-K list. Buddies made since the last run and candidates that
+    stopped being discoverable are skipped.
+    """
+    result = supabase.table("buddy_suggestions").select("candidate_id, score").eq(
+        "user_id", user_id
+    ).order("score", desc=True).execute()
+    stored = result.data or []
+    if not stored:
+        return None
+
+    try:
+        connected: FrozenSet[int] = get_connected_user_ids(supabase, user_id)
+    except Exception:
+        connected = frozenset()
+    ranked = [row for row in stored if row["candidate_id"] not in connected]
+    # A list shorter than top-K held every candidate, so any page is answered
+    if offset + limit > len(ranked) and len(stored) >= settings.BUDDY_SUGGESTIONS_TOP_K:
+        return None
+
+    page = ranked[offset:offset + limit]
+    if not page:
+        return []
+    users_result = supabase.table("users").select(CANDIDATE_COLUMNS).in_(
+        "id", [row["candidate_id"] for row in page]
+    ).eq("is_active", True).eq("is_discoverable", True).execute()
+    users = {u["id"]: u for u in (users_result.data or [])}
+    buddies = [
+        {"user": users[row["candidate_id"]], "score": row["score"]}
+        for row in page if row["candidate_id"] in users
+    ]
+    await attach_interests(supabase, [b["user"] for b in buddies])
+    return buddies
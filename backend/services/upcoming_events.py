@@ -0,0 +1,226 @@
+"""
+In-process index of upcoming events for date-range browsing.
+
+Every non-cancelled event starting today (UTC) or later sits in a bucket per
+start day and sport (plus an all-sports bucket per day), each kept sorted by
+start time. A date-range query walks the day buckets in range and slices
+the first and last with bisect, so it costs O(days + results) however many
+events exist, with no database round trip.
+
+The event mutation endpoints keep this process's index current (index_event,
+unindex_event). Other workers' writes show up at the next rebuild, every
+INDEX_TTL in a background thread (core.local_index); past days are dropped
+as the date changes.
+"""
+import bisect
+import threading
+from datetime import date, datetime, time as dt_time, timezone
+from typing import Dict, List, Optional, Tuple
+
+from supabase import Client
+
+from core.database import fetch_all
+from core.local_index import LocalIndex
+
+# Columns behind an EventResponse card; list queries select only these (not "*")
+EVENT_CARD_COLUMNS = (
+    "id, title, description, sport_id, host_id, location, start_time, end_time, max_participants, "
+    "is_cancelled, is_public, image_url, cover_image_url, created_at, updated_at"
+)
+INDEX_COLUMNS = f"{EVENT_CARD_COLUMNS}, latitude, longitude"
+_INDEX_FIELDS = tuple(column.strip() for column in INDEX_COLUMNS.split(","))
+
+INDEX_TTL = 60
+
+# Bucket key for every sport of a day
+_ALL_SPORTS = None
+
+_Entry = Tuple[datetime, int]  # (start_time, event id)
+
+
+def parse_timestamp(value) -> datetime:
+    """A timestamptz column or query parameter as an aware datetime (naive values are UTC)"""
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class UpcomingEventIndex:
+    """Day/sport buckets of event rows from `floor` (a UTC day) on. Thread-safe."""
+
+    def __init__(self, floor: date):
+        self.floor = floor
+        self._rows: Dict[int, dict] = {}
+        self._entries: Dict[int, Tuple[date, Optional[int], _Entry]] = {}
+        self._days: Dict[date, Dict[Optional[int], List[_Entry]]] = {}
+        self._day_keys: List[date] = []
+        self._lock = threading.Lock()
+
+    def add(self, row: dict) -> None:
+        """Index (or reindex) an events row; cancelled and past events are dropped"""
+        event_id = row["id"]
+        with self._lock:
+            self._remove(event_id)
+            if row.get("is_cancelled") or row.get("start_time") is None:
+                return
+            start = parse_timestamp(row["start_time"])
+            day = start.astimezone(timezone.utc).date()
+            if day < self.floor:
+                return
+            entry = (start, event_id)
+            sport_id = row.get("sport_id")
+            buckets = self._days.get(day)
+            if buckets is None:
+                buckets = self._days[day] = {}
+                bisect.insort(self._day_keys, day)
+            for key in (_ALL_SPORTS, sport_id):
+                bisect.insort(buckets.setdefault(key, []), entry)
+            self._rows[event_id] = {field: row.get(field) for field in _INDEX_FIELDS}
+            self._entries[event_id] = (day, sport_id, entry)
+
+    def remove(self, event_id: int) -> None:
+        with self._lock:
+            self._remove(event_id)
+
+    def _remove(self, event_id: int) -> None:
+        indexed = self._entries.pop(event_id, None)
+        if indexed is None:
+            return
+        day, sport_id, entry = indexed
+        del self._rows[event_id]
+        buckets = self._days[day]
+        for key in (_ALL_SPORTS, sport_id):
+            bucket = buckets[key]
+            position = bisect.bisect_left(bucket, entry)
+            if position < len(bucket) and bucket[position] == entry:
+                del bucket[position]
+            if not bucket:
+                del buckets[key]
+        if not buckets:
+            del self._days[day]
+            del self._day_keys[bisect.bisect_left(self._day_keys, day)]
+
+    def expire(self, today: date) -> None:
+        """Drop the days before today"""
+        with self._lock:
+            if today <= self.floor:
+                return
+            self.floor = today
+            passed = self._day_keys[:bisect.bisect_left(self._day_keys, today)]
+            del self._day_keys[:len(passed)]
+            for day in passed:
+                for entry in self._days.pop(day)[_ALL_SPORTS]:
+                    self._rows.pop(entry[1], None)
+                    self._entries.pop(entry[1], None)
+
+    def covers(self, start: datetime) -> bool:
+        """True if every event starting at or after start is indexed"""
+        return start.astimezone(timezone.utc).date() >= self.floor
+
+    def query(self, start: datetime, end: Optional[datetime] = None, sport_id: Optional[int] = None) -> List[dict]:
+        """Rows of the events starting in [start, end] (end None = no limit), by start time"""
+        low = (start, -1)
+        rows = []
+        with self._lock:
+            first = bisect.bisect_left(self._day_keys, start.astimezone(timezone.utc).date())
+            last = len(self._day_keys)
+            if end is not None:
+                last = bisect.bisect_right(self._day_keys, end.astimezone(timezone.utc).date())
+                high = (end, float("inf"))
+            for day in self._day_keys[first:last]:
+                bucket = self._days[day].get(sport_id)
+                if not bucket:
+                    continue
+                i = bisect.bisect_left(bucket, low) if day == self._day_keys[first] else 0
+                j = bisect.bisect_right(bucket, high) if end is not None and day == self._day_keys[last - 1] else len(bucket)
+                rows.extend(self._rows[event_id] for _, event_id in bucket[i:j])
+        return rows
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# -- process-wide index -------------------------------------------------------
+
+def _load(supabase: Client) -> UpcomingEventIndex:
+    floor = _today()
+    since = datetime.combine(floor, dt_time.min, tzinfo=timezone.utc).isoformat()
+    rows = fetch_all(
+        lambda: supabase.table("events").select(INDEX_COLUMNS).eq("is_cancelled", False).gte("start_time", since),
+        "id"
+    )
+    index = UpcomingEventIndex(floor)
+    for row in rows:
+        index.add(row)
+    return index
+
+
+def _apply_write(index: Optional[UpcomingEventIndex], write: Tuple[int, Optional[dict]]) -> None:
+    """write is (event id, events row), or (event id, None) for a deleted event"""
+    if index is None:
+        return
+    event_id, row = write
+    if row is None:
+        index.remove(event_id)
+    else:
+        index.add(row)
+
+
+_local = LocalIndex(_load, INDEX_TTL, _apply_write)
+
+
+def get_upcoming_index_blocking(supabase: Client) -> UpcomingEventIndex:
+    """
+    The index of this process. The first call builds it; an expired index
+    keeps serving while a background thread rebuilds it.
+    """
+    index = _local.get_blocking(supabase)
+    index.expire(_today())
+    return index
+
+
+async def get_upcoming_index(supabase: Client) -> UpcomingEventIndex:
+    """get_upcoming_index_blocking() with the first build in a worker thread"""
+    index = await _local.get(supabase)
+    index.expire(_today())
+    return index
+
+
+async def upcoming_events(
+    supabase: Client,
+    start: datetime,
+    end: Optional[datetime] = None,
+    sport_id: Optional[int] = None
+) -> Optional[List[dict]]:
+    """
+    Non-cancelled events (INDEX_COLUMNS rows, not to be modified) starting in
+    [start, end], by start time - or None when start is before today, which
+    the index does not hold.
+    """
+    start = parse_timestamp(start)
+    if start.astimezone(timezone.utc).date() < _today():
+        return None
+    index = await get_upcoming_index(supabase)
+    if not index.covers(start):
+        return None
+    return index.query(start, parse_timestamp(end) if end is not None else None, sport_id)
+
+
+def index_event(row: dict) -> None:
+    """Apply a created or updated events row (all INDEX_COLUMNS) to this process's index"""
+    _local.note((row["id"], row))
+
+
+def unindex_event(event_id: int) -> None:
+    """Drop a deleted event from this process's index"""
+    _local.note((event_id, None))
+
+
+def reset_upcoming_index() -> None:
+    _local.reset()
@@ -0,0 +1,66 @@
+"""
+Shared cache of user summaries - the id, full_name and avatar_url shown for
+post authors, message senders, event hosts and group members.
+
+Summaries are read far more often than they change, so lookups are served
+from a process-local LRU/TTL cache and only the misses are fetched, in one
+`in_` query. Profile writes publish UserProfileChanged, which drops the
+user's entry; other workers pick the change up within SUMMARY_TTL.
+"""
+from typing import Dict, Iterable, Optional
+
+from supabase import Client
+
+from core.cache import TTLCache
+from core.events import UserProfileChanged, subscribe
+
+SUMMARY_COLUMNS = "id, full_name, avatar_url"
+SUMMARY_TTL = 300
+
+_summary_cache = TTLCache(maxsize=20000, ttl=SUMMARY_TTL, name="user_summary")
+
+# Bumped by every invalidation. A fetch that started before an invalidation
+# may have read the old row, so its results are returned but not cached.
+_epoch = 0
+
+
+def get_user_summaries(supabase: Client, user_ids: Iterable[Optional[int]]) -> Dict[int, dict]:
+    """
+    {user_id: {"id", "full_name", "avatar_url"}} for the given ids (None is
+    ignored). Ids without a users row are left out. Each summary is a fresh
+    dict the caller may modify. Query errors propagate to the caller.
+    """
+    wanted = {user_id for user_id in user_ids if user_id is not None}
+    if not wanted:
+        return {}
+    found = _summary_cache.get_many(wanted)
+    missing = wanted - found.keys()
+    if missing:
+        epoch = _epoch
+        result = supabase.table("users").select(SUMMARY_COLUMNS).in_("id", sorted(missing)).execute()
+        for row in result.data or []:
+            summary = {"id": row["id"], "full_name": row.get("full_name"), "avatar_url": row.get("avatar_url")}
+            if epoch == _epoch:
+                _summary_cache.set(row["id"], summary)
+            found[row["id"]] = summary
+    return {user_id: dict(summary) for user_id, summary in found.items()}
+
+
+def get_user_summary(supabase: Client, user_id: Optional[int]) -> Optional[dict]:
+    """Summary for one user, or None if the user does not exist"""
+    if user_id is None:
+        return None
+    return get_user_summaries(supabase, (user_id,)).get(user_id)
+
+
+def invalidate_user_summary(user_id: int) -> None:
+    global _epoch
+    _epoch += 1
+    _summary_cache.delete(user_id)
+
+
+def _on_profile_changed(event: UserProfileChanged) -> None:
+    invalidate_user_summary(event.user_id)
+
+
+subscribe(UserProfileChanged, _on_profile_changed)
@@ -45,6 +45,10 @@ CREATE TABLE IF NOT EXISTS public.users (
     age INTEGER,
     bio TEXT,
     location VARCHAR,
+    -- Geocoded from location by the offline gazetteer (services/geocoder.py)
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    geohash VARCHAR(12),
     avatar_url VARCHAR,
     cover_image_url VARCHAR,
     role user_role DEFAULT 'user',
@@ -81,6 +85,16 @@ CREATE TABLE IF NOT EXISTS public.waitlist_entries (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Buddy suggestion job runs (no dependencies). started_at of the last finished
+-- run is the watermark for incremental reruns.
+CREATE TABLE IF NOT EXISTS public.buddy_suggestion_runs (
+    id SERIAL PRIMARY KEY,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE,
+    is_full BOOLEAN NOT NULL DEFAULT false,
+    users_scored INTEGER
+);
+
 -- ============================================================================
 -- STEP 3: Create tables that depend on users only
 -- ============================================================================
@@ -126,6 +140,9 @@ CREATE TABLE IF NOT EXISTS public.buddies (
     status buddy_status DEFAULT 'pending',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE,
+    -- Canonical (unordered) pair key: one relationship per pair of users
+    low_id INTEGER GENERATED ALWAYS AS (LEAST(user1_id, user2_id)) STORED,
+    high_id INTEGER GENERATED ALWAYS AS (GREATEST(user1_id, user2_id)) STORED,
     CONSTRAINT fk_buddies_user1 FOREIGN KEY (user1_id) REFERENCES public.users(id) ON DELETE CASCADE,
     CONSTRAINT fk_buddies_user2 FOREIGN KEY (user2_id) REFERENCES public.users(id) ON DELETE CASCADE,
     CONSTRAINT check_different_users CHECK (user1_id != user2_id)
@@ -155,6 +172,9 @@ CREATE TABLE IF NOT EXISTS public.events (
     sport_id INTEGER NOT NULL,
     host_id INTEGER NOT NULL,
     location VARCHAR NOT NULL,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    geohash VARCHAR(12),
     start_time TIMESTAMP WITH TIME ZONE NOT NULL,
     end_time TIMESTAMP WITH TIME ZONE,
     max_participants INTEGER,
@@ -224,6 +244,17 @@ CREATE TABLE IF NOT EXISTS public.likes (
     CONSTRAINT fk_likes_user FOREIGN KEY (user_id) REFERENCES public.users(id) ON DELETE CASCADE
 );
 
+-- Precomputed top-K buddy suggestions per user (written by scripts/compute_buddy_suggestions.py)
+CREATE TABLE IF NOT EXISTS public.buddy_suggestions (
+    user_id INTEGER NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    score FLOAT NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, candidate_id),
+    CONSTRAINT fk_buddy_suggestions_user FOREIGN KEY (user_id) REFERENCES public.users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_buddy_suggestions_candidate FOREIGN KEY (candidate_id) REFERENCES public.users(id) ON DELETE CASCADE
+);
+
 -- ============================================================================
 -- STEP 6: Create tables that depend on multiple tables
 -- ============================================================================
@@ -252,6 +283,8 @@ CREATE TABLE IF NOT EXISTS public.messages (
 CREATE INDEX IF NOT EXISTS idx_users_email ON public.users(email);
 CREATE INDEX IF NOT EXISTS idx_users_is_active ON public.users(is_active);
 CREATE INDEX IF NOT EXISTS idx_users_is_discoverable ON public.users(is_discoverable);
+-- Prefix (LIKE 'abc%') range scans for radius queries
+CREATE INDEX IF NOT EXISTS idx_users_geohash ON public.users(geohash text_pattern_ops);
 
 -- Sports indexes
 CREATE INDEX IF NOT EXISTS idx_sports_name ON public.sports(name);
@@ -267,6 +300,7 @@ CREATE INDEX IF NOT EXISTS idx_events_title ON public.events(title);
 CREATE INDEX IF NOT EXISTS idx_events_start_time ON public.events(start_time);
 CREATE INDEX IF NOT EXISTS idx_events_host_id ON public.events(host_id);
 CREATE INDEX IF NOT EXISTS idx_events_sport_id ON public.events(sport_id);
+CREATE INDEX IF NOT EXISTS idx_events_geohash ON public.events(geohash text_pattern_ops);
 
 -- Event RSVPs indexes
 CREATE INDEX IF NOT EXISTS idx_event_rsvps_event_id ON public.event_rsvps(event_id);
@@ -277,6 +311,10 @@ CREATE INDEX IF NOT EXISTS idx_event_rsvps_status ON public.event_rsvps(status);
 CREATE INDEX IF NOT EXISTS idx_buddies_user1_id ON public.buddies(user1_id);
 CREATE INDEX IF NOT EXISTS idx_buddies_user2_id ON public.buddies(user2_id);
 CREATE INDEX IF NOT EXISTS idx_buddies_status ON public.buddies(status);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_buddies_pair ON public.buddies(low_id, high_id);
+
+-- Buddy suggestions indexes
+CREATE INDEX IF NOT EXISTS idx_buddy_suggestions_user_score ON public.buddy_suggestions(user_id, score DESC);
 
 -- Posts indexes
 CREATE INDEX IF NOT EXISTS idx_posts_user_id ON public.posts(user_id);
@@ -367,7 +405,232 @@ CREATE TRIGGER on_auth_user_created
     EXECUTE FUNCTION public.handle_new_user();
 
 -- ============================================================================
--- STEP 10: Notify PostgREST to reload schema cache
+-- STEP 10: RSVP engine
+-- ============================================================================
+
+-- Applies an RSVP request or host approval in a single transaction.
+-- The event row is locked, so concurrent RSVPs cannot overbook max_participants.
+-- Returns {"ok": bool, "error": code, "status": rsvp status, "participant_count": n}
+CREATE OR REPLACE FUNCTION public.apply_rsvp(
+    p_event_id INTEGER,
+    p_user_id INTEGER,
+    p_action TEXT,
+    p_actor_id INTEGER DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_event RECORD;
+    v_current TEXT;
+    v_count INTEGER := 0;
+    v_inserted INTEGER;
+BEGIN
+    -- Lock the event row so concurrent RSVPs for the same event are serialized
+    SELECT id, host_id, max_participants, is_cancelled, is_public
+      INTO v_event
+      FROM public.events
+     WHERE id = p_event_id
+       FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('ok', false, 'error', 'event_not_found');
+    END IF;
+
+    IF p_action = 'request' THEN
+        IF v_event.is_cancelled THEN
+            RETURN jsonb_build_object('ok', false, 'error', 'event_cancelled');
+        END IF;
+        -- Private events only take requests from the host's accepted buddies
+        IF NOT COALESCE(v_event.is_public, true)
+           AND p_user_id IS DISTINCT FROM v_event.host_id
+           AND NOT EXISTS (
+               SELECT 1
+                 FROM public.buddies
+                WHERE low_id = LEAST(p_user_id, v_event.host_id)
+                  AND high_id = GREATEST(p_user_id, v_event.host_id)
+                  AND status = 'accepted'
+           ) THEN
+            RETURN jsonb_build_object('ok', false, 'error', 'event_private');
+        END IF;
+    ELSIF p_action = 'approve' THEN
+        IF v_event.host_id IS DISTINCT FROM p_actor_id THEN
+            RETURN jsonb_build_object('ok', false, 'error', 'not_host');
+        END IF;
+    ELSE
+        RETURN jsonb_build_object('ok', false, 'error', 'invalid_action');
+    END IF;
+
+    SELECT status::TEXT
+      INTO v_current
+      FROM public.event_rsvps
+     WHERE event_id = p_event_id AND user_id = p_user_id;
+
+    IF p_action = 'request' AND FOUND THEN
+        RETURN jsonb_build_object('ok', false, 'error', 'already_rsvpd', 'status', v_current);
+    END IF;
+    IF p_action = 'approve' AND NOT FOUND THEN
+        RETURN jsonb_build_object('ok', false, 'error', 'rsvp_not_found');
+    END IF;
+
+    -- Capacity counts approved participants, excluding the host
+    SELECT COUNT(*)
+      INTO v_count
+      FROM public.event_rsvps
+     WHERE event_id = p_event_id
+       AND status = 'approved'
+       AND user_id IS DISTINCT FROM v_event.host_id;
+
+    IF p_action = 'approve' AND v_current = 'approved' THEN
+        RETURN jsonb_build_object('ok', true, 'status', 'approved', 'participant_count', v_count);
+    END IF;
+
+    IF COALESCE(v_event.max_participants, 0) > 0 AND v_count >= v_event.max_participants THEN
+        RETURN jsonb_build_object('ok', false, 'error', 'event_full', 'participant_count', v_count);
+    END IF;
+
+    IF p_action = 'request' THEN
+        -- All RSVPs require manual host approval
+        INSERT INTO public.event_rsvps (event_id, user_id, status, attended)
+        VALUES (p_event_id, p_user_id, 'pending', false)
+        ON CONFLICT (event_id, user_id) DO NOTHING;
+        GET DIAGNOSTICS v_inserted = ROW_COUNT;
+        IF v_inserted = 0 THEN
+            RETURN jsonb_build_object('ok', false, 'error', 'already_rsvpd');
+        END IF;
+        RETURN jsonb_build_object('ok', true, 'status', 'pending', 'participant_count', v_count);
+    END IF;
+
+    UPDATE public.event_rsvps
+       SET status = 'approved'
+     WHERE event_id = p_event_id AND user_id = p_user_id;
+    RETURN jsonb_build_object('ok', true, 'status', 'approved', 'participant_count', v_count + 1);
+END;
+$$ LANGUAGE plpgsql;
+
+-- p_actor_id is trusted input from the backend; keep the function off the public API roles
+REVOKE EXECUTE ON FUNCTION public.apply_rsvp(INTEGER, INTEGER, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- ============================================================================
+-- STEP 11: Profile interests (diff-based sports/goals update)
+-- ============================================================================
+
+-- Replaces a user's sports and/or goals with the given id sets by applying
+-- only the difference, in one transaction. A NULL array leaves that set unchanged.
+-- Returns {"sports_added": [...], "sports_removed": [...], "goals_added": [...], "goals_removed": [...]}
+CREATE OR REPLACE FUNCTION public.set_user_interests(
+    p_user_id INTEGER,
+    p_sport_ids INTEGER[] DEFAULT NULL,
+    p_goal_ids INTEGER[] DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_sports_added INTEGER[] := '{}';
+    v_sports_removed INTEGER[] := '{}';
+    v_goals_added INTEGER[] := '{}';
+    v_goals_removed INTEGER[] := '{}';
+BEGIN
+    IF p_sport_ids IS NOT NULL THEN
+        WITH removed AS (
+            DELETE FROM public.user_sports
+             WHERE user_id = p_user_id
+               AND NOT (sport_id = ANY (p_sport_ids))
+            RETURNING sport_id
+        )
+        SELECT COALESCE(array_agg(sport_id), '{}') INTO v_sports_removed FROM removed;
+
+        WITH added AS (
+            INSERT INTO public.user_sports (user_id, sport_id)
+            SELECT DISTINCT p_user_id, s FROM unnest(p_sport_ids) AS s WHERE s IS NOT NULL
+            ON CONFLICT (user_id, sport_id) DO NOTHING
+            RETURNING sport_id
+        )
+        SELECT COALESCE(array_agg(sport_id), '{}') INTO v_sports_added FROM added;
+    END IF;
+
+    IF p_goal_ids IS NOT NULL THEN
+        WITH removed AS (
+            DELETE FROM public.user_goals
+             WHERE user_id = p_user_id
+               AND NOT (goal_id = ANY (p_goal_ids))
+            RETURNING goal_id
+        )
+        SELECT COALESCE(array_agg(goal_id), '{}') INTO v_goals_removed FROM removed;
+
+        WITH added AS (
+            INSERT INTO public.user_goals (user_id, goal_id)
+            SELECT DISTINCT p_user_id, g FROM unnest(p_goal_ids) AS g WHERE g IS NOT NULL
+            ON CONFLICT (user_id, goal_id) DO NOTHING
+            RETURNING goal_id
+        )
+        SELECT COALESCE(array_agg(goal_id), '{}') INTO v_goals_added FROM added;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'sports_added', to_jsonb(v_sports_added),
+        'sports_removed', to_jsonb(v_sports_removed),
+        'goals_added', to_jsonb(v_goals_added),
+        'goals_removed', to_jsonb(v_goals_removed)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- p_user_id is trusted input from the backend; keep the function off the public API roles
+REVOKE EXECUTE ON FUNCTION public.set_user_interests(INTEGER, INTEGER[], INTEGER[]) FROM PUBLIC, anon, authenticated;
+
+-- ============================================================================
+-- STEP 12: Event map clusters
+-- ============================================================================
+
+-- Counts the non-cancelled events in each geohash cell of p_cells (one range scan
+-- of idx_events_geohash per cell) and picks up to p_sample representative events
+-- per cell: upcoming ones soonest first, then the most recent past ones.
+-- Returns [{"cell", "count", "latitude", "longitude", "south", "west", "north", "east", "event_ids"}]
+CREATE OR REPLACE FUNCTION public.event_map_clusters(
+    p_cells TEXT[],
+    p_sport_id INTEGER DEFAULT NULL,
+    p_start TIMESTAMPTZ DEFAULT NULL,
+    p_end TIMESTAMPTZ DEFAULT NULL,
+    p_sample INTEGER DEFAULT 3
+)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_agg(to_jsonb(c) ORDER BY c.count DESC, c.cell), '[]'::jsonb)
+      FROM (
+        SELECT cell,
+               COUNT(*) AS count,
+               AVG(e.latitude) AS latitude,
+               AVG(e.longitude) AS longitude,
+               MIN(e.latitude) AS south,
+               MIN(e.longitude) AS west,
+               MAX(e.latitude) AS north,
+               MAX(e.longitude) AS east,
+               (ARRAY_AGG(e.id ORDER BY e.start_time < NOW(), ABS(EXTRACT(EPOCH FROM e.start_time - NOW()))))[1:p_sample] AS event_ids
+          FROM unnest(p_cells) AS cell
+          -- Prefix range that idx_events_geohash (text_pattern_ops) serves; '{' sorts after every geohash character
+          JOIN public.events e ON e.geohash ~>=~ cell AND e.geohash ~<~ (cell || '{')
+         WHERE NOT e.is_cancelled
+           AND (p_sport_id IS NULL OR e.sport_id = p_sport_id)
+           AND (p_start IS NULL OR e.start_time >= p_start)
+           AND (p_end IS NULL OR e.start_time <= p_end)
+         GROUP BY cell
+      ) AS c;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================================================
+-- STEP 13: Approved RSVP counts
+-- ============================================================================
+
+-- Approved RSVPs per user for the buddy scorer's activity bucket
+-- (services/match_features.py); users without any are left out.
+CREATE OR REPLACE FUNCTION public.approved_rsvp_counts(p_user_ids INTEGER[])
+RETURNS TABLE (user_id INTEGER, count BIGINT) AS $$
+    SELECT r.user_id, COUNT(*)
+      FROM public.event_rsvps r
+     WHERE r.user_id = ANY(p_user_ids)
+       AND r.status = 'approved'
+     GROUP BY r.user_id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================================================
+-- STEP 14: Notify PostgREST to reload schema cache
 -- ============================================================================
 
 -- This tells PostgREST to refresh its schema cache and recognize the new tables
@@ -1,9 +1,10 @@
 'use client';
 
 import { useEffect, useState, useRef } from 'react';
-import { MapContainer, TileLayer, Marker, Popup, useMap } from 'react-leaflet';
+import { MapContainer, TileLayer, Marker, Popup, useMap, useMapEvents } from 'react-leaflet';
 import L from 'leaflet';
-import { Event } from '@/types';
+import { EventMapCluster } from '@/types';
+import { api } from '@/lib/api';
 import Link from 'next/link';
 import 'leaflet/dist/leaflet.css';
 
@@ -16,55 +17,10 @@ L.Icon.Default.mergeOptions({
 });
 
 interface EventsMapProps {
-  events: Event[];
+  sportId?: number;
   userLocation?: { lat: number; lng: number };
 }
 
-// Simple geocoding function (using known locations for Bay Area)
-const geocodeLocation = (location: string): { lat: number; lng: number } | null => {
-  const locationLower = location.toLowerCase();
-  
-  // San Francisco locations
-  if (locationLower.includes('golden gate park') || locationLower.includes('san francisco')) {
-    return { lat: 37.7694, lng: -122.4862 };
-  }
-  if (locationLower.includes('dolores park')) {
-    return { lat: 37.7597, lng: -122.4281 };
-  }
-  if (locationLower.includes('mission bay')) {
-    return { lat: 37.7706, lng: -122.3892 };
-  }
-  if (locationLower.includes('aquatic park')) {
-    return { lat: 37.8067, lng: -122.4231 };
-  }
-  if (locationLower.includes('market st')) {
-    return { lat: 37.7849, lng: -122.4094 };
-  }
-  
-  // Oakland locations
-  if (locationLower.includes('oakland')) {
-    return { lat: 37.8044, lng: -122.2711 };
-  }
-  
-  // Berkeley locations
-  if (locationLower.includes('berkeley')) {
-    return { lat: 37.8715, lng: -122.2730 };
-  }
-  
-  // Sausalito
-  if (locationLower.includes('sausalito')) {
-    return { lat: 37.8591, lng: -122.4853 };
-  }
-  
-  // Fremont / Mission Peak
-  if (locationLower.includes('mission peak') || locationLower.includes('fremont')) {
-    return { lat: 37.5153, lng: -121.8804 };
-  }
-  
-  // Default to San Francisco center
-  return { lat: 37.7749, lng: -122.4194 };
-};
-
 // Custom marker icon
 const createCustomIcon = (color: string = '#0ef9b4') => {
   return L.divIcon({
@@ -95,6 +51,100 @@ const createCustomIcon = (color: string = '#0ef9b4') => {
   });
 };
 
+// Cluster bubble with the number of events it stands for
+const createClusterIcon = (count: number) => {
+  const size = count < 10 ? 36 : count < 100 ? 44 : 52;
+  return L.divIcon({
+    className: 'custom-cluster',
+    html: `
+      <div style="
+        width: ${size}px;
+        height: ${size}px;
+        background-color: #0ef9b4;
+        border: 3px solid white;
+        border-radius: 50%;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.3);
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        font-weight: 700;
+        color: black;
+      ">${count}</div>
+    `,
+    iconSize: [size, size],
+    iconAnchor: [size / 2, size / 2],
+  });
+};
+
+// Loads server-side clusters for the visible bounds whenever the map stops moving
+function ClusterLoader({ sportId, onClusters }: { sportId?: number; onClusters: (clusters: EventMapCluster[]) => void }) {
+  const controllerRef = useRef<AbortController | null>(null);
+
+  const load = (map: L.Map) => {
+    controllerRef.current?.abort();
+    const controller = new AbortController();
+    controllerRef.current = controller;
+    const bounds = map.getBounds();
+    api.getEventMap(
+      { south: bounds.getSouth(), west: bounds.getWest(), north: bounds.getNorth(), east: bounds.getEast() },
+      map.getZoom(),
+      { sport_id: sportId, signal: controller.signal }
+    )
+      .then((result) => onClusters(result.clusters))
+      .catch((error) => {
+        if (error?.name !== 'AbortError') console.warn('Failed to load event map:', error);
+      });
+  };
+
+  const map = useMapEvents({
+    moveend: () => load(map),
+  });
+
+  useEffect(() => {
+    load(map);
+    return () => controllerRef.current?.abort();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [map, sportId]);
+
+  return null;
+}
+
+// Cluster bubble: its popup lists the representative events and zooms into the cluster
+function ClusterMarker({ cluster, getSportIcon }: { cluster: EventMapCluster; getSportIcon: (sportName?: string) => string }) {
+  const map = useMap();
+  const [south, west, north, east] = cluster.bounds;
+
+  return (
+    <Marker
+      position={[cluster.latitude, cluster.longitude]}
+      icon={createClusterIcon(cluster.count)}
+    >
+      <Popup>
+        <div className="p-2 min-w-[200px]">
+          <p className="font-bold text-gray-900 mb-2">{cluster.count} events</p>
+          {cluster.events.map((event) => (
+            <Link
+              key={event.id}
+              href={`/events/${event.id}`}
+              className="flex items-center space-x-2 text-xs text-gray-700 hover:text-[#0ef9b4] transition-colors mb-1"
+            >
+              <span>{getSportIcon(event.sport?.name)}</span>
+              <span className="truncate">{event.title}</span>
+            </Link>
+          ))}
+          <button
+            type="button"
+            onClick={() => map.fitBounds([[south, west], [north, east]], { padding: [40, 40] })}
+            className="mt-2 inline-block text-xs bg-[#0ef9b4] text-black px-3 py-1 rounded-lg font-semibold hover:bg-[#0dd9a0] transition-colors"
+          >
+            Zoom in →
+          </button>
+        </div>
+      </Popup>
+    </Marker>
+  );
+}
+
 // Component to center map on user location
 function MapCenter({ center }: { center: [number, number] }) {
   const map = useMap();
@@ -104,29 +154,15 @@ function MapCenter({ center }: { center: [number, number] }) {
   return null;
 }
 
-export default function EventsMap({ events, userLocation }: EventsMapProps) {
+export default function EventsMap({ sportId, userLocation }: EventsMapProps) {
   const [mounted, setMounted] = useState(false);
-  const [eventLocations, setEventLocations] = useState<Array<{ event: Event; lat: number; lng: number }>>([]);
+  const [clusters, setClusters] = useState<EventMapCluster[]>([]);
   const mapIdRef = useRef(`map-${Date.now()}-${Math.random()}`);
 
   useEffect(() => {
     setMounted(true);
   }, []);
 
-  useEffect(() => {
-    const locations = events
-      .map(event => {
-        const coords = geocodeLocation(event.location);
-        if (coords) {
-          return { event, ...coords };
-        }
-        return null;
-      })
-      .filter((loc): loc is { event: Event; lat: number; lng: number } => loc !== null);
-    
-    setEventLocations(locations);
-  }, [events]);
-
   // Default center (San Francisco)
   const defaultCenter: [number, number] = [37.7749, -122.4194];
   const center = userLocation ? [userLocation.lat, userLocation.lng] as [number, number] : defaultCenter;
@@ -184,52 +220,54 @@ export default function EventsMap({ events, userLocation }: EventsMapProps) {
           </>
         )}
         
-        {eventLocations.map(({ event, lat, lng }) => (
-          <Marker
-            key={event.id}
-            position={[lat, lng]}
-            icon={createCustomIcon('#0ef9b4')}
-          >
-            <Popup>
-              <div className="p-2 min-w-[200px]">
-                <div className="flex items-start space-x-2 mb-2">
-                  <span className="text-2xl">{getSportIcon(event.sport?.name)}</span>
-                  <div className="flex-1">
+        <ClusterLoader sportId={sportId} onClusters={setClusters} />
+
+        {clusters.map((cluster) => {
+          const event = cluster.events[0];
+          if (cluster.count === 1 && event) {
+            return (
+              <Marker
+                key={cluster.cell}
+                position={[event.latitude, event.longitude]}
+                icon={createCustomIcon('#0ef9b4')}
+              >
+                <Popup>
+                  <div className="p-2 min-w-[200px]">
+                    <div className="flex items-start space-x-2 mb-2">
+                      <span className="text-2xl">{getSportIcon(event.sport?.name)}</span>
+                      <div className="flex-1">
+                        <Link
+                          href={`/events/${event.id}`}
+                          className="font-bold text-gray-900 hover:text-[#0ef9b4] transition-colors"
+                        >
+                          {event.title}
+                        </Link>
+                        <p className="text-xs text-gray-600 mt-1">{event.location}</p>
+                      </div>
+                    </div>
+                    {event.start_time && (
+                      <p className="text-xs text-gray-500">
+                        {new Date(event.start_time).toLocaleDateString('en-US', {
+                          month: 'short',
+                          day: 'numeric',
+                          hour: 'numeric',
+                          minute: '2-digit'
+                        })}
+                      </p>
+                    )}
                     <Link
                       href={`/events/${event.id}`}
-                      className="font-bold text-gray-900 hover:text-[#0ef9b4] transition-colors"
+                      className="mt-2 inline-block text-xs bg-[#0ef9b4] text-black px-3 py-1 rounded-lg font-semibold hover:bg-[#0dd9a0] transition-colors"
                     >
-                      {event.title}
+                      View Event →
                     </Link>
-                    <p className="text-xs text-gray-600 mt-1">{event.location}</p>
                   </div>
-                </div>
-                {event.start_time && (
-                  <p className="text-xs text-gray-500">
-                    {new Date(event.start_time).toLocaleDateString('en-US', {
-                      month: 'short',
-                      day: 'numeric',
-                      hour: 'numeric',
-                      minute: '2-digit'
-                    })}
-                  </p>
-                )}
-                {event.participant_count !== undefined && (
-                  <p className="text-xs text-gray-500 mt-1">
-                    👥 {event.participant_count}
-                    {event.max_participants && ` / ${event.max_participants}`} participants
-                  </p>
-                )}
-                <Link
-                  href={`/events/${event.id}`}
-                  className="mt-2 inline-block text-xs bg-[#0ef9b4] text-black px-3 py-1 rounded-lg font-semibold hover:bg-[#0dd9a0] transition-colors"
-                >
-                  View Event →
-                </Link>
-              </div>
-            </Popup>
-          </Marker>
-        ))}
+                </Popup>
+              </Marker>
+            );
+          }
+          return <ClusterMarker key={cluster.cell} cluster={cluster} getSportIcon={getSportIcon} />;
+        })}
       </MapContainer>
     </div>
   );
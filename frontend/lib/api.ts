@@ -1,4 +1,4 @@
-import { Event, Sport, User, Buddy, GroupChat, Conversation, Goal, Message, GroupMember, Post } from '@/types';
+import { Event, EventMap, Sport, User, Buddy, GroupChat, Conversation, Goal, Message, GroupMember, Post } from '@/types';
 import { logApiEnv, logApiRequest, logApiError } from './apiDebug';
 import { supabase } from './supabase';
 
@@ -355,6 +355,35 @@ export class ApiClient {
     }
   }
 
+  // Clustered markers for a map viewport; the payload is bounded whatever the number of events
+  async getEventMap(
+    bounds: { south: number; west: number; north: number; east: number },
+    zoom: number,
+    params?: { sport_id?: number; signal?: AbortSignal }
+  ): Promise<EventMap> {
+    const queryParams = new URLSearchParams({
+      south: bounds.south.toString(),
+      west: bounds.west.toString(),
+      north: bounds.north.toString(),
+      east: bounds.east.toString(),
+      zoom: Math.round(zoom).toString(),
+    });
+    if (params?.sport_id) queryParams.append('sport_id', params.sport_id.toString());
+    const url = `${this.baseUrl}/events/map?${queryParams.toString()}`;
+
+    const response = await fetch(url, {
+      method: 'GET',
+      headers: { 'Content-Type': 'application/json' },
+      signal: params?.signal,
+    });
+    if (!response.ok) {
+      const parsed = await logApiError('getEventMap', url, response);
+      const msg = typeof parsed === 'string' ? parsed : (parsed as { detail?: string })?.detail || 'Failed to fetch event map';
+      throw new Error(msg);
+    }
+    return response.json();
+  }
+
   async getEvent(eventId: number, opts?: { signal?: AbortSignal }): Promise<Event> {
     const token = await this.getToken();
     const headers: Record<string, string> = { 'Content-Type': 'application/json' };
@@ -52,6 +52,32 @@ export interface Event {
   participants?: User[];
 }
 
+export interface EventMapMarker {
+  id: number;
+  title: string;
+  location: string | null;
+  start_time: string;
+  latitude: number;
+  longitude: number;
+  sport?: Sport | null;
+}
+
+export interface EventMapCluster {
+  cell: string;
+  count: number;
+  latitude: number;
+  longitude: number;
+  bounds: [number, number, number, number]; // south, west, north, east
+  events: EventMapMarker[];
+}
+
+export interface EventMap {
+  zoom: number;
+  precision: number;
+  total: number;
+  clusters: EventMapCluster[];
+}
+
 export interface Buddy {
   id: number;
   user1_id: number;